@@ -1,25 +1,27 @@
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 from src.data_reader import *
+from src.sweep import sweepDir
+from src.figures import FigureQueue
 
 # Main path 
 dir_name = "data/i29/strain/resolution_test"
 
-# Get all folders in path
-dir_list =  getFolders(dir_name)
-
 # OBR file sufix
 file_sufix_list = ["Upper","Lower"]
 
-# Read all files in each folder
-for dir in dir_list:
-    file_prefix_list = getFiles(dir)
+# Read all files in each folder in parallel, executor='dask' or 'ray' spreads them over a cluster
+results = sweepDir(dir_name, file_sufix_list, executor='process')
 
-    if file_prefix_list:
-        for i,file_name in enumerate(file_prefix_list):
-            # Instantiate DataReader
-            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list)
-            # Set figure path            
-            fig_dir = 'figures/'+'/'.join(dir.split('/')[1:])
-            # Read data and save figure the results in figure path            
-            _ = dfreader.readData(save_figure=True,figure_dir=fig_dir)
+# Save the figures in the background, skipping the ones already up to date
+with FigureQueue() as figure_queue:
+    for result in results:
+        for path, error in result.errors:
+            print(path, error)
+        if result.reader is None:
+            continue
+        # Set figure path            
+        fig_dir = 'figures/'+'/'.join(result.file_dir.split('/')[1:])
+        os.makedirs(fig_dir, exist_ok=True)
+        figure_queue.submit(result.reader, os.path.join(fig_dir, result.file_prefix))
@@ -4,6 +4,10 @@ import numpy as np
 import os
 import logging
 from src.data_reader import *
+from src.figures import FigureQueue
+from src.overlay import plotReadersOverlay
+from src.sweep_array import SweepArray
+from src.events import detectSweepEvents
 
 # Main path 
 dir_name = "data/i29/strain/resolution_test"
@@ -18,24 +22,31 @@ file_sufix_list = ["Upper","Lower"]
 fig, ax = plt.subplots(len(file_sufix_list),figsize=(8,7), num=1)
 
 # Read all files in each folder
-for dir in dir_list:
-    file_prefix_list = getFiles(dir)
-    
-    if file_prefix_list:
-        for i,file_name in enumerate(file_prefix_list):
-            # Instantiate DataReader
-            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list, is_obr_file=True)
-            # Set figure path 
-            fig_dir = 'figures/'+'/'.join(dir.split('/')[1:])
-            # Set figure label
-            label = dir.split('/')[-1]
-            # Read data and save figure the results in figure path 
-            figure = dfreader.readData(save_figure=True,figure_dir=fig_dir,skip_rows=11)
-            # Add each curve to plot
-            ax, x_lim, y_lim = dfreader.plotOBRFileFromFigure(ax, figure, label)
+readers = list()
+with FigureQueue() as figure_queue:
+    for dir in dir_list:
+        file_prefix_list = getFiles(dir)
+        
+        if file_prefix_list:
+            for i,file_name in enumerate(file_prefix_list):
+                # Instantiate DataReader
+                dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list, is_obr_file=True)
+                # Set figure path 
+                fig_dir = 'figures/'+'/'.join(dir.split('/')[1:])
+                # Read data and save figure the results in figure path in the background
+                dfreader.readData(save_figure=True,figure_dir=fig_dir,figure_queue=figure_queue)
+                readers.append(dfreader)
+
+# Locate the strained regions of the second fiber against the first measurement
+sweep = SweepArray.fromReaders(readers, dim=1)
+events = detectSweepEvents(sweep, reference=0, window=0.005, min_width=0.002)
+print(events)
+x_window = [None, [events['start'].min(), events['end'].max()]] if len(events) else None
+
+# Add all curves to plot at once, zooming the second axis on the events
+ax, x_lim, y_lim = plotReadersOverlay(ax, readers, x_window=x_window)
 
 # Add legend and save figure
 #plt.legend(loc='upper left', fontsize='8')
-ax[1].set_xlim([1.315,1.345])
 plt.savefig("figures/i29/strain/resolution_test.png")
-plt.show()
\ No newline at end of file
+plt.show()
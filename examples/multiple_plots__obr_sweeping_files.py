@@ -5,27 +5,23 @@ import numpy as np
 import os
 import logging
 from src.data_reader import *
-
-def sweepPath(file_dir):
-    txt_file_list = [f for f in os.listdir(file_dir) if os.path.isfile(os.path.join(file_dir, f)) and f.endswith(".txt")]
-    txt_file_list = list(set([f.split('.txt')[0] for f in txt_file_list]))
-    return txt_file_list
+from src.catalog import scanCampaign
 
 # Main path 
 dir_name = "data/i29/strain/distributed_strain"
 
-# Get all folders in path
-dir_list =  getFolders(dir_name)
-
 # OBR file sufix
 file_sufix_list = []
 
+# Find every file below the main path in one pass, each file is a measurement
+catalog = scanCampaign(dir_name, file_sufix_list)
+
 # Create new plot
 fig, ax = plt.subplots(3,figsize=(8,7), num=1)
 
 # Read all files in each folder
-for dir in dir_list:
-    file_prefix_list = sweepPath(dir)
+for dir, measurements in catalog.groupByFolder().items():
+    file_prefix_list = [measurement.file_prefix for measurement in measurements]
 
     if file_prefix_list:
         for i,file_name in enumerate(file_prefix_list):
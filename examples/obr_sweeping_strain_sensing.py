@@ -5,13 +5,8 @@ import numpy as np
 import os
 import logging
 from src.data_reader import *
-
-def sweepPath(file_dir, file_order=None):
-    txt_file_list = [f for f in os.listdir(file_dir) if os.path.isfile(os.path.join(file_dir, f)) and f.endswith(".txt")]
-    txt_file_list = list(set([f.split('.txt')[0] for f in txt_file_list]))
-    if file_order is not None:
-        txt_file_list = sortFiles(txt_file_list, file_order) 
-    return txt_file_list
+from src.cache import OBRCache
+from src.catalog import scanCampaign
 
 def isInsideInterval(x, lim):
     if (lim[0] >= x[0]) & (lim[1] <= x[1]):
@@ -19,27 +14,12 @@ def isInsideInterval(x, lim):
     else:
         return False
 
-def getMean(df, minlim, maxlim, dim=0):
-    """ Calculate the mean over an interval.
-    Args:
-        df - dataframe
-    Returns:
-        ymean - numpy array - mean measurement
-    """
-    df = df.iloc[:,dim*2:dim*2+2].dropna(axis=0)
-    x = df.iloc[:,0].to_numpy()
-    y = df.iloc[:,1].to_numpy()
-    idx_min = (np.abs(x[0:25] - minlim)).argmin()
-    idx_max = (np.abs(x - maxlim)).argmin()
-    ymean = np.mean(y[idx_min:idx_max])
-    return ymean
-    
+# Parsed files are cached in ~/.cache/luna_obr, use cache.clear() to reset it
+cache = OBRCache()
+
 # Main path 
 dir_name = "data/smf/strain"
 
-# Get all folders in path
-dir_list =  getFolders(dir_name)
-
 # OBR file sufix
 file_sufix_list = []
 
@@ -49,18 +29,21 @@ order = ['0_Lower','5_Lower','10_Lower','15_Lower','20_Lower','25_Lower','30_Low
 mean_lim = [[2.35,2.45]]
 strain_shift = np.zeros((len(mean_lim), len(strain)))
 
+# Find every file below the main path in one pass, in the measurement order
+catalog = scanCampaign(dir_name, file_sufix_list, file_order=order)
+
 # Create new plot
 fig, ax = plt.subplots(3,figsize=(8,7), num=1)
 
 # Read all files in each folder
-for dir in dir_list:
-    file_prefix_list = sweepPath(dir,file_order=order)
+for dir, measurements in catalog.groupByFolder().items():
+    file_prefix_list = [measurement.file_prefix for measurement in measurements]
 
     if file_prefix_list:
         for i,file_name in enumerate(file_prefix_list):
             print(file_name)
             # Instantiate DataReader
-            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list, is_obr_file = False)
+            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list, is_obr_file = False, cache=cache)
             # Set figure path 
             fig_dir = 'figures/'+'/'.join(dir.split('/')[1:])
             # Set figure label
@@ -70,14 +53,14 @@ for dir in dir_list:
             figure = dfreader.readData(save_figure=True,figure_dir=fig_dir,skip_rows=11)
             # Add each curve to plot
             ax, x_lim, y_lim = dfreader.plotFromFigure(ax, figure, label)
-            # Get dataframe
-            df = dfreader.getDataFrame()
+            # Get the (x, y) column blocks, without NaN padding
+            blocks = dfreader.getBlocks()
             
             # Get a point in curve using interpolation
             inside_lim = [isInsideInterval(x_lim[2], lim) for lim in mean_lim]
             if any(inside_lim):
                 n = np.where(inside_lim)[0].item(0)
-                meas_mean = getMean(df[0], mean_lim[n][0],mean_lim[n][1], 2).item(0)
+                meas_mean = blocks[2].mean(mean_lim[n][0],mean_lim[n][1])
                 strain_shift[n][i] = meas_mean
     
 # Add legend and save figure
@@ -4,6 +4,12 @@ import numpy as np
 import os
 import logging
 from src.data_reader import *
+from src.cache import OBRCache
+from src.sweep_array import SweepArray
+from src.calibration import calibrate
+
+# Parsed files are cached in ~/.cache/luna_obr, use cache.clear() to reset it
+cache = OBRCache()
 
 # Main path 
 dir_name = "data/smf/strain"
@@ -15,7 +21,7 @@ dir_list =  getFolders(dir_name)
 file_sufix_list = ["Upper","Lower"]
 
 # Measurement data
-strain_shift = list()
+readers = list()
 strain = [0,5,10,15,20,25,30,35,40,45,50,55,60]
 order = ['00me','05me','10me','15me','20me','25me','30me','35me','40me','45me','50me','55me','60me']
 
@@ -30,17 +36,14 @@ for dir in dir_list:
     if file_prefix_list:
         for i,file_name in enumerate(file_prefix_list):
             # Instantiate DataReader
-            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list)
+            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list, cache=cache)
             # Set figure path 
             fig_dir = 'figures/'+'/'.join(dir.split('/')[1:])
             # Set figure label
             label = dir.split('/')[-1]
             # Read data and save figure the results in figure path 
             figure = dfreader.readData(save_figure=True,figure_dir=fig_dir)
-            # Get a point in curve using interpolation
-            meas_single = dfreader.getSingleMeasurement(2.30, 1).item(0)
-            strain_shift.append(meas_single)
-            # To calculate the mean over an interval use dfreader.getMeanMeasurement() instead
+            readers.append(dfreader)
             # Add each curve to plot
             ax, x_lim, y_lim = dfreader.plotOBRFileFromFigure(ax, figure, label)
 
@@ -48,6 +51,12 @@ for dir in dir_list:
 plt.legend(loc='upper left', fontsize='8')
 plt.savefig("figures/i29/strain/strain_test.png")
 
+# Get a point in every curve using interpolation and fit the sensitivity
+# To calculate the mean over an interval use calibrate(sweep, windows=[[minlim, maxlim]]) instead
+sweep = SweepArray.fromReaders(readers, dim=1, labels=strain)
+calibration = calibrate(sweep, positions=[2.30])
+strain_shift = calibration.shift[:,0]
+
 # Plot Figure
 sf = plt.figure(2)
 plt.plot(strain, strain_shift,'-o', label='Single Point') 
@@ -59,12 +68,4 @@ plt.savefig("figures/i29/strain/strain_sensitivity.png")
 plt.show()
 
 file_path = os.path.join(dir_name,'characterization.txt')
-save2pd = np.array(strain).reshape((-1,1))
-label = ['Microstrain']
-for i in range(1):
-    x = np.array(strain_shift).reshape((-1,1))
-    save2pd = np.concatenate((save2pd, x), axis=1)
-    label.append('Spectral Shift (GHz)')
-
-df = pd.DataFrame(save2pd,columns=label)
-df.to_csv(file_path,sep='\t',index=False)
\ No newline at end of file
+calibration.save(file_path)
\ No newline at end of file
@@ -5,6 +5,13 @@ import numpy as np
 import os
 import logging
 from src.data_reader import *
+from src.cache import OBRCache
+from src.sweep_array import SweepArray
+from src.calibration import calibrate
+from src.reference import ReferenceDifference
+
+# Parsed files are cached in ~/.cache/luna_obr, use cache.clear() to reset it
+cache = OBRCache()
 
 # Main path 
 dir_name = "data/temperature_i29_smf/i29/2m"
@@ -16,7 +23,7 @@ dir_list =  getFolders(dir_name)
 file_sufix_list = ["Upper","Lower"]
 
 # Measurement data
-strain_shift = list()
+readers = list()
 strain = [30,40,50,60,50,40,30]
 order = ['30','40','50','60','50d','40d','30d']
 
@@ -30,7 +37,7 @@ for dir in dir_list:
     if file_prefix_list:
         for i,file_name in enumerate(file_prefix_list):
             # Instantiate DataReader
-            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list)
+            dfreader = LUNAOBRDataReader(dir, file_name, file_sufix_list, cache=cache)
             # Set figure path 
             fig_dir = 'figures/'+'/'.join(dir.split('/')[1:])
             # Set figure label
@@ -38,10 +45,7 @@ for dir in dir_list:
             print(label)
             # Read data and save figure the results in figure path 
             figure = dfreader.readData(save_figure=True,figure_dir=fig_dir)
-            # Get a point in curve using interpolation
-            meas_single = dfreader.getSingleMeasurement(2.95, 1).item(0)
-            strain_shift.append(meas_single)
-            # To calculate the mean over an interval use dfreader.getMeanMeasurement() instead
+            readers.append(dfreader)
             # Add each curve to plot
             ax, x_lim, y_lim = dfreader.plotOBRFileFromFigure(ax, figure, label)
 
@@ -49,6 +53,16 @@ for dir in dir_list:
 plt.legend(loc='upper left', fontsize='8')
 plt.savefig("figures/i29/temp/2m/temp_test.png")
 
+# Get a point in every curve using interpolation and fit the sensitivity
+# To calculate the mean over an interval use calibrate(sweep, windows=[[minlim, maxlim]]) instead
+sweep = SweepArray.fromReaders(readers, dim=1, labels=strain)
+calibration = calibrate(sweep, positions=[2.95])
+strain_shift = calibration.shift[:,0]
+
+# Difference of every measurement against the first one, kept on disk for later analysis
+reference = ReferenceDifference.fromReader(readers[0], dim=1)
+difference = reference.differenceSweep(readers, dim=1, labels=strain, mmap_path=os.path.join(dir_name,'difference.npy'))
+
 # Plot Figure
 sf = plt.figure(2)
 plt.plot(strain, strain_shift,'-o', label='Single Point') 
@@ -60,13 +74,5 @@ plt.savefig("figures/i29/temp/2m/temp_sensitivity.png")
 plt.show()
 
 file_path = os.path.join(dir_name,'characterization.txt')
-save2pd = np.array(strain).reshape((-1,1))
-label = ['Microstrain']
-for i in range(1):
-    x = np.array(strain_shift).reshape((-1,1))
-    save2pd = np.concatenate((save2pd, x), axis=1)
-    label.append('Spectral Shift (GHz)')
-
-df = pd.DataFrame(save2pd,columns=label)
 print(file_path)
-df.to_csv(file_path,sep='\t',index=False)
\ No newline at end of file
+calibration.save(file_path)
\ No newline at end of file
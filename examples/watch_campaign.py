@@ -0,0 +1,30 @@
+#python -m examples.watch_campaign
+from src.data_reader import *
+from src.cache import OBRCache
+from src.watcher import OBRWatcher
+from src.calibration import RunningCalibration
+from src.figures import RunningOverlay
+
+# Main path 
+dir_name = "data/smf/strain"
+
+# OBR file sufix
+file_sufix_list = ["Upper","Lower"]
+
+# Measurement data
+strain = [0,5,10,15,20,25,30,35,40,45,50,55,60]
+order = ['00me','05me','10me','15me','20me','25me','30me','35me','40me','45me','50me','55me','60me']
+labels = dict(zip(order, strain))
+
+# Update the calibration and the multi-plot with every new export
+calibration = RunningCalibration(positions=[2.30], dim=1, label_func=lambda result: labels.get(result.file_prefix),
+                                 file_path=os.path.join(dir_name,'characterization.txt'))
+overlay = RunningOverlay("figures/i29/strain/strain_test.png")
+
+watcher = OBRWatcher(dir_name, file_sufix_list, cache=OBRCache())
+watcher.addCallback(calibration)
+watcher.addCallback(overlay)
+watcher.addCallback(lambda result: print(result.file_prefix, result.errors))
+
+# Process files until interrupted with Ctrl+C
+watcher.run()
@@ -1 +1,23 @@
-from .data_reader import LUNAOBRDataReader
\ No newline at end of file
+from .data_reader import LUNAOBRDataReader
+from .obr_parser import OBRFile, parseOBRFile
+from .cache import OBRCache
+from .sweep import SweepResult, sweepDir
+from .figures import FigureQueue
+from .length_index import LengthIndex
+from .sweep_array import SweepArray
+from .calibration import Calibration, calibrate
+from .watcher import OBRWatcher
+from .overlay import decimateMinMax, plotOverlay
+from .header import OBRHeader
+from .metadata_index import MetadataIndex
+from .export import exportSweep, importSweep
+from .profiling import Profiler
+from .catalog import Catalog, scanCampaign
+from .events import detectEvents, detectSweepEvents
+from .reference import ReferenceDifference
+from .async_reader import AsyncIngestor, sweepDirAsync
+from .pyramid import TracePyramid
+from .column_blocks import ColumnBlock
+from .memo import ResultMemo
+from .compact import CompactTrace, UniformLength
+from .executors import getExecutor
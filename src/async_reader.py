@@ -0,0 +1,176 @@
+import asyncio
+import collections
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .obr_parser import parseOBRText, _decode
+from .sweep import SweepResult, getSweepTasks
+
+_default_ingestor = None
+
+def _readBytes(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def _parseBytes(data, file_path):
+    # Decoding is done in the worker too, so the event loop only moves bytes around
+    return parseOBRText(_decode(data), file_path)
+
+class AsyncIngestor:
+    """ Executors and limits shared by the async reading API.
+    Files are read on a thread pool and parsed on a process pool, so neither the
+    blocking I/O nor the CPU-bound parsing runs on the event loop. At most
+    max_in_flight files are held in memory at once; further reads wait for a slot.
+    Usage:
+        async with AsyncIngestor(max_in_flight=4) as ingestor:
+            await reader.aread(ingestor)
+    """
+
+    def __init__(self, max_reads=4, max_workers=None, max_in_flight=8):
+        """ Create ingestor.
+        Args:
+            max_reads - integer - threads reading files
+            max_workers - integer - processes parsing files, defaults to the number of CPUs;
+                          0 parses on the read threads instead
+            max_in_flight - integer - files read or parsed at the same time
+        """
+        self.read_executor = ThreadPoolExecutor(max_workers=max_reads, thread_name_prefix='obr-read')
+        self.parse_executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 0 else self.read_executor
+        self.max_in_flight = max_in_flight
+        self._semaphore = None
+        self._loop = None
+
+    def _getSemaphore(self):
+        # A semaphore belongs to the loop it is first used in
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._semaphore
+
+    async def runIO(self, func, *args):
+        """ Run a blocking call on the read threads. """
+        return await asyncio.get_running_loop().run_in_executor(self.read_executor, func, *args)
+
+    async def parseFile(self, file_path, cache=None, options=None):
+        """ Read and parse one file without blocking the event loop.
+        Args:
+            file_path - string
+            cache - OBRCache - checked on the read threads before parsing
+            options - dict - cache key options, see LUNAOBRDataReader.getCacheOptions
+        Returns:
+            obr_file - OBRFile
+        """
+        loop = asyncio.get_running_loop()
+        async with self._getSemaphore():
+            if cache is not None:
+                obr_file = await self.runIO(cache.load, file_path, options)
+                if obr_file is not None:
+                    return obr_file
+            data = await self.runIO(_readBytes, file_path)
+            obr_file = await loop.run_in_executor(self.parse_executor, _parseBytes, data, file_path)
+            if cache is not None:
+                await self.runIO(cache.store, obr_file, options)
+            return obr_file
+
+    def close(self):
+        self.read_executor.shutdown(wait=True)
+        if self.parse_executor is not self.read_executor:
+            self.parse_executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+def getDefaultIngestor():
+    """ Get the ingestor used when none is given, created on first use.
+    Returns:
+        ingestor - AsyncIngestor
+    """
+    global _default_ingestor
+    if _default_ingestor is None:
+        _default_ingestor = AsyncIngestor()
+    return _default_ingestor
+
+async def readReaderAsync(reader, ingestor=None):
+    """ Load every sufix file of a reader concurrently, as readData does without the figure.
+    Args:
+        reader - LUNAOBRDataReader
+        ingestor - AsyncIngestor - defaults to getDefaultIngestor()
+    Returns:
+        reader - LUNAOBRDataReader - with df, obr_files and errors set
+    """
+    ingestor = ingestor or getDefaultIngestor()
+    path_list = reader.getPathList()
+    results = await asyncio.gather(*[ingestor.parseFile(path, reader.cache, reader.getCacheOptions()) for path in path_list],
+                                   return_exceptions=True)
+    reader.errors = []
+    reader._length_index = {}
+    obr_files = []
+    for path, result in zip(path_list, results):
+        if isinstance(result, Exception):
+            logging.error('Unable to read file from path: ' + path + ' (' + str(result) + ')')
+            reader.errors.append((path, "{}: {}".format(type(result).__name__, result)))
+        else:
+            obr_files.append(result)
+    # Everything is loaded now, so a lazy reader behaves like an eager one
+    reader.lazy = False
+    reader._setFiles(obr_files)
+    return reader
+
+async def readMeasurementAsync(file_dir, file_prefix, file_sufix_list, is_obr_file=True, cache=None, ingestor=None):
+    """ Read one measurement, collecting errors instead of raising, as readMeasurement does.
+    Returns:
+        result - SweepResult
+    """
+    from .data_reader import LUNAOBRDataReader
+    reader = LUNAOBRDataReader(file_dir, file_prefix, file_sufix_list, is_obr_file=is_obr_file, cache=cache)
+    try:
+        await readReaderAsync(reader, ingestor)
+    except Exception as e:
+        return SweepResult(file_dir, file_prefix, None, [(file_prefix, "{}: {}".format(type(e).__name__, e))])
+    if not reader.obr_files:
+        return SweepResult(file_dir, file_prefix, None, reader.errors)
+    return SweepResult(file_dir, file_prefix, reader, reader.errors)
+
+async def sweepDirAsync(dir_name, file_sufix_list, file_order=None, is_numeric=False, is_obr_file=True, cache=None,
+                        ingestor=None, max_pending=4):
+    """ Iterate over every measurement below a directory without blocking the event loop.
+    At most max_pending measurements are read ahead of the consumer, so a slow
+    consumer slows the reading down instead of filling memory.
+    Usage:
+        async for result in sweepDirAsync('data/smf/strain', ['Upper','Lower']):
+            ...
+    Args:
+        dir_name - string - campaign root, scanned recursively with scanCampaign
+        file_sufix_list - list of strings - e.g. ["Upper","Lower"], empty for single files
+        file_order - list of strings - prefix order, as in getFiles
+        is_numeric - bool - keep only files whose names begin with a number
+        is_obr_file - bool
+        cache - OBRCache
+        ingestor - AsyncIngestor - defaults to getDefaultIngestor()
+        max_pending - integer - measurements read ahead
+    Yields:
+        result - SweepResult, in folder order and then file order
+    """
+    ingestor = ingestor or getDefaultIngestor()
+    tasks = await ingestor.runIO(getSweepTasks, dir_name, file_sufix_list, file_order, is_numeric)
+    pending = collections.deque()
+    tasks = iter(tasks)
+    try:
+        while True:
+            while len(pending) < max(1, max_pending):
+                task = next(tasks, None)
+                if task is None:
+                    break
+                file_dir, file_prefix = task
+                pending.append(asyncio.ensure_future(readMeasurementAsync(file_dir, file_prefix, file_sufix_list,
+                                                                          is_obr_file, cache, ingestor)))
+            if not pending:
+                return
+            yield await pending.popleft()
+    finally:
+        # The consumer stopped early, do not leave reads running
+        for future in pending:
+            future.cancel()
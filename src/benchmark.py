@@ -0,0 +1,238 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from .synthetic import getSyntheticHeader, writeOBRFile, writeSyntheticSweep
+from .obr_parser import parseOBRFile
+from .data_reader import LUNAOBRDataReader
+from .sweep import sweepDir
+
+SAMPLE_SIZES = [10000, 100000, 1000000]
+SWEEP_SIZES = [4, 16]
+QUICK_SAMPLE_SIZES = [10000, 100000]
+QUICK_SWEEP_SIZES = [4]
+
+def measure(func, repeat=3):
+    """ Time a call and measure its peak Python/numpy memory.
+    The timed runs are done without tracemalloc, which slows allocations down, and
+    the peak memory comes from one extra traced run.
+    Args:
+        func - callable without arguments
+        repeat - integer - timed runs, the fastest is kept
+    Returns:
+        seconds - float
+        peak_bytes - integer
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        func()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak_bytes
+
+def _record(name, params, seconds, peak_bytes, n_bytes=None, calls=1):
+    record = {'name': name, 'params': params, 'seconds': seconds / calls, 'peak_mb': peak_bytes / 1024**2}
+    if n_bytes is not None:
+        record['mb_per_s'] = n_bytes / 1024**2 / seconds
+    return record
+
+def getKey(record):
+    return record['name'] + json.dumps(record['params'], sort_keys=True)
+
+def readLegacy(file_path, skip_rows):
+    """ Read a file with the pd.read_csv call the reader used before the single-pass parser,
+    kept as the reference the parser benchmarks are compared with.
+    Args:
+        file_path - string
+        skip_rows - integer - header lines before the column labels
+    Returns:
+        df - dataframe
+    """
+    return pd.read_csv(file_path, sep="\t", skiprows=skip_rows, header=0, index_col=False)
+
+def _benchFile(work_dir, n_samples, repeat):
+    file_dir = os.path.join(work_dir, 'file_{}'.format(n_samples))
+    os.makedirs(file_dir, exist_ok=True)
+    path = os.path.join(file_dir, '0_Upper.txt')
+    if not os.path.isfile(path):
+        writeOBRFile(path, n_samples, seed=0)
+    n_bytes = os.path.getsize(path)
+    params = {'samples': n_samples}
+    results = []
+
+    seconds, peak = measure(lambda: parseOBRFile(path), repeat)
+    results.append(_record('parse', params, seconds, peak, n_bytes))
+    skip_rows = len(getSyntheticHeader())
+    seconds, peak = measure(lambda: readLegacy(path, skip_rows), repeat)
+    results.append(_record('parse.read_csv', params, seconds, peak, n_bytes))
+
+    reader = LUNAOBRDataReader(file_dir, '0', ['Upper'])
+    seconds, peak = measure(lambda: reader.readData(save_figure=False), repeat)
+    results.append(_record('readData', params, seconds, peak, n_bytes))
+
+    length = reader.df[0].iloc[:,0].to_numpy()
+    minlim, maxlim = length[length.size // 3], length[length.size // 2]
+
+    def coldMean():
+        reader._length_index = {}
+        reader.getMeanMeasurement(minlim, maxlim)
+    seconds, peak = measure(coldMean, repeat)
+    results.append(_record('getMeanMeasurement.cold', params, seconds, peak))
+
+    n_calls = 100
+    def warmMean():
+        for _ in range(n_calls):
+            reader.getMeanMeasurement(minlim, maxlim)
+    seconds, peak = measure(warmMean, repeat)
+    results.append(_record('getMeanMeasurement.warm', params, seconds, peak, calls=n_calls))
+
+    xnew = np.linspace(length[1], length[-2], 1000)
+    seconds, peak = measure(lambda: reader.getSingleMeasurement(xnew), repeat)
+    results.append(_record('getSingleMeasurement.1000', params, seconds, peak))
+
+    figure_path = os.path.join(file_dir, 'figure')
+    seconds, peak = measure(lambda: reader.plotOBRFileFromDataFrame(figure_path), repeat)
+    results.append(_record('plot', params, seconds, peak))
+    return results
+
+def _benchSweep(work_dir, n_files, n_samples, repeat):
+    dir_name = os.path.join(work_dir, 'sweep_{}'.format(n_files))
+    file_dir = os.path.join(dir_name, 'measurements')
+    if not os.path.isdir(file_dir):
+        writeSyntheticSweep(file_dir, labels=[100 * i for i in range(n_files // 2)], n_samples=n_samples)
+    n_bytes = sum(entry.stat().st_size for entry in os.scandir(file_dir))
+    params = {'files': n_files, 'samples': n_samples}
+    results = []
+
+    seconds, peak = measure(lambda: sweepDir(dir_name, ['Upper', 'Lower'], max_workers=1), repeat)
+    results.append(_record('sweepDir.serial', params, seconds, peak, n_bytes))
+    # Peak memory of the workers is not traced, only the time is meaningful here
+    seconds, _ = measure(lambda: sweepDir(dir_name, ['Upper', 'Lower']), repeat)
+    results.append(_record('sweepDir.parallel', params, seconds, 0, n_bytes))
+    return results
+
+def runBenchmarks(sample_sizes=None, sweep_sizes=None, sweep_samples=100000, repeat=3, work_dir=None):
+    """ Run the benchmark suite on synthetic OBR files.
+    Args:
+        sample_sizes - list of integers - trace lengths of the single-file benchmarks
+        sweep_sizes - list of integers - number of files of the sweep benchmarks
+        sweep_samples - integer - trace length of the sweep files
+        repeat - integer - timed runs of each benchmark
+        work_dir - string - where the synthetic files are written and kept, a temporary folder if None
+    Returns:
+        results - list of dicts - name, params, seconds, peak_mb and mb_per_s when relevant
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    sample_sizes = SAMPLE_SIZES if sample_sizes is None else sample_sizes
+    sweep_sizes = SWEEP_SIZES if sweep_sizes is None else sweep_sizes
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = work_dir or tmp_dir
+        results = []
+        for n_samples in sample_sizes:
+            results.extend(_benchFile(work_dir, n_samples, repeat))
+        for n_files in sweep_sizes:
+            results.extend(_benchSweep(work_dir, n_files, sweep_samples, repeat))
+    return results
+
+def saveBaseline(results, file_path):
+    """ Store benchmark results as the baseline.
+    Args:
+        results - list of dicts - output of runBenchmarks
+        file_path - string - '.json' file
+    """
+    with open(file_path, 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'numpy': np.__version__, 'results': results}, f, indent=1)
+
+def loadBaseline(file_path):
+    """ Load stored benchmark results.
+    Args:
+        file_path - string - '.json' file
+    Returns:
+        results - list of dicts, None if the file cannot be read
+    """
+    try:
+        with open(file_path) as f:
+            return json.load(f)['results']
+    except (OSError, ValueError, KeyError) as e:
+        logging.error('Unable to read baseline from path: ' + file_path + ' (' + str(e) + ')')
+        return
+
+def compareBaseline(results, baseline, tolerance=0.25, min_seconds=1e-4):
+    """ Find the benchmarks slower or using more memory than the baseline.
+    Args:
+        results - list of dicts - output of runBenchmarks
+        baseline - list of dicts - stored results
+        tolerance - float - allowed relative increase
+        min_seconds - float - time increases below this are ignored as noise
+    Returns:
+        regressions - list of (key, metric, baseline value, new value)
+    """
+    reference = {getKey(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        base = reference.get(getKey(record))
+        if base is None:
+            continue
+        if record['seconds'] > base['seconds'] * (1 + tolerance) and record['seconds'] - base['seconds'] > min_seconds:
+            regressions.append((getKey(record), 'seconds', base['seconds'], record['seconds']))
+        if base['peak_mb'] > 0 and record['peak_mb'] > base['peak_mb'] * (1 + tolerance):
+            regressions.append((getKey(record), 'peak_mb', base['peak_mb'], record['peak_mb']))
+    return regressions
+
+def formatResults(results):
+    lines = ['{:<28}{:<30}{:>12}{:>10}{:>10}'.format('benchmark', 'params', 'ms', 'MB/s', 'peak MB')]
+    for record in results:
+        params = ' '.join('{}={}'.format(key, value) for key, value in record['params'].items())
+        mb_per_s = '{:.1f}'.format(record['mb_per_s']) if 'mb_per_s' in record else '-'
+        lines.append('{:<28}{:<30}{:>12.3f}{:>10}{:>10.1f}'.format(record['name'], params, 1000 * record['seconds'],
+                                                                    mb_per_s, record['peak_mb']))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark parsing, queries and plotting on synthetic OBR files.')
+    parser.add_argument('--quick', action='store_true', help='smaller files and sweeps')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--work-dir', help='keep the synthetic files in this folder')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(QUICK_SAMPLE_SIZES if args.quick else None, QUICK_SWEEP_SIZES if args.quick else None,
+                            repeat=args.repeat, work_dir=args.work_dir)
+    print(formatResults(results))
+    if args.output:
+        saveBaseline(results, args.output)
+    if args.save_baseline:
+        saveBaseline(results, args.baseline)
+        print('Baseline saved to ' + args.baseline)
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print('No baseline at ' + args.baseline + ', run with --save-baseline to create one')
+        return 0
+    baseline = loadBaseline(args.baseline)
+    if baseline is None:
+        return 1
+    regressions = compareBaseline(results, baseline, args.tolerance)
+    for key, metric, base, new in regressions:
+        print('REGRESSION {} {}: {:.4g} -> {:.4g}'.format(key, metric, base, new))
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import numpy as np
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from .obr_parser import OBRFile
+
+CACHE_VERSION = 1
+
+# Helpers shared by the on-disk caches (OBRCache, ResultMemo): entries are written
+# atomically, their mtime records the last use and the oldest are evicted first.
+
+def atomicWrite(cache_dir, path, writer):
+    """ Write a cache file through a temporary file, so concurrent readers never see partial entries.
+    Args:
+        cache_dir - string - directory of the temporary file, on the same filesystem as path
+        path - string - destination
+        writer - callable - writes the content to a binary file object
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def touchEntry(path):
+    """ Refresh the mtime of a cache file so eviction keeps recently used entries. """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def listEntries(cache_dir, suffix):
+    """ List the entries of a cache directory.
+    Args:
+        cache_dir - string
+        suffix - string - extension of the file that records the last use of an entry
+    Returns:
+        list of tuples - (last use, size in bytes, key)
+    """
+    entries = []
+    try:
+        scan = os.scandir(cache_dir)
+    except OSError:
+        return entries
+    with scan:
+        for entry in scan:
+            if entry.name.endswith(suffix):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.name[:-len(suffix)]))
+    return entries
+
+def evictEntries(entries, max_bytes, remove):
+    """ Remove the least recently used entries until the total fits in max_bytes.
+    Args:
+        entries - list of tuples - as returned by listEntries
+        max_bytes - integer
+        remove - callable - removes the files of a key
+    Returns:
+        integer - size left in bytes
+    """
+    entries = sorted(entries)
+    total = sum(entry[1] for entry in entries)
+    for _, size, key in entries:
+        if total <= max_bytes:
+            break
+        remove(key)
+        total -= size
+    return total
+
+def removeFiles(paths):
+    """ Remove files, ignoring those already gone. """
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class OBRCache:
+    """ On-disk cache of parsed OBR files.
+    Each entry is a column-major '.npy' array plus a '.json' file with the header and
+    column labels. Entries are keyed on the absolute source path, its size and mtime
+    and the parser options, so editing or replacing a source file invalidates them.
+    Hits are memory-mapped instead of being read into memory.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2*1024**3):
+        """ Create cache.
+        Args:
+            cache_dir - string - cache directory, defaults to ~/.cache/luna_obr
+            max_bytes - integer - size limit, the least recently used entries are evicted above it
+        """
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'luna_obr')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Size of the directory, scanned once and then updated on every store
+        self._size = None
+
+    def _key(self, file_path, options):
+        st = os.stat(file_path)
+        payload = json.dumps([CACHE_VERSION, os.path.abspath(file_path), st.st_size, st.st_mtime_ns, options],
+                             sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _entryPaths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.npy', base + '.json'
+
+    def _pyramidPath(self, key):
+        return os.path.join(self.cache_dir, key + '.pyr.npz')
+
+    def load(self, file_path, options=None):
+        """ Load a parsed file from cache.
+        Args:
+            file_path - string - source path
+            options - dict - parser options
+        Returns:
+            obr_file - OBRFile or None on a miss
+        """
+        try:
+            npy_path, meta_path = self._entryPaths(self._key(file_path, options))
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            data = np.load(npy_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return
+
+        touchEntry(npy_path)
+        return OBRFile(file_path, meta['header'], meta['columns'], data)
+
+    def store(self, obr_file, options=None):
+        """ Store a parsed file in cache.
+        Args:
+            obr_file - OBRFile
+            options - dict - parser options
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            npy_path, meta_path = self._entryPaths(self._key(obr_file.file_path, options))
+            meta = {'file_path': os.path.abspath(obr_file.file_path),
+                    'header': obr_file.header,
+                    'columns': obr_file.columns}
+            # Write to temporary files first so concurrent readers never see partial entries
+            atomicWrite(self.cache_dir, npy_path, lambda f: np.save(f, np.ascontiguousarray(obr_file.data)))
+            atomicWrite(self.cache_dir, meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+            self._addSize([npy_path, meta_path])
+        except OSError as e:
+            logging.error('Unable to write cache entry for ' + str(obr_file.file_path) + ': ' + str(e))
+            return
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def loadPyramid(self, file_path, length, values, options=None):
+        """ Load the zoom pyramid stored next to a cached file.
+        Args:
+            file_path - string - source path
+            length - numpy array
+            values - numpy array - value columns the pyramid was built from
+            options - dict - parser options
+        Returns:
+            pyramid - TracePyramid or None on a miss
+        """
+        from .pyramid import TracePyramid
+        try:
+            return TracePyramid.load(self._pyramidPath(self._key(file_path, options)), length, values)
+        except (OSError, ValueError, KeyError):
+            return
+
+    def storePyramid(self, file_path, pyramid, options=None):
+        """ Store the zoom pyramid of a file next to its cache entry.
+        Args:
+            file_path - string - source path
+            pyramid - TracePyramid
+            options - dict - parser options
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pyramid_path = self._pyramidPath(self._key(file_path, options))
+            atomicWrite(self.cache_dir, pyramid_path, pyramid.save)
+            self._addSize([pyramid_path])
+        except OSError as e:
+            logging.error('Unable to write pyramid cache entry for ' + str(file_path) + ': ' + str(e))
+
+    def _entries(self):
+        """ List cache entries, sized with their header and pyramid files.
+        Returns:
+            list of tuples - (last use, size in bytes, key)
+        """
+        entries = []
+        for mtime, size, key in listEntries(self.cache_dir, '.npy'):
+            for path in [self._entryPaths(key)[1], self._pyramidPath(key)]:
+                try:
+                    size += os.path.getsize(path)
+                except OSError:
+                    pass
+            entries.append((mtime, size, key))
+        return entries
+
+    def size(self):
+        """ Get total cache size.
+        Returns:
+            integer - size in bytes
+        """
+        return sum(entry[1] for entry in self._entries())
+
+    def _addSize(self, paths):
+        # The directory is only scanned on the first store, or once it may be full
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += sum(os.path.getsize(path) for path in paths)
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache fits in max_bytes. """
+        self._size = evictEntries(self._entries(), self.max_bytes, self._remove)
+
+    def _remove(self, key):
+        removeFiles(list(self._entryPaths(key)) + [self._pyramidPath(key)])
+
+    def clear(self):
+        """ Remove every entry from cache. """
+        for _, _, key in self._entries():
+            self._remove(key)
+        self._size = None
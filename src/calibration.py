@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+import logging
+import re
+from .length_index import LengthIndex
+from .sweep_array import resampleIndex, resample
+
+def getShiftMatrix(sweep, positions=None, windows=None, channel=0):
+    """ Get the measurement of every file at every sensing point in one pass.
+    Args:
+        sweep - SweepArray
+        positions - list of floats - lengths interpolated as in getSingleMeasurement
+        windows - list - [minlim, maxlim] pairs averaged as in getMeanMeasurement
+        channel - integer or string - value column
+    Returns:
+        shift - numpy array - shape (files, positions + windows)
+    """
+    values = sweep.getChannel(channel)
+    columns = []
+
+    if positions is not None and len(positions):
+        positions = np.asarray(positions, dtype=np.float64)
+        if positions.min() < sweep.length[0] or positions.max() > sweep.length[-1]:
+            raise ValueError('Sensing positions outside the sweep length grid')
+        idx, weight = resampleIndex(sweep.length, positions)
+        columns.append(resample(values, idx, weight))
+
+    if windows is not None and len(windows):
+        windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+        idx_min, idx_max = LengthIndex(sweep.length, values[:1]).window(windows[:,0], windows[:,1])
+        # Only the samples of each window are summed, in float64, so compact sweeps are not
+        # copied; a NaN sample makes its window NaN, as in LengthIndex
+        means = np.full((values.shape[0], windows.shape[0]), np.nan)
+        for k, (start, stop) in enumerate(zip(np.atleast_1d(idx_min), np.atleast_1d(idx_max))):
+            if stop > start:
+                means[:, k] = np.sum(values[:, start:stop], axis=1, dtype=np.float64) / (stop - start)
+        columns.append(means)
+
+    if not columns:
+        raise ValueError('Either positions or windows must be given')
+    return np.concatenate(columns, axis=1)
+
+class Calibration:
+    """ Sensitivity fit of every sensing point.
+    Attributes:
+        labels - numpy array - strain, temperature... of each file
+        points - list of strings - description of each sensing point
+        shift - numpy array - measurement matrix with shape (files, points)
+        coef - numpy array - polynomial coefficients with shape (deg + 1, points), highest degree first
+        residuals - numpy array - fit residuals with shape (files, points)
+    """
+
+    def __init__(self, labels, points, shift, coef, residuals):
+        self.labels = labels
+        self.points = points
+        self.shift = shift
+        self.coef = coef
+        self.residuals = residuals
+
+    @property
+    def sensitivity(self):
+        """ Linear coefficient of each sensing point. """
+        return self.coef[-2]
+
+    def rmse(self):
+        """ Root mean square residual of each sensing point. """
+        return np.sqrt(np.mean(self.residuals**2, axis=0))
+
+    def toDataFrame(self, label_name='Microstrain', value_name='Spectral Shift (GHz)'):
+        """ Get the characterization table, one row per file and one column per sensing point.
+        Returns:
+            df - dataframe
+        """
+        if len(self.points) == 1:
+            columns = [label_name, value_name]
+        else:
+            columns = [label_name] + ["{} @ {}".format(value_name, point) for point in self.points]
+        return pd.DataFrame(np.column_stack((self.labels, self.shift)), columns=columns)
+
+    def coefficientsDataFrame(self):
+        """ Get the fit table, one row per sensing point.
+        Returns:
+            df - dataframe
+        """
+        deg = self.coef.shape[0] - 1
+        df = pd.DataFrame(self.coef.T, columns=["c{}".format(deg - i) for i in range(deg + 1)])
+        df.insert(0, 'Point', self.points)
+        df['RMSE'] = self.rmse()
+        return df
+
+    def save(self, file_path, label_name='Microstrain', value_name='Spectral Shift (GHz)'):
+        """ Write the characterization table in a single write.
+        Args:
+            file_path - string
+        """
+        self.toDataFrame(label_name, value_name).to_csv(file_path, sep='\t', index=False)
+
+def calibrate(sweep, positions=None, windows=None, deg=1, channel=0, labels=None, memo=None):
+    """ Fit the sensitivity of every sensing point of a sweep.
+    Args:
+        sweep - SweepArray
+        positions - list of floats - sensing lengths
+        windows - list - [minlim, maxlim] sensing windows
+        deg - integer - polynomial degree, 1 for a linear sensitivity
+        channel - integer or string - value column
+        labels - list of floats - strain, temperature... of each file, defaults to sweep.labels
+        memo - ResultMemo - if set, fits of unchanged sweeps are reused
+    Returns:
+        calibration - Calibration
+    """
+    labels = sweep.labels if labels is None else np.asarray(labels, dtype=np.float64)
+    if labels is None:
+        raise ValueError('Sweep labels are required for calibration')
+
+    if memo is not None:
+        # The sweep is hashed once, so repeated calls only hash the labels
+        return memo.call('calibrate', [sweep.getContentHash(), labels], [positions, windows, deg, channel],
+                         lambda: calibrate(sweep, positions, windows, deg, channel, labels))
+
+    shift = getShiftMatrix(sweep, positions, windows, channel)
+    coef = np.polyfit(labels, shift, deg)
+    residuals = shift - np.vander(labels, deg + 1) @ coef
+
+    points = ["{:g}".format(p) for p in (positions if positions is not None else [])]
+    points += ["{:g}-{:g}".format(w[0], w[1]) for w in (windows if windows is not None else [])]
+    return Calibration(labels, points, shift, coef, residuals)
+
+def getLabelFromPrefix(file_prefix):
+    """ Get the leading number of a measurement prefix, e.g. '50d' -> 50.0.
+    Args:
+        file_prefix - string
+    Returns:
+        float or None
+    """
+    match = re.match(r'[-+]?\d+(\.\d+)?', file_prefix)
+    return float(match.group(0)) if match else None
+
+class RunningCalibration:
+    """ Calibration updated one measurement at a time.
+    Each new measurement adds one row to the shift matrix and the sensitivity is refitted,
+    so it can be passed to OBRWatcher as a callback.
+    """
+
+    def __init__(self, positions=None, windows=None, deg=1, dim=0, channel=0, label_func=None, file_path=None):
+        """ Create calibration.
+        Args:
+            positions - list of floats - sensing lengths
+            windows - list - [minlim, maxlim] sensing windows
+            deg - integer - polynomial degree
+            dim - integer - index of the sufix file used
+            channel - integer - value column
+            label_func - callable - maps a SweepResult to its strain, temperature..., defaults to the prefix number
+            file_path - string - if set, the characterization table is rewritten after every update
+        """
+        self.positions = [] if positions is None else list(positions)
+        self.windows = [] if windows is None else [list(w) for w in windows]
+        self.deg = deg
+        self.dim = dim
+        self.channel = channel
+        self.label_func = label_func if label_func is not None else (lambda result: getLabelFromPrefix(result.file_prefix))
+        self.file_path = file_path
+        self.rows = {}
+        self.calibration = None
+
+    def update(self, result):
+        """ Add or replace the measurement of a SweepResult and refit.
+        Args:
+            result - SweepResult
+        Returns:
+            calibration - Calibration or None while there are not enough measurements
+        """
+        if result.reader is None:
+            return self.calibration
+        label = self.label_func(result)
+        if label is None:
+            logging.error('No label for measurement ' + result.file_prefix)
+            return self.calibration
+
+        index = result.reader.getLengthIndex(self.dim)
+        row = []
+        if self.positions:
+            row.extend(np.atleast_1d(index.interpolate(self.positions, self.channel)))
+        if self.windows:
+            windows = np.asarray(self.windows, dtype=np.float64)
+            row.extend(np.atleast_1d(index.mean(windows[:,0], windows[:,1], self.channel)))
+        self.rows[(result.file_dir, result.file_prefix)] = (label, row)
+
+        if len(self.rows) > self.deg:
+            labels = np.array([label for label, _ in self.rows.values()])
+            shift = np.array([row for _, row in self.rows.values()])
+            coef = np.polyfit(labels, shift, self.deg)
+            residuals = shift - np.vander(labels, self.deg + 1) @ coef
+            points = ["{:g}".format(p) for p in self.positions] + ["{:g}-{:g}".format(w[0], w[1]) for w in self.windows]
+            self.calibration = Calibration(labels, points, shift, coef, residuals)
+            if self.file_path is not None:
+                self.calibration.save(self.file_path)
+        return self.calibration
+
+    def __call__(self, result):
+        self.update(result)
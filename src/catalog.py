@@ -0,0 +1,245 @@
+import logging
+import os
+import re
+from .profiling import profileStage
+
+_NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+
+def naturalKey(name):
+    """ Sort key ordering the numbers inside a name by value, so '5' comes before '10'.
+    Args:
+        name - string
+    Returns:
+        tuple
+    """
+    return tuple((0, float(part), '') if i % 2 else (1, 0.0, part)
+                 for i, part in enumerate(_NUMBER.split(name)) if part)
+
+def _walk(dir_name, recursive=True):
+    """ Walk a folder tree once with os.scandir.
+    Entry types come from the directory listing itself, so no file is stat'ed.
+    Hidden folders are skipped and symlinked folders are followed only once.
+    Yields:
+        file_dir - string
+        entries - list of os.DirEntry - files of the folder
+    """
+    stack = [dir_name]
+    visited = set()
+    while stack:
+        file_dir = stack.pop()
+        files = []
+        folders = []
+        try:
+            with os.scandir(file_dir) as scan:
+                for entry in scan:
+                    try:
+                        if entry.is_file():
+                            files.append(entry)
+                        elif recursive and entry.is_dir() and not entry.name.startswith('.'):
+                            if entry.is_symlink():
+                                real_path = os.path.realpath(entry.path)
+                                if real_path in visited:
+                                    continue
+                                visited.add(real_path)
+                            folders.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.error('Unable to list ' + file_dir + ': ' + str(e))
+            continue
+        yield file_dir, files
+        # Reversed so folders are visited in name order
+        stack.extend(sorted(folders, reverse=True))
+
+def getFolderTree(dir_name):
+    """ List a folder and all of its subfolders.
+    Args:
+        dir_name - string
+    Returns:
+        list of strings
+    """
+    return [file_dir for file_dir, _ in _walk(dir_name)]
+
+class Measurement:
+    """ Files of one measurement, e.g. '0_Upper.txt' and '0_Lower.txt'.
+    Attributes:
+        file_dir - string - folder
+        file_prefix - string - measurement prefix, as given to LUNAOBRDataReader
+        files - dict - sufix to os.DirEntry, '' for a file without sufix
+    """
+
+    def __init__(self, file_dir, file_prefix):
+        self.file_dir = file_dir
+        self.file_prefix = file_prefix
+        self.files = {}
+
+    @property
+    def sufixes(self):
+        return list(self.files)
+
+    @property
+    def paths(self):
+        return [entry.path for entry in self.files.values()]
+
+    @property
+    def sort_key(self):
+        return naturalKey(self.file_prefix)
+
+    def getPath(self, sufix):
+        entry = self.files.get(sufix)
+        return entry.path if entry is not None else None
+
+    def stat(self, sufix):
+        """ Get the stat of one file. The result is cached by os.scandir, and on Windows
+        it comes with the directory listing at no extra cost.
+        Args:
+            sufix - string
+        Returns:
+            os.stat_result
+        """
+        return self.files[sufix].stat()
+
+    @property
+    def size(self):
+        return sum(self.stat(sufix).st_size for sufix in self.files)
+
+    @property
+    def mtime_ns(self):
+        return max(self.stat(sufix).st_mtime_ns for sufix in self.files)
+
+    def hasSufixes(self, file_sufix_list):
+        return all(sufix in self.files for sufix in file_sufix_list)
+
+    def __repr__(self):
+        return "Measurement({!r}, {!r}, sufixes={})".format(self.file_dir, self.file_prefix, self.sufixes)
+
+class Catalog:
+    """ Measurements found below a campaign root, in sweep order. """
+
+    def __init__(self, dir_name, measurements):
+        self.dir_name = dir_name
+        self.measurements = measurements
+
+    def __len__(self):
+        return len(self.measurements)
+
+    def __iter__(self):
+        return iter(self.measurements)
+
+    def __getitem__(self, i):
+        return self.measurements[i]
+
+    def folders(self):
+        """ Get the folders holding measurements, in catalog order.
+        Returns:
+            list of strings
+        """
+        return list(dict.fromkeys(measurement.file_dir for measurement in self.measurements))
+
+    def groupByFolder(self):
+        """ Returns:
+            dict - folder to list of Measurement
+        """
+        groups = {}
+        for measurement in self.measurements:
+            groups.setdefault(measurement.file_dir, []).append(measurement)
+        return groups
+
+    def getTasks(self):
+        """ Returns:
+            list of tuples - (file_dir, file_prefix) of each measurement, as used by sweepDir
+        """
+        return [(measurement.file_dir, measurement.file_prefix) for measurement in self.measurements]
+
+    def getPaths(self):
+        """ Returns:
+            list of strings - every file of every measurement
+        """
+        return [path for measurement in self.measurements for path in measurement.paths]
+
+    def complete(self, file_sufix_list):
+        """ Keep the measurements having a file for every sufix.
+        Args:
+            file_sufix_list - list of strings
+        Returns:
+            catalog - Catalog
+        """
+        return Catalog(self.dir_name, [measurement for measurement in self.measurements
+                                       if measurement.hasSufixes(file_sufix_list)])
+
+def _splitName(name, file_sufix_list):
+    """ Split a file name without extension into (prefix, sufix), None if it does not match. """
+    if file_sufix_list is None:
+        prefix, _, sufix = name.partition('_')
+        return prefix, sufix
+    if not file_sufix_list:
+        return name, ''
+    for sufix in file_sufix_list:
+        if name.endswith('_' + sufix) and len(name) > len(sufix) + 1:
+            return name[:-len(sufix)-1], sufix
+    return
+
+def scanCampaign(dir_name, file_sufix_list=None, is_numeric=False, file_order=None, natural_sort=False,
+                 recursive=True, with_stat=False, extension='.txt'):
+    """ Catalog every measurement below a campaign root in a single walk.
+    Args:
+        dir_name - string - campaign root
+        file_sufix_list - list of strings - e.g. ["Upper","Lower"]: files are grouped by the prefix before
+                          '_<sufix>', so prefixes may contain '_'; [] makes every file a measurement on its
+                          own; None groups by the text before the first '_', as getFiles does
+        is_numeric - bool - keep only measurements whose names begin with a number
+        file_order - list of strings - prefix order, measurements not listed are left out, as in sortFiles
+        natural_sort - bool - order prefixes by the numbers they contain instead of as text
+        recursive - bool - also scan subfolders at any depth
+        with_stat - bool - stat every file during the scan, otherwise stats are read on first use
+        extension - string - file extension
+    Returns:
+        catalog - Catalog - measurements ordered by folder and then by prefix
+    """
+    if file_order is not None:
+        # First occurrence wins, as in sortFiles
+        rank = {}
+        for i, name in enumerate(file_order):
+            rank.setdefault(name, i)
+
+    folder_rank = {}
+    measurements = []
+    with profileStage('scanCampaign', dir_name):
+        for file_dir, entries in _walk(dir_name, recursive):
+            folder_rank[file_dir] = len(folder_rank)
+            groups = {}
+            for entry in entries:
+                if not entry.name.endswith(extension):
+                    continue
+                split = _splitName(entry.name[:-len(extension)], file_sufix_list)
+                if split is None:
+                    continue
+                prefix, sufix = split
+                if not prefix or (is_numeric and not prefix[0].isnumeric()):
+                    continue
+                if file_order is not None and prefix not in rank:
+                    continue
+                measurement = groups.get(prefix)
+                if measurement is None:
+                    measurement = groups[prefix] = Measurement(file_dir, prefix)
+                measurement.files[sufix] = entry
+                if with_stat:
+                    entry.stat()
+            measurements.extend(groups.values())
+
+        if file_sufix_list:
+            sufix_rank = {sufix: i for i, sufix in enumerate(file_sufix_list)}
+            for measurement in measurements:
+                measurement.files = dict(sorted(measurement.files.items(), key=lambda item: sufix_rank[item[0]]))
+        else:
+            for measurement in measurements:
+                measurement.files = dict(sorted(measurement.files.items()))
+
+        if file_order is not None:
+            key = lambda measurement: (folder_rank[measurement.file_dir], rank[measurement.file_prefix])
+        elif natural_sort:
+            key = lambda measurement: (folder_rank[measurement.file_dir], measurement.sort_key)
+        else:
+            key = lambda measurement: (folder_rank[measurement.file_dir], measurement.file_prefix)
+        measurements.sort(key=key)
+    return Catalog(dir_name, measurements)
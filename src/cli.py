@@ -0,0 +1,288 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Only the standard library is imported here; pandas, matplotlib and h5py are
+# loaded by the commands that need them, so headless data-only runs stay light.
+
+DEFAULT_CONFIG = {
+    'file_sufix_list': ['Upper', 'Lower'],
+    'file_order': None,
+    'is_numeric': False,
+    'is_obr_file': True,
+    'labels': None,
+    'cache': True,
+    'compact': False,
+    'executor': None,
+    'executor_address': None,
+    'batch_size': 1,
+    'figure_dir': 'figures',
+}
+
+def loadConfig(file_path):
+    """ Read a campaign config file.
+    Paths in the config are relative to the working directory, as in the examples.
+    Args:
+        file_path - string - '.json' file, or '.yaml'/'.yml' if PyYAML is installed
+    Returns:
+        config - dict - with the defaults of DEFAULT_CONFIG filled in
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML config files require the 'PyYAML' package")
+            user_config = yaml.safe_load(f)
+        else:
+            user_config = json.load(f)
+    if not isinstance(user_config, dict) or 'dir_name' not in user_config:
+        raise ValueError(file_path + ": config must be a mapping with at least 'dir_name'")
+    config = dict(DEFAULT_CONFIG)
+    config.update(user_config)
+    return config
+
+def isUpToDate(output_path, source_paths):
+    """ Check whether an output is newer than all of its sources, as make does.
+    Args:
+        output_path - string
+        source_paths - list of strings
+    Returns:
+        bool
+    """
+    try:
+        output_mtime = os.stat(output_path).st_mtime_ns
+        return all(os.stat(path).st_mtime_ns <= output_mtime for path in source_paths)
+    except OSError:
+        return False
+
+class Campaign:
+    """ Measurements of a campaign config, read at most once per command. """
+
+    def __init__(self, config, config_path=None, jobs=None, force=False):
+        """ Create campaign.
+        Args:
+            config - dict - output of loadConfig
+            config_path - string - config file, outputs older than it are rebuilt
+            jobs - integer - worker processes, defaults to the number of CPUs
+            force - bool - rebuild outputs even if they are up to date
+        """
+        self.config = config
+        self.config_path = config_path
+        self.jobs = jobs
+        self.force = force
+        self._catalog = None
+        self._results = None
+
+    def getCatalog(self):
+        if self._catalog is None:
+            from .catalog import scanCampaign
+            self._catalog = scanCampaign(self.config['dir_name'], self.config['file_sufix_list'] or [],
+                                         self.config['is_numeric'], self.config['file_order'])
+        return self._catalog
+
+    def getTasks(self):
+        return self.getCatalog().getTasks()
+
+    def getSources(self):
+        """ Files an output depends on: every measurement file and the config. """
+        sources = self.getCatalog().getPaths()
+        return sources + [self.config_path] if self.config_path else sources
+
+    def isUpToDate(self, output_path):
+        return not self.force and isUpToDate(output_path, self.getSources())
+
+    def getCache(self):
+        cache = self.config['cache']
+        if not cache:
+            return
+        from .cache import OBRCache
+        return OBRCache(cache if isinstance(cache, str) else None)
+
+    def _sweep(self, tasks):
+        from .sweep import sweepTasks
+        return sweepTasks(tasks, self.config['file_sufix_list'], self.config['is_obr_file'], self.jobs, self.getCache(),
+                          self.config['compact'], self.config['executor'], self.config['batch_size'],
+                          address=self.config['executor_address'])
+
+    def readResults(self, tasks=None):
+        """ Read measurements on the configured executor, a process pool by default.
+        Args:
+            tasks - list of tuples - (file_dir, file_prefix), all measurements if None
+        Returns:
+            results - list of SweepResult
+        """
+        if tasks is not None:
+            return self._sweep(tasks)
+        if self._results is None:
+            self._results = self._sweep(self.getTasks())
+            reportErrors(self._results)
+        return self._results
+
+    def getLabels(self, results):
+        """ Labels from the config, in sweep order, or the leading number of each prefix. """
+        labels = self.config['labels']
+        if labels is None:
+            from .calibration import getLabelFromPrefix
+            return [getLabelFromPrefix(result.file_prefix) for result in results]
+        if len(labels) != len(results):
+            raise ValueError('Config has {} labels for {} measurements'.format(len(labels), len(results)))
+        return labels
+
+    def getSweep(self, dim=0):
+        from .sweep_array import SweepArray
+        results = self.readResults()
+        return SweepArray.fromResults(results, dim, self.getLabels(results), compact=self.config['compact'])
+
+def reportErrors(results):
+    for result in results:
+        for path, error in result.errors:
+            print('error: {}: {}'.format(path, error), file=sys.stderr)
+
+def _getSection(config, name):
+    section = config.get(name)
+    if not isinstance(section, dict) or 'output' not in section:
+        raise ValueError("config needs a '{}' section with an 'output' path".format(name))
+    return section
+
+def _makeDir(file_path):
+    dir_name = os.path.dirname(file_path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+
+def runSweep(campaign, figures=True):
+    """ Read every measurement and save one figure per measurement, skipping figures
+    newer than their files and the config; without figures, only check that every file parses. """
+    config = campaign.config
+    tasks = campaign.getTasks()
+    if not figures:
+        results = campaign.readResults()
+        print('{} measurements read, {} failed'.format(len(results), sum(result.reader is None for result in results)))
+        return 1 if any(result.reader is None for result in results) else 0
+
+    from .data_reader import LUNAOBRDataReader
+    from .figures import FigureQueue, isFigureUpToDate
+
+    def getFigurePath(file_dir):
+        return os.path.join(config['figure_dir'], os.path.relpath(file_dir, config['dir_name']))
+
+    # Up-to-date measurements are not even read; a newer config rebuilds every figure
+    config_sources = [campaign.config_path] if campaign.config_path else []
+    pending = []
+    for file_dir, file_prefix in tasks:
+        path_list = LUNAOBRDataReader(file_dir, file_prefix, config['file_sufix_list']).getPathList() + config_sources
+        if campaign.force or not isFigureUpToDate(os.path.join(getFigurePath(file_dir), file_prefix), path_list):
+            pending.append((file_dir, file_prefix))
+    print('{} figures up to date, {} to render'.format(len(tasks) - len(pending), len(pending)))
+    if not pending:
+        return 0
+
+    results = campaign.readResults(pending)
+    reportErrors(results)
+    with FigureQueue(max_workers=campaign.jobs, skip_up_to_date=False) as figure_queue:
+        for result in results:
+            if result.reader is not None:
+                fig_dir = getFigurePath(result.file_dir)
+                os.makedirs(fig_dir, exist_ok=True)
+                figure_queue.submit(result.reader, os.path.join(fig_dir, result.file_prefix))
+    return 1 if any(result.reader is None for result in results) else 0
+
+def runCalibrate(campaign):
+    """ Fit the sensitivity at the configured positions or windows and save the table. """
+    section = _getSection(campaign.config, 'calibration')
+    if campaign.isUpToDate(section['output']):
+        print(section['output'] + ' is up to date')
+        return 0
+    from .calibration import calibrate
+    sweep = campaign.getSweep(section.get('dim', 0))
+    calibration = calibrate(sweep, section.get('positions'), section.get('windows'), section.get('deg', 1),
+                            section.get('channel', 0))
+    _makeDir(section['output'])
+    calibration.save(section['output'], section.get('label_name', 'Microstrain'),
+                     section.get('value_name', 'Spectral Shift (GHz)'))
+    print('Calibration saved to ' + section['output'])
+    return 0
+
+def runPlot(campaign):
+    """ Overlay every measurement in one figure. """
+    section = _getSection(campaign.config, 'plot')
+    if campaign.isUpToDate(section['output']):
+        print(section['output'] + ' is up to date')
+        return 0
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from .overlay import plotReadersOverlay
+
+    results = [result for result in campaign.readResults() if result.reader is not None]
+    n_axes = max(1, len(campaign.config['file_sufix_list'] or []))
+    fig, ax = plt.subplots(n_axes, figsize=section.get('figsize', (8, 7)))
+    plotReadersOverlay(ax, [result.reader for result in results], [result.file_prefix for result in results],
+                       section.get('col', 1), x_window=section.get('x_window'))
+    _makeDir(section['output'])
+    fig.savefig(section['output'])
+    plt.close(fig)
+    print('Figure saved to ' + section['output'])
+    return 0
+
+def runExport(campaign):
+    """ Write the sweep, and its calibration if configured, to HDF5. """
+    section = _getSection(campaign.config, 'export')
+    if campaign.isUpToDate(section['output']):
+        print(section['output'] + ' is up to date')
+        return 0
+    from .export import exportSweep
+    sweep = campaign.getSweep(section.get('dim', 0))
+    calibration = None
+    calibration_section = campaign.config.get('calibration')
+    if section.get('calibration', True) and isinstance(calibration_section, dict) \
+            and calibration_section.get('dim', 0) == section.get('dim', 0):
+        from .calibration import calibrate
+        calibration = calibrate(sweep, calibration_section.get('positions'), calibration_section.get('windows'),
+                                calibration_section.get('deg', 1), calibration_section.get('channel', 0))
+    _makeDir(section['output'])
+    exportSweep(section['output'], sweep, calibration)
+    print('Sweep exported to ' + section['output'])
+    return 0
+
+COMMANDS = {'sweep': runSweep, 'calibrate': runCalibrate, 'plot': runPlot, 'export': runExport}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='luna-obr', description='Batch processing of OBR 4600 campaigns.')
+    parser.add_argument('command', choices=list(COMMANDS), help='sweep: per-measurement figures, calibrate: '
+                        'characterization table, plot: overlay figure, export: HDF5 sweep')
+    parser.add_argument('config', help='campaign config file (.json, or .yaml with PyYAML)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes, defaults to the number of CPUs')
+    parser.add_argument('-B', '--force', action='store_true', help='rebuild outputs even if they are up to date')
+    parser.add_argument('--no-figures', action='store_true', help='sweep: only read and check the files')
+    parser.add_argument('--executor', choices=['serial', 'thread', 'process', 'dask', 'ray'], default=None,
+                        help='where files are read, overrides the config; dask and ray start a local cluster '
+                        'unless --address is given')
+    parser.add_argument('--address', default=None, help='dask scheduler or ray cluster address')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    try:
+        config = loadConfig(args.config)
+    except (OSError, ValueError, ImportError) as e:
+        print('error: ' + str(e), file=sys.stderr)
+        return 2
+
+    if args.executor is not None:
+        config['executor'] = args.executor
+    if args.address is not None:
+        config['executor_address'] = args.address
+    campaign = Campaign(config, args.config, args.jobs, args.force)
+    try:
+        if args.command == 'sweep':
+            return runSweep(campaign, figures=not args.no_figures)
+        return COMMANDS[args.command](campaign)
+    except (ValueError, ImportError) as e:
+        print('error: ' + str(e), file=sys.stderr)
+        return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
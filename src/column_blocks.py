@@ -0,0 +1,101 @@
+import numpy as np
+from .length_index import LengthIndex
+
+class ColumnBlock:
+    """ One (x, y) column pair of a paired-column export, cut at its own length.
+    x and y are contiguous and hold no padding, so windows are returned as views.
+    Usage:
+        block = reader.getBlocks()[2]
+        x, y = block.window(2.35, 2.45)
+        ymean = block.mean(2.35, 2.45)
+    """
+
+    def __init__(self, x, y, labels):
+        """ Create block.
+        Args:
+            x - numpy array - x column
+            y - numpy array - y column, same size as x
+            labels - list of strings - x and y labels
+        """
+        self.x = x
+        self.y = y
+        self.labels = list(labels)
+        self._index = None
+
+    def __len__(self):
+        return self.x.size
+
+    def getIndex(self):
+        """ Get the length index of the block, built on first use without copying the data.
+        Returns:
+            index - LengthIndex
+        """
+        if self._index is None:
+            self._index = LengthIndex(self.x, self.y)
+        return self._index
+
+    def window(self, minlim=None, maxlim=None):
+        """ Get the samples of a window, as views of the block.
+        Args:
+            minlim, maxlim - float - window, None for the block ends
+        Returns:
+            x, y - numpy arrays
+        """
+        index = self.getIndex()
+        idx_min = 0 if minlim is None else int(index.nearest(minlim))
+        idx_max = len(self) if maxlim is None else int(index.nearest(maxlim))
+        return self.x[idx_min:idx_max], self.y[idx_min:idx_max]
+
+    def mean(self, minlim, maxlim):
+        """ Mean of y over one or many windows, as LengthIndex.mean.
+        Args:
+            minlim, maxlim - float or numpy array
+        Returns:
+            ymean - float or numpy array
+        """
+        return self.getIndex().mean(minlim, maxlim)
+
+    def __repr__(self):
+        return "ColumnBlock(labels={}, samples={})".format(self.labels, len(self))
+
+def _getBlockLength(x, y):
+    # Shorter blocks are padded with NaN at the end; cells inside a block are kept
+    valid = np.flatnonzero(~(np.isnan(x) & np.isnan(y)))
+    return int(valid[-1]) + 1 if valid.size else 0
+
+def splitColumnPairs(data, columns):
+    """ Split the columns of a paired-column file into blocks without NaN padding.
+    The blocks are copied once into a single buffer sized to the real data, so the
+    padded array can be released.
+    Args:
+        data - numpy array - shape (columns, samples), as in OBRFile.data
+        columns - list of strings - column labels; a trailing unpaired column is ignored
+    Returns:
+        blocks - list of ColumnBlock
+    """
+    n_blocks = len(columns) // 2
+    lengths = [_getBlockLength(data[2 * i], data[2 * i + 1]) for i in range(n_blocks)]
+    buffer = np.empty(2 * sum(lengths), dtype=np.float64)
+    blocks = []
+    offset = 0
+    for i, n in enumerate(lengths):
+        x = buffer[offset:offset + n]
+        y = buffer[offset + n:offset + 2 * n]
+        x[:] = data[2 * i, :n]
+        y[:] = data[2 * i + 1, :n]
+        blocks.append(ColumnBlock(x, y, columns[2 * i:2 * i + 2]))
+        offset += 2 * n
+    return blocks
+
+def padBlocks(blocks):
+    """ Stack blocks back into one NaN-padded array, as the parser returns it.
+    Args:
+        blocks - list of ColumnBlock
+    Returns:
+        data - numpy array - shape (2 * blocks, longest block)
+    """
+    data = np.full((2 * len(blocks), max((len(block) for block in blocks), default=0)), np.nan)
+    for i, block in enumerate(blocks):
+        data[2 * i, :len(block)] = block.x
+        data[2 * i + 1, :len(block)] = block.y
+    return data
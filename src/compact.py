@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+from .header import OBRHeader
+
+class UniformLength:
+    """ Uniformly spaced length axis stored as (start, step, count) instead of a full array.
+    It stands in for the length array where the analysis needs it: len(), indexing,
+    slicing (a slice is another UniformLength) and np.asarray all work, and lookups
+    are computed from the step instead of searched.
+    """
+
+    def __init__(self, start, step, count):
+        """ Create axis.
+        Args:
+            start - float - first length
+            step - float - spacing, positive
+            count - integer - number of samples
+        """
+        self.start = float(start)
+        self.step = float(step)
+        self.count = int(count)
+
+    @classmethod
+    def fromArray(cls, length, tolerance=None):
+        """ Describe a length array by (start, step, count) if it is uniformly spaced.
+        Args:
+            length - numpy array - increasing length
+            tolerance - float - largest accepted deviation from the uniform axis,
+                        defaults to 1% of the step, above the rounding of the exported values
+        Returns:
+            axis - UniformLength, or None if the array is not uniform within tolerance
+        """
+        length = np.asarray(length, dtype=np.float64)
+        if length.ndim != 1 or length.size < 2:
+            return
+        step = (length[-1] - length[0]) / (length.size - 1)
+        if not step > 0:
+            return
+        axis = cls(length[0], step, length.size)
+        if getMaxError(length, axis) > (0.01 * step if tolerance is None else tolerance):
+            return
+        return axis
+
+    @property
+    def size(self):
+        return self.count
+
+    @property
+    def shape(self):
+        return (self.count,)
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    @property
+    def nbytes(self):
+        return 24
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, stride = key.indices(self.count)
+            if stride > 0:
+                return UniformLength(self.start + start * self.step, stride * self.step, len(range(start, stop, stride)))
+            return self.toArray()[key]
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self.count
+            if not 0 <= key < self.count:
+                raise IndexError('index out of range')
+            return self.start + key * self.step
+        return self.start + np.arange(self.count)[key] * self.step
+
+    def __array__(self, dtype=None, copy=None):
+        return self.toArray() if dtype is None else self.toArray().astype(dtype)
+
+    def toArray(self):
+        """ Get the full length array.
+        Returns:
+            numpy array - float64
+        """
+        return self.start + np.arange(self.count) * self.step
+
+    def equals(self, other):
+        return isinstance(other, UniformLength) and (self.start, self.step, self.count) == (other.start, other.step, other.count)
+
+    def nearest(self, x):
+        """ Get the index of the closest sample, ties going to the lower index as in LengthIndex.
+        Args:
+            x - float or numpy array
+        Returns:
+            idx - integer or numpy array
+        """
+        pos = (np.asarray(x, dtype=np.float64) - self.start) / self.step
+        return np.clip(np.ceil(pos - 0.5), 0, self.count - 1).astype(np.int64)
+
+    def searchsorted(self, x, side='left'):
+        """ np.searchsorted of the length axis, computed from the step. """
+        pos = (np.asarray(x, dtype=np.float64) - self.start) / self.step
+        idx = np.ceil(pos) if side == 'left' else np.floor(pos) + 1
+        return np.clip(idx, 0, self.count).astype(np.int64)
+
+    def interpolate(self, xnew, values):
+        """ Linear interpolation of a value column, raising outside the axis as interp1d does.
+        Args:
+            xnew - float or numpy array
+            values - numpy array - shape (samples,)
+        Returns:
+            ynew - numpy array - float64
+        """
+        xnew = np.asarray(xnew, dtype=np.float64)
+        last = self.start + (self.count - 1) * self.step
+        if np.any(xnew < self.start):
+            raise ValueError('A value in x_new is below the interpolation range.')
+        if np.any(xnew > last):
+            raise ValueError('A value in x_new is above the interpolation range.')
+        pos = (xnew - self.start) / self.step
+        idx = np.clip(np.floor(pos).astype(np.int64), 0, self.count - 2)
+        weight = pos - idx
+        return values[idx] * (1.0 - weight) + values[idx + 1] * weight
+
+    def __repr__(self):
+        return "UniformLength(start={!r}, step={!r}, count={})".format(self.start, self.step, self.count)
+
+def getMaxError(original, compact):
+    """ Get the maximum absolute error of a compact copy, ignoring NaN.
+    Args:
+        original - numpy array - float64 values
+        compact - numpy array or UniformLength - same shape
+    Returns:
+        float
+    """
+    original = np.asarray(original, dtype=np.float64)
+    if original.size == 0:
+        return 0.0
+    with np.errstate(invalid='ignore'):
+        error = np.abs(np.asarray(compact, dtype=np.float64) - original)
+    return float(np.nanmax(error)) if not np.all(np.isnan(error)) else 0.0
+
+def getCompactError(obr_file, dtype=np.float32, tolerance=None):
+    """ Report the error compact storage introduces on a parsed file, without keeping it.
+    Args:
+        obr_file - OBRFile - float64 data as parsed
+        dtype - numpy dtype - value column type
+        tolerance - float - see UniformLength.fromArray
+    Returns:
+        errors - dict - maximum absolute error of the length axis and of each value column,
+                 by column label; the length error is 0 if the axis is kept as an array
+    """
+    return CompactTrace.fromOBRFile(obr_file, dtype, tolerance).errors
+
+class CompactTrace:
+    """ Parsed file in compact form: value columns downcast, float32 by default, and a
+    uniform length axis kept as (start, step, count).
+    It has the OBRFile interface used by the reader (getColumn, getHeader, toDataFrame).
+    Attributes:
+        file_path - string - source path
+        header - list of strings - raw header lines
+        columns - list of strings - column labels, length first
+        length - UniformLength, or a float64 array if the axis is not uniform
+        values - numpy array - value columns with shape (channels, samples)
+        errors - dict - maximum absolute error introduced, by column label
+    """
+
+    def __init__(self, file_path, header, columns, length, values, errors=None):
+        self.file_path = file_path
+        self.header = header
+        self.columns = columns
+        self.length = length
+        self.values = values
+        self.errors = errors if errors is not None else {}
+
+    @classmethod
+    def fromOBRFile(cls, obr_file, dtype=np.float32, tolerance=None):
+        """ Compact a parsed file.
+        Args:
+            obr_file - OBRFile
+            dtype - numpy dtype - value column type
+            tolerance - float - see UniformLength.fromArray
+        Returns:
+            trace - CompactTrace
+        """
+        length = obr_file.data[0]
+        axis = UniformLength.fromArray(length, tolerance)
+        values = obr_file.data[1:].astype(dtype)
+        errors = {obr_file.columns[0]: getMaxError(length, axis) if axis is not None else 0.0}
+        for label, original, compact in zip(obr_file.columns[1:], obr_file.data[1:], values):
+            errors[label] = getMaxError(original, compact)
+        return cls(obr_file.file_path, obr_file.header, obr_file.columns,
+                   axis if axis is not None else np.array(length, dtype=np.float64), values, errors)
+
+    @property
+    def nbytes(self):
+        return self.length.nbytes + self.values.nbytes
+
+    def getColumn(self, col):
+        """ Get a single column, the length materialised as float64.
+        Args:
+            col - integer - column index
+        Returns:
+            numpy array - column values
+        """
+        return np.asarray(self.length, dtype=np.float64) if col == 0 else self.values[col - 1]
+
+    def getHeader(self):
+        return OBRHeader(self.header)
+
+    def toDataFrame(self):
+        """ Build a dataframe with a float64 length column and the compact value columns.
+        Returns:
+            df - dataframe
+        """
+        columns = {self.columns[0]: np.asarray(self.length, dtype=np.float64)}
+        columns.update(zip(self.columns[1:], self.values))
+        return pd.DataFrame(columns)
+
+    def __repr__(self):
+        return "CompactTrace(file_path={!r}, length={!r}, values={}, dtype={})".format(
+            self.file_path, self.length, self.values.shape, self.values.dtype)
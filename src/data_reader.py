@@ -1,19 +1,57 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import logging
 import linecache
-from scipy import interpolate
 import os
+from .obr_parser import parseOBRFile, parseOBRHeader, parseOBRColumns, iterOBRChunks
+from .lazy_frames import LazyFrameList, LazyColumns, FileFrameList
+from .length_index import LengthIndex
+from .header import OBRHeader
+from .profiling import profileStage
+from .pyramid import TracePyramid
+from .memo import hashArrays
+from .compact import CompactTrace
 
 class LUNAOBRDataReader:
     
-    def __init__(self, file_dir, file_prefix, file_sufix_list, is_obr_file = True):
+    def __init__(self, file_dir, file_prefix, file_sufix_list, is_obr_file = True, cache=None, lazy=False, memo=None,
+                 compact=False):
         self.file_dir = file_dir
         self.file_prefix = file_prefix
         self.file_sufix_list = file_sufix_list
         self.df = []
+        self.obr_files = []
         self.is_obr_file = is_obr_file
+        self.cache = cache
+        self.lazy = lazy
+        self.memo = memo
+        # Compact storage applies to eagerly read OBR files
+        self.compact = compact and is_obr_file and not lazy
+        self.errors = []
+        self._length_index = {}
+        self._pyramids = {}
+        self._columns = {}
+        self._blocks = {}
+        self._hashes = {}
+        if lazy:
+            self._initLazy()
+
+    def _initLazy(self):
+        """ Parse only the headers; files and columns are read on first access. """
+        self.headers = []
+        self.column_labels = []
+        path_list = []
+        for path in self.getPathList():
+            try:
+                header, columns = parseOBRHeader(path)
+            except Exception as e:
+                logging.error('Unable to read file from path: ' + path + ' (' + str(e) + ')')
+                self.errors.append((path, "{}: {}".format(type(e).__name__, e)))
+                continue
+            self.headers.append(header)
+            self.column_labels.append(columns)
+            path_list.append(path)
+        self.df = LazyFrameList(self, path_list)
 
     def getDataFrame(self):
         """ Get dataframe.
@@ -29,68 +67,290 @@ class LUNAOBRDataReader:
         Returns:
             list - columns labels      
         """        
+        if self.lazy:
+            try:
+                labels = self.column_labels[dim]
+                if not self.is_obr_file:
+                    # A trailing unpaired column has no block
+                    labels = labels[:len(labels) // 2 * 2]
+                return pd.Index(labels)
+            except IndexError as e:
+                logging.error('Failed to obtain DataFrame: ' + str(e))
+                return
+
         try:
+            if self.compact:
+                return pd.Index(self.obr_files[dim].columns)
+            if not self.is_obr_file:
+                # Labels of the paired columns, as in the padded dataframe
+                obr_file = self.obr_files[dim]
+                return pd.Index(obr_file.columns[:2 * len(obr_file.blocks)])
             df = self.df[dim]
         except Exception as e:
             logging.error('Failed to obtain DataFrame: ' + str(e))
             return
         return df.columns
+
+    def getHeader(self, dim=0):
+        """ Get the structured header of a sufix file.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            header - OBRHeader
+        """
+        try:
+            header = self.headers[dim] if self.lazy else self.obr_files[dim].header
+        except IndexError as e:
+            logging.error('Failed to obtain header: ' + str(e))
+            return
+        return OBRHeader(header)
+
+    def getColumn(self, col, dim=0):
+        """ Get a single column, reading only that column in lazy mode.
+        Args:
+            col - integer - column index
+            dim - integer - index of list of dataframes
+        Returns:
+            numpy array - column values
+        """
+        if self.compact or not self.is_obr_file:
+            try:
+                if self.compact:
+                    return self.obr_files[dim].getColumn(col)
+                # Paired columns are cut to their own block, without the padding
+                block = self.getBlocks(dim)[col // 2]
+                return block.y if col % 2 else block.x
+            except Exception as e:
+                logging.error('Failed to obtain column: ' + str(e))
+                return
+
+        if not self.lazy or self.df.isLoaded(dim):
+            try:
+                return self.df[dim].iloc[:,col].to_numpy()
+            except Exception as e:
+                logging.error('Failed to obtain DataFrame: ' + str(e))
+                return
+
+        columns = self._readColumns([col], dim)
+        return None if columns is None else columns[0]
+
+    def _readColumns(self, cols, dim=0):
+        """ Read the columns of a lazy reader that are not loaded yet, in a single parser pass.
+        Args:
+            cols - list of integers - column indices
+            dim - integer - index of list of dataframes
+        Returns:
+            columns - list of numpy arrays, in the order of cols
+        """
+        missing = [col for col in cols if (dim, col) not in self._columns]
+        if missing:
+            path = self.df.path_list[dim]
+            obr_file = self.cache.load(path, self.getCacheOptions()) if self.cache is not None else None
+            try:
+                if obr_file is not None:
+                    data = [obr_file.data[col] for col in missing]
+                else:
+                    with profileStage('parseColumn', path, path):
+                        data = parseOBRColumns(path, missing)
+            except Exception as e:
+                logging.error('Unable to read column from path: ' + path + ' (' + str(e) + ')')
+                return
+            for col, values in zip(missing, data):
+                self._columns[(dim, col)] = values
+        return [self._columns[(dim, col)] for col in cols]
     
-    def fileReader(self, file_path, skip_rows):
+    def fileReader(self, file_path, skip_rows=None):
         """ Read file from a specific path.
         Args:
             file_path - string
+            skip_rows - integer - unused, the header length is detected by the parser
         Returns:
             df - dataframe
         """
-        try:      
-            df = pd.read_csv(file_path, sep="\t", skiprows=skip_rows, header=1, index_col=False)
-        except:
-            try:
-                df = pd.read_csv(file_path, sep="\t", skiprows=skip_rows+2, header=1, index_col=False)
-                return df
-            except: 
-                logging.error('Unable to read file from path: ' + file_path)
-                return 
-            
-        return df
+        with profileStage('fileReader', file_path):
+            obr_file = self._parseFile(file_path)
+            if obr_file is None:
+                return
+            return obr_file.toDataFrame()
+
+    def _parseFile(self, file_path):
+        """ Parse file from a specific path into numpy arrays, using the cache if set.
+        Args:
+            file_path - string
+        Returns:
+            obr_file - OBRFile
+        """
+        if self.cache is not None:
+            with profileStage('cache.load', file_path):
+                obr_file = self.cache.load(file_path, self.getCacheOptions())
+            if obr_file is not None:
+                return obr_file
+
+        try:
+            with profileStage('parse', file_path, file_path):
+                obr_file = parseOBRFile(file_path)
+        except Exception as e:
+            logging.error('Unable to read file from path: ' + file_path + ' (' + str(e) + ')')
+            self.errors.append((file_path, "{}: {}".format(type(e).__name__, e)))
+            return
+
+        if self.cache is not None:
+            with profileStage('cache.store', file_path):
+                self.cache.store(obr_file, self.getCacheOptions())
+        return obr_file
+
+    def getCacheOptions(self):
+        """ Get the reader options the cache entries of its files are keyed on, so readers
+        with different options never share an entry.
+        Returns:
+            options - dict
+        """
+        return {'is_obr_file': self.is_obr_file, 'compact': self.compact}
     
     def _mkDir(self,dir_name):
         if not os.path.isdir(dir_name):
             os.makedirs(dir_name)  
 
-    def readData(self, save_figure=True, figure_dir='../figures/', skip_rows=13):
-        """ Plot dataframe.
-        Args:
-            df - dataframe or list of dataframes
+    def getPathList(self):
+        """ Get the path of each sufix file.
         Returns:
-            fig - figure
+            path_list - list of strings
         """
-        # Create paths
         if self.file_sufix_list:
             file_name_list = ["{}_{}.txt".format(self.file_prefix, file_sufix) for file_sufix in self.file_sufix_list]
         else:
             file_name_list = ["{}.txt".format(self.file_prefix)]
         
-        path_list = ["".join((self.file_dir,file_name)) if (self.file_dir[-1]=='/') else "/".join((self.file_dir,file_name))
-                     for file_name in file_name_list]        
-        figure_path = "".join((figure_dir,self.file_prefix)) if (figure_dir[-1]=='/') else "/".join((figure_dir,self.file_prefix))
+        return ["".join((self.file_dir,file_name)) if (self.file_dir[-1]=='/') else "/".join((self.file_dir,file_name))
+                for file_name in file_name_list]
+
+    def getReadPathList(self):
+        """ Get the path of each file that was read, in the order the dataframes are indexed.
+        Files that failed to read are missing, so this may be shorter than getPathList.
+        Returns:
+            path_list - list of strings
+        """
+        if self.lazy:
+            return list(self.df.path_list)
+        return [obr_file.file_path for obr_file in self.obr_files]
 
-        # Read file
-        self.df = [self.fileReader(path,skip_rows) for path in path_list]
-        self.df = self._dropEmpty()
+    def getFileIndex(self, dim=0):
+        """ Get the index of a sufix file among the files that were read, as used by the
+        other methods, which differs from its sufix index once a file failed to read.
+        Args:
+            dim - integer - index of the sufix in file_sufix_list
+        Returns:
+            integer - index of list of dataframes, a ValueError is raised if the file was not read
+        """
+        path = self.getPathList()[dim]
+        read_paths = self.getReadPathList()
+        if path not in read_paths:
+            raise ValueError('Measurement file was not read: ' + path)
+        return read_paths.index(path)
+
+    def readData(self, save_figure=True, figure_dir='../figures/', skip_rows=None, figure_queue=None):
+        """ Read data and plot dataframe.
+        Args:
+            save_figure - bool
+            figure_dir - string
+            skip_rows - integer - unused, the header length is detected by the parser
+            figure_queue - FigureQueue - if set, the figure is rendered in the background
+        Returns:
+            fig - figure, None if the figure is queued
+        """
+        # Create paths
+        path_list = self.getPathList()
+        figure_path = "".join((figure_dir,self.file_prefix)) if (figure_dir[-1]=='/') else "/".join((figure_dir,self.file_prefix))
 
-        if self.df and save_figure:
-            self._mkDir(figure_dir)
-            if self.is_obr_file:
-                figure = self.plotOBRFileFromDataFrame(figure_path) 
+        # Read file, in lazy mode only when the data is first accessed
+        with profileStage('readData', self.file_prefix):
+            if not self.lazy:
+                self.errors = []
+                self._length_index = {}
+                self._setFiles([obr_file for obr_file in map(self._parseFile, path_list) if obr_file is not None])
+
+            if self.df and save_figure and figure_queue is not None:
+                self._mkDir(figure_dir)
+                figure_queue.submit(self, figure_path)
+                figure = None
+            elif self.df and save_figure:
+                self._mkDir(figure_dir)
+                with profileStage('plot', figure_path):
+                    if self.is_obr_file:
+                        figure = self.plotOBRFileFromDataFrame(figure_path) 
+                    else:
+                        figure = self.plotFromDataFrame(figure_path)    
             else:
-                figure = self.plotFromDataFrame(figure_path)    
-        else:
-            figure = None    
+                figure = None    
            
         return figure
 
+    async def aread(self, ingestor=None):
+        """ Read data without blocking the event loop: files are read on a thread pool
+        and parsed on a process pool. No figure is drawn.
+        Args:
+            ingestor - AsyncIngestor - executors and concurrency limit, shared by default
+        Returns:
+            self - LUNAOBRDataReader
+        """
+        from .async_reader import readReaderAsync
+        return await readReaderAsync(self, ingestor)
+
+    def _setFiles(self, obr_files):
+        """ Keep the parsed files and build the dataframe list.
+        Paired-column files are split into exactly-sized blocks and, in compact mode, OBR
+        files are stored as CompactTrace; the dataframes of both are only built if indexed.
+        Args:
+            obr_files - list of OBRFile
+        """
+        self._hashes = {}
+        if not self.is_obr_file:
+            with profileStage('splitBlocks', self.file_prefix):
+                self.obr_files = [obr_file.toBlocks() for obr_file in obr_files]
+            self.df = FileFrameList(self.obr_files)
+            return
+
+        if self.compact:
+            with profileStage('compact', self.file_prefix):
+                self.obr_files = [CompactTrace.fromOBRFile(obr_file) for obr_file in obr_files]
+            self.df = FileFrameList(self.obr_files)
+            return
+
+        self.obr_files = obr_files
+        with profileStage('toDataFrame', self.file_prefix):
+            self.df = [obr_file.toDataFrame() for obr_file in obr_files]
+        with profileStage('dropEmpty', self.file_prefix):
+            self.df = self._dropEmpty()
+
+    def getBlocks(self, dim=0):
+        """ Get the (x, y) column blocks of a paired-column file, read with is_obr_file=False.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            blocks - list of ColumnBlock
+        """
+        if self.is_obr_file:
+            logging.error('Column blocks are only available for paired-column files (is_obr_file=False)')
+            return
+
+        if self.lazy:
+            if dim not in self._blocks:
+                try:
+                    obr_file = self._parseFile(self.df.path_list[dim])
+                except IndexError as e:
+                    logging.error('Failed to obtain blocks: ' + str(e))
+                    return
+                if obr_file is None:
+                    return
+                self._blocks[dim] = obr_file.toBlocks().blocks
+            return self._blocks[dim]
+
+        try:
+            return self.obr_files[dim].blocks
+        except IndexError as e:
+            logging.error('Failed to obtain blocks: ' + str(e))
+            return
+
     def _dropEmpty(self):
         """ Drop empty dataframes from list.
         Args:
@@ -113,25 +373,28 @@ class LUNAOBRDataReader:
         Args:
             df - dataframe or list of dataframes
         """    
-        subplot_size = int(self.df[0].shape[1]/2)
-        fig, ax = plt.subplots(subplot_size,figsize=(8,7))
+        # Imported here so data-only runs never load matplotlib
+        import matplotlib.pyplot as plt
+        blocks = self.getBlocks(0)
+        fig, ax = plt.subplots(len(blocks),figsize=(8,7))
         
         # Check if is instance of np.ndarray
         if (not isinstance(ax, np.ndarray)) & (not isinstance(ax, list)):
             ax = [ax]
 
         for i in range(len(ax)):
-            x_data = self.df[0].iloc[:,i*2]
-            y_data = self.df[0].iloc[:,(i*2)+1]    
-            labels = self.df[0].columns[i*2:(i*2)+2]  
+            x_data = blocks[i].x
+            y_data = blocks[i].y
+            labels = blocks[i].labels
             ax[i].plot(x_data, y_data, linewidth=1)            
             ax[i].set_xlabel(labels[0])
             ax[i].set_ylabel(labels[1])
             ax[i].grid(alpha=0.5,linestyle='--')
-            ax[i].set_xlim([x_data.min(),x_data.max()])
+            ax[i].set_xlim([np.nanmin(x_data),np.nanmax(x_data)])
         
         try: 
-            plt.savefig(figure_path)
+            with profileStage('savefig', figure_path):
+                plt.savefig(figure_path)
         except:
             logging.error('Unable save figure to path: ' + figure_path)
         plt.close()
@@ -143,6 +406,7 @@ class LUNAOBRDataReader:
         Args:
             df - dataframe or list of dataframes
         """   
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(len(self.df),figsize=(8,7))
 
         # Check if is instance of np.ndarray
@@ -159,7 +423,8 @@ class LUNAOBRDataReader:
             ax[i].legend()
         
         try: 
-            plt.savefig(figure_path)
+            with profileStage('savefig', figure_path):
+                plt.savefig(figure_path)
         except:
             logging.error('Unable save figure to path: ' + figure_path)
         plt.close()
@@ -183,9 +448,10 @@ class LUNAOBRDataReader:
             y_min_max = np.zeros((len(ax),2))
 
         # Plot from figure
+        blocks = self.getBlocks(0)
         for i in range(len(ax)):
-            x_data = self.df[0].iloc[:,i*2]
-            y_data = self.df[0].iloc[:,(i*2)+1]    
+            x_data = blocks[i].x
+            y_data = blocks[i].y
             ax[i].plot(x_data, y_data, linewidth=1, label=label)            
             ax[i].set_xlabel(old_fig.get_axes()[i].get_xlabel())
             ax[i].set_ylabel(old_fig.get_axes()[i].get_ylabel())  
@@ -232,44 +498,306 @@ class LUNAOBRDataReader:
 
         return ax, x_min_max, y_min_max
     
-    def getSingleMeasurement(self, xnew, dim=0):
+    def readChunks(self, dim=0, chunk_size=100000, length_window=None):
+        """ Read a sufix file in fixed-size chunks without loading the whole trace.
+        Args:
+            dim - integer - index of the sufix file
+            chunk_size - integer - number of samples per chunk
+            length_window - list - [min, max] length, only this region is kept
+        Yields:
+            length - numpy array
+            values - numpy array - value columns with shape (columns - 1, samples)
+        """
+        return iterOBRChunks(self.getPathList()[dim], chunk_size=chunk_size, length_window=length_window)
+
+    def _streamSingleMeasurement(self, xnew, dim, chunk_size):
+        """ Interpolate over the chunk stream, keeping only the samples around xnew. """
+        from scipy import interpolate
+        xnew_arr = np.asarray(xnew, dtype=float)
+        lo, hi = xnew_arr.min(), xnew_arr.max()
+        x_parts, y_parts = [], []
+        tail = None
+        for length, values in self.readChunks(dim, chunk_size):
+            if length[-1] < lo:
+                tail = (length[-1:], values[0, -1:])
+                continue
+            # Keep one sample on each side of the window for the interpolation
+            idx_min = max(np.searchsorted(length, lo, side='right') - 1, 0)
+            idx_max = min(np.searchsorted(length, hi, side='left') + 1, length.size)
+            if not x_parts and length[idx_min] > lo and tail is not None:
+                x_parts.append(tail[0])
+                y_parts.append(tail[1])
+            x_parts.append(length[idx_min:idx_max])
+            y_parts.append(values[0, idx_min:idx_max])
+            if length[idx_max - 1] >= hi:
+                break
+
+        x = np.concatenate(x_parts) if x_parts else np.empty(0)
+        y = np.concatenate(y_parts) if y_parts else np.empty(0)
+        f = interpolate.interp1d(x, y)
+        return f(xnew)
+
+    def _streamMeanMeasurement(self, minlim, maxlim, dim, chunk_size):
+        """ Average over the chunk stream between the samples nearest to minlim and maxlim, as
+        getMeanMeasurement does, reading only up to maxlim. Running sums are accumulated in
+        file order, so both paths give the same result.
+        """
+        targets = [float(minlim), float(maxlim)]
+        # (index, running sum, NaN count) at the sample nearest to each target
+        bounds = [None, None]
+        offset = 0
+        total, total_nan = 0.0, 0
+        # (length, index, running sum, NaN count) at the first sample equal to the last one read
+        last = None
+        for length, values in self.readChunks(dim, chunk_size):
+            is_nan = np.isnan(values[0])
+            cumsum = np.cumsum(np.concatenate(([total], np.where(is_nan, 0.0, values[0]))))
+            nancount = total_nan + np.concatenate(([0], np.cumsum(is_nan)))
+
+            def getFirst(value):
+                # First occurrence of a length, which may start in the previous chunk
+                j = int(np.searchsorted(length, value, side='left'))
+                if j == 0 and last is not None and last[0] == value:
+                    return last[1:]
+                return offset + j, cumsum[j], nancount[j]
+
+            for k, x in enumerate(targets):
+                if bounds[k] is not None:
+                    continue
+                right = int(np.searchsorted(length, x, side='left'))
+                if right == length.size:
+                    continue
+                # Nearest of the first sample >= x and the one before it, ties going to the lower index
+                left_length = length[right - 1] if right > 0 else (last[0] if last is not None else None)
+                if left_length is not None and abs(x - left_length) <= abs(length[right] - x):
+                    bounds[k] = getFirst(left_length) if right > 0 else last[1:]
+                else:
+                    bounds[k] = (offset + right, cumsum[right], nancount[right])
+
+            last = (length[-1],) + tuple(getFirst(length[-1]))
+            total, total_nan = cumsum[-1], nancount[-1]
+            offset += length.size
+            if bounds[0] is not None and bounds[1] is not None:
+                break
+
+        if last is None:
+            return np.nan
+        # Targets past the end resolve to the last sample, as in LengthIndex
+        (idx_min, sum_min, nan_min), (idx_max, sum_max, nan_max) = [bound or last[1:] for bound in bounds]
+        count = idx_max - idx_min
+        if count <= 0 or nan_max != nan_min:
+            return np.nan
+        return (sum_max - sum_min) / count
+
+    def getSingleMeasurement(self, xnew, dim=0, chunk_size=None):
         """ Interpolate data to get measurement in a specific length.
         Args:
-            df - dataframe
+            xnew - float or numpy array - length, an array queries many points at once
+            dim - integer - index of list of dataframes
+            chunk_size - integer - if set, the file is streamed in chunks instead of using the loaded data
         Returns:
             ynew - numpy array - interpolated measurement
         """
-        try:
-            df = self.df[dim]
-        except Exception as e:
-            logging.error('Failed to obtain DataFrame: ' + str(e))
-            return
-            
-        x = df.iloc[:,0].to_numpy()
-        y = df.iloc[:,1].to_numpy()
-        f = interpolate.interp1d(x, y)
-        ynew = f(xnew)
+        with profileStage('getSingleMeasurement', self.file_prefix):
+            if chunk_size is not None:
+                return self._streamSingleMeasurement(xnew, dim, chunk_size)
+
+            def compute():
+                index = self.getLengthIndex(dim)
+                return None if index is None else index.interpolate(xnew)
+            ynew = self._memoize('getSingleMeasurement', dim, [xnew], compute)
         return ynew
 
-    def getMeanMeasurement(self, minlim, maxlim, dim=0):
+    def getMeanMeasurement(self, minlim, maxlim, dim=0, chunk_size=None):
         """ Calculate the mean over an interval.
         Args:
-            df - dataframe
+            minlim - float - interval start
+            maxlim - float - interval end
+            dim - integer - index of list of dataframes
+            chunk_size - integer - if set, the file is streamed in chunks instead of using the
+                         loaded data, with the same result: both average the samples from the one
+                         nearest to minlim up to, but not including, the one nearest to maxlim
         Returns:
             ymean - numpy array - mean measurement
         """
+        with profileStage('getMeanMeasurement', self.file_prefix):
+            if chunk_size is not None:
+                return self._streamMeanMeasurement(minlim, maxlim, dim, chunk_size)
+
+            def compute():
+                index = self.getLengthIndex(dim)
+                return None if index is None else index.mean(minlim, maxlim)
+            ymean = self._memoize('getMeanMeasurement', dim, [minlim, maxlim], compute)
+        return ymean
+
+    def getMeanMeasurements(self, windows, dim=0):
+        """ Calculate the mean over many intervals in one call.
+        Args:
+            windows - list or numpy array - [minlim, maxlim] pairs with shape (n, 2)
+            dim - integer - index of list of dataframes
+        Returns:
+            ymean - numpy array - mean measurement of each interval
+        """
+        with profileStage('getMeanMeasurements', self.file_prefix):
+            windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+
+            def compute():
+                index = self.getLengthIndex(dim)
+                return None if index is None else index.mean(windows[:,0], windows[:,1])
+            return self._memoize('getMeanMeasurements', dim, [windows], compute)
+
+    def getContentHash(self, dim=0):
+        """ Get a content hash of the length and first value column of a sufix file, the
+        data the analysis methods read. It is computed once per read.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            string - hex digest, None if the file could not be read
+        """
+        if dim not in self._hashes:
+            length, values = self.getColumn(0, dim), self.getColumn(1, dim)
+            if length is None or values is None:
+                return
+            with profileStage('hashContent', self.file_prefix):
+                self._hashes[dim] = hashArrays(length, values)
+        return self._hashes[dim]
+
+    def _memoize(self, name, dim, params, compute):
+        """ Run an analysis through the reader memo, if one is set.
+        Args:
+            name - string - analysis name
+            dim - integer - index of list of dataframes
+            params - list - call parameters
+            compute - callable - runs the analysis
+        Returns:
+            result of compute, possibly from the memo
+        """
+        if self.memo is None:
+            return compute()
+        content_hash = self.getContentHash(dim)
+        if content_hash is None:
+            return compute()
+        return self.memo.call(name, [content_hash], params, compute)
+
+    def getLengthIndex(self, dim=0):
+        """ Get the length index of a dataframe, building it on first use.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            index - LengthIndex
+        """
+        if self.lazy and self.is_obr_file and not self.df.isLoaded(dim):
+            # Only the length and the queried value columns are read
+            cached = self._length_index.get(dim)
+            if cached is not None and cached[0] is self.df:
+                return cached[1]
+            # The length and the first value column are read in one pass
+            columns = self._readColumns([0, 1], dim)
+            if columns is None:
+                return
+            index = LengthIndex(columns[0], LazyColumns(self, dim))
+            self._length_index[dim] = (self.df, index)
+            return index
+
+        source = self._getSource(dim)
+        if source is None:
+            return
+
+        # Rebuild if the dataframe was replaced since the index was built
+        cached = self._length_index.get(dim)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+
+        with profileStage('buildLengthIndex', self.file_prefix):
+            length, values = self.getTrace(dim)
+            index = LengthIndex(length, values)
+        self._length_index[dim] = (source, index)
+        return index
+
+    def _getSource(self, dim):
+        """ Get the data a length index or pyramid is built from. Compact traces and
+        paired-column blocks are used directly, without building their dataframe.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            source - CompactTrace, list of ColumnBlock or dataframe, None if unavailable
+        """
+        if not self.is_obr_file:
+            return self.getBlocks(dim)
         try:
-            df = self.df[dim]
+            if self.compact:
+                return self.obr_files[dim]
+            return self.df[dim]
         except Exception as e:
             logging.error('Failed to obtain DataFrame: ' + str(e))
             return
 
-        x = df.iloc[:,0].to_numpy()
-        y = df.iloc[:,1].to_numpy()
-        idx_min = (np.abs(x - minlim)).argmin()
-        idx_max = (np.abs(x - maxlim)).argmin()
-        ymean = np.mean(y[idx_min:idx_max])
-        return ymean
+    def getTrace(self, dim=0):
+        """ Get the length axis and value columns of a sufix file, without copying compact
+        traces or paired-column blocks.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            length - numpy array, or UniformLength in compact mode
+            values - numpy array - shape (channels, samples), float32 in compact mode; for
+                     paired-column files the first (x, y) block, with a single channel
+        """
+        if self.compact:
+            trace = self.obr_files[dim]
+            return trace.length, trace.values
+        if not self.is_obr_file:
+            block = self.getBlocks(dim)[0]
+            return block.x, block.y[np.newaxis]
+        values = self.df[dim].to_numpy(dtype=np.float64).T
+        return values[0], values[1:]
+
+    def getCompactError(self, dim=0):
+        """ Get the maximum error compact storage introduced in a sufix file.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            errors - dict - maximum absolute error by column label, None if the reader is not compact
+        """
+        if not self.compact:
+            logging.error('Reader is not in compact mode')
+            return
+        try:
+            return dict(self.obr_files[dim].errors)
+        except IndexError as e:
+            logging.error('Failed to obtain compact trace: ' + str(e))
+            return
+
+    def getPyramid(self, dim=0):
+        """ Get the zoom pyramid of a dataframe, built on first use and kept in the cache if set.
+        Args:
+            dim - integer - index of list of dataframes
+        Returns:
+            pyramid - TracePyramid - pyramid.view(minlim, maxlim, n_px) gives a screen-resolution
+                      min/max/mean summary of any length window
+        """
+        source = self._getSource(dim)
+        if source is None:
+            return
+
+        cached = self._pyramids.get(dim)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+
+        length, values = self.getTrace(dim)
+        if self.lazy:
+            file_path = self.df.path_list[dim]
+        else:
+            file_path = self.obr_files[dim].file_path if dim < len(self.obr_files) else None
+        pyramid = None
+        if self.cache is not None and file_path is not None:
+            pyramid = self.cache.loadPyramid(file_path, length, values, self.getCacheOptions())
+        if pyramid is None:
+            with profileStage('buildPyramid', file_path):
+                pyramid = TracePyramid(length, values)
+            if self.cache is not None and file_path is not None:
+                self.cache.storePyramid(file_path, pyramid, self.getCacheOptions())
+        self._pyramids[dim] = (source, pyramid)
+        return pyramid
 
     def _getMinMax(self, x):
         """ Calculate the mean over an interval.
@@ -293,13 +821,15 @@ class LUNAOBRDataReader:
         if x_candidate[0] < x[0]:
             x[0] = x_candidate[0]
         if x_candidate[1] > x[1]:
-            x[1] = x_candidate[0]
+            x[1] = x_candidate[1]
         return x    
     
 def getFolders(dir_name):
 # Search for all folders in dir
     try:
-        folders_list = [f for f in os.listdir(dir_name) if os.path.isdir(os.path.join(dir_name, f))]
+        with profileStage('getFolders', dir_name):
+            with os.scandir(dir_name) as scan:
+                folders_list = sorted(entry.name for entry in scan if entry.is_dir())
     except Exception as err:
         logging.error(f"Unexpected {err=}1, {type(err)=}")
         return 
@@ -312,9 +842,11 @@ def getFolders(dir_name):
         return [dir_name]
 
 def getFiles(file_dir, is_numeric=False, file_order=None):        
-    # Search for all txt files in dir
+    # Search for all txt files in dir, the entry type comes with the listing so no file is stat'ed
     try:
-        txt_file_list = [f for f in os.listdir(file_dir) if os.path.isfile(os.path.join(file_dir, f)) and f.endswith(".txt")]
+        with profileStage('getFiles', file_dir):
+            with os.scandir(file_dir) as scan:
+                txt_file_list = [entry.name for entry in scan if entry.name.endswith(".txt") and entry.is_file()]
     except Exception as err:
         logging.error(f"Unexpected2 {err=}2, {type(err)=}")
         return 
@@ -334,11 +866,6 @@ def getFiles(file_dir, is_numeric=False, file_order=None):
     return file_prefix_list
 
 def sortFiles(file_list, file_order):
-    order = list()
-    
-    for i, file_name in enumerate(file_order):
-        if file_name in file_list:
-            order.append(file_list.index(file_order[i]))
-
-    new_file_list = [file_list[i] for i in order]
-    return new_file_list
\ No newline at end of file
+    # Set lookup instead of list.index keeps this linear
+    file_set = set(file_list)
+    return [file_name for file_name in file_order if file_name in file_set]
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+from .sweep_array import resampleIndex, resample
+
+EVENT_COLUMNS = ['file', 'label', 'start', 'end', 'width', 'peak', 'peak_value', 'mean']
+
+def getWindowSamples(length, window):
+    """ Convert a window in length units into a number of samples.
+    Args:
+        length - numpy array - increasing length
+        window - float - window width, in the units of length
+    Returns:
+        integer - odd number of samples, at least 1
+    """
+    step = np.median(np.diff(length)) if length.size > 1 else 0.0
+    n = int(round(window / step)) if step > 0 else 1
+    return max(1, n + (n + 1) % 2)
+
+def rollingStats(values, n_window, std=True):
+    """ Centered rolling mean and standard deviation, ignoring NaN.
+    Computed from cumulative sums, so the cost does not depend on the window size.
+    Args:
+        values - numpy array - shape (..., samples)
+        n_window - integer - window width in samples, windows are cut at the trace ends
+        std - bool - also compute the standard deviation
+    Returns:
+        mean, std - numpy arrays with the shape of values, std is None if not computed
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    is_nan = np.isnan(values)
+    has_nan = is_nan.any()
+    y = np.where(is_nan, 0.0, values) if has_nan else values
+    zero = np.zeros(values.shape[:-1] + (1,))
+
+    half = n_window // 2
+    idx = np.arange(n)
+    lo = np.clip(idx - half, 0, n)
+    hi = np.clip(idx + half + 1, 0, n)
+    if has_nan:
+        count = np.concatenate((zero, np.cumsum(~is_nan, axis=-1)), axis=-1)
+        counts = count[..., hi] - count[..., lo]
+    else:
+        counts = hi - lo
+    cumsum = np.concatenate((zero, np.cumsum(y, axis=-1)), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (cumsum[..., hi] - cumsum[..., lo]) / counts
+        if not std:
+            return mean, None
+        cumsum2 = np.concatenate((zero, np.cumsum(y * y, axis=-1)), axis=-1)
+        var = (cumsum2[..., hi] - cumsum2[..., lo]) / counts - mean * mean
+    return mean, np.sqrt(np.clip(var, 0.0, None))
+
+def robustSigma(values):
+    """ Noise level from the median absolute deviation, insensitive to sparse events.
+    Args:
+        values - numpy array - shape (..., samples)
+    Returns:
+        sigma - float or numpy array with one value per trace
+    """
+    median = np.nanmedian(values, axis=-1, keepdims=True)
+    return 1.4826 * np.nanmedian(np.abs(values - median), axis=-1)
+
+def findRegions(length, values, threshold, mode='abs', min_width=0.0, merge_gap=0.0, labels=None):
+    """ Extract the regions where traces cross a threshold, with their peaks.
+    All traces are processed at once: the masks are joined with a separator sample
+    and region bounds come from the transitions of the flattened mask.
+    Args:
+        length - numpy array - shape (samples,)
+        values - numpy array - shape (samples,) or (traces, samples)
+        threshold - float or numpy array - one threshold per trace
+        mode - string - 'abs' for |value| > threshold, 'above' or 'below'
+        min_width - float - narrower regions are dropped, in length units
+        merge_gap - float - regions closer than this are merged, in length units
+        labels - list - label of each trace
+    Returns:
+        events - DataFrame - one row per region: file, label, start, end, width, peak
+                 (length of the peak), peak_value and mean
+    """
+    length = np.asarray(length, dtype=np.float64)
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    n_traces, n = values.shape
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=np.float64), (n_traces,))[:, None]
+    if mode == 'abs':
+        score = np.abs(values)
+        mask = score > threshold
+    elif mode == 'above':
+        score = values
+        mask = values > threshold
+    elif mode == 'below':
+        score = -values
+        mask = values < threshold
+    else:
+        raise ValueError("mode must be 'abs', 'above' or 'below'")
+
+    # A False sample between traces keeps regions from spanning two traces
+    flat = np.concatenate((mask, np.zeros((n_traces, 1), dtype=bool)), axis=1).ravel()
+    edges = np.diff(np.concatenate(([False], flat)).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    trace = starts // (n + 1)
+    starts = starts % (n + 1)
+    ends = ends % (n + 1)
+
+    if merge_gap > 0 and starts.size > 1:
+        gap = length[starts[1:]] - length[ends[:-1] - 1]
+        keep = np.concatenate(([True], (gap > merge_gap) | (trace[1:] != trace[:-1])))
+        ends = np.maximum.reduceat(ends, np.flatnonzero(keep))
+        starts, trace = starts[keep], trace[keep]
+
+    width = length[ends - 1] - length[starts]
+    keep = width >= min_width
+    starts, ends, trace, width = starts[keep], ends[keep], trace[keep], width[keep]
+    if not starts.size:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    # Peak and mean of each region with reduceat over the flattened traces
+    offset = trace * n
+    flat_score = np.where(np.isnan(score), -np.inf, score).ravel()
+    flat_values = np.where(np.isnan(values), 0.0, values).ravel()
+    bounds = np.column_stack((offset + starts, offset + ends)).ravel()
+    # reduceat needs every bound inside the array, a trailing sample covers region ends at the last sample
+    peak_score = np.maximum.reduceat(np.append(flat_score, 0.0), bounds)[::2]
+    sums = np.add.reduceat(np.append(flat_values, 0.0), bounds)[::2]
+
+    # First sample of each region reaching its peak
+    counts = ends - starts
+    sample = _ranges(offset + starts, counts)
+    region_id = np.repeat(np.arange(starts.size), counts)
+    at_peak = np.flatnonzero(flat_score[sample] == peak_score[region_id])
+    first = at_peak[np.unique(region_id[at_peak], return_index=True)[1]]
+    peak_sample = sample[first] - offset
+
+    labels = np.asarray(labels)[trace] if labels is not None else np.full(trace.size, np.nan)
+    return pd.DataFrame({'file': trace, 'label': labels, 'start': length[starts], 'end': length[ends - 1],
+                         'width': width, 'peak': length[peak_sample],
+                         'peak_value': values[trace, peak_sample], 'mean': sums / counts})
+
+def detectEvents(length, values, reference=None, reference_length=None, window=None, threshold=None, n_sigma=5.0,
+                 mode='abs', min_width=0.0, merge_gap=0.0, labels=None):
+    """ Locate strain or temperature events along one or many traces.
+    The reference is subtracted, the difference is smoothed with a rolling mean over
+    length and the regions crossing the threshold are extracted with their peaks.
+    Args:
+        length - numpy array - increasing length with shape (samples,)
+        values - numpy array - shape (samples,) or (traces, samples)
+        reference - numpy array - baseline trace, None to use the values as they are
+        reference_length - numpy array - length of the reference if it differs from length
+        window - float - rolling mean width in length units, None for no smoothing
+        threshold - float or numpy array - detection threshold, defaults to n_sigma times
+                    the robust noise level of each trace
+        n_sigma - float
+        mode - string - 'abs', 'above' or 'below'
+        min_width - float - narrower regions are dropped, in length units
+        merge_gap - float - regions closer than this are merged, in length units
+        labels - list - label of each trace
+    Returns:
+        events - DataFrame - see findRegions
+    """
+    length = np.asarray(length, dtype=np.float64)
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    if reference is not None:
+        reference = np.asarray(reference, dtype=np.float64)
+        if reference_length is not None and not np.array_equal(reference_length, length):
+            idx, weight = resampleIndex(np.asarray(reference_length, dtype=np.float64), length)
+            reference = resample(reference, idx, weight)
+        values = values - reference
+
+    if window is not None:
+        values = rollingStats(values, getWindowSamples(length, window), std=False)[0]
+    if threshold is None:
+        threshold = n_sigma * robustSigma(values)
+    return findRegions(length, values, threshold, mode, min_width, merge_gap, labels)
+
+def detectSweepEvents(sweep, reference=0, channel=0, **kwargs):
+    """ Locate events in every file of a sweep at once.
+    Args:
+        sweep - SweepArray
+        reference - integer or numpy array - index of the reference file, or a baseline
+                    trace on the sweep grid; None to use the values as they are
+        channel - integer or string
+        kwargs - passed to detectEvents
+    Returns:
+        events - DataFrame - see findRegions, labelled with the sweep labels
+    """
+    values = sweep.getChannel(channel)
+    if isinstance(reference, (int, np.integer)):
+        reference = values[reference]
+    kwargs.setdefault('labels', sweep.labels)
+    return detectEvents(sweep.length, values, reference, **kwargs)
+
+def _ranges(starts, counts):
+    """ Concatenation of np.arange(start, start + count) for every pair, without a loop. """
+    total = counts.sum()
+    steps = np.ones(total, dtype=np.int64)
+    steps[0] = starts[0]
+    boundaries = np.cumsum(counts)[:-1]
+    steps[boundaries] = starts[1:] - (starts[:-1] + counts[:-1] - 1)
+    return np.cumsum(steps)
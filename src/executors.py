@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+# Executors only need submit(func, *args) returning objects with result(), as
+# concurrent.futures does. Dask and Ray are imported by their backends only.
+
+BACKENDS = ('serial', 'thread', 'process', 'dask', 'ray')
+
+class SerialExecutor(Executor):
+    """ Run every call in the calling process as it is submitted, for debugging and profiling. """
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+class DaskExecutor(Executor):
+    """ Run calls on a Dask cluster.
+    Without an address a local cluster of worker processes is started, so the same code
+    runs on one workstation and, given a scheduler address, across nodes.
+    Usage:
+        with DaskExecutor('tcp://scheduler:8786') as executor:
+            results = sweepDir(dir_name, ['Upper','Lower'], executor=executor)
+    """
+
+    def __init__(self, address=None, n_workers=None, client=None):
+        """ Connect to a cluster.
+        Args:
+            address - string - scheduler address, None starts a local cluster
+            n_workers - integer - local cluster workers, defaults to the number of CPUs
+            client - dask.distributed.Client - existing client, left open on shutdown
+        """
+        try:
+            from dask.distributed import Client, LocalCluster
+        except ImportError:
+            raise ImportError("The 'dask' executor requires the 'dask[distributed]' package")
+        self._owned = client is None
+        self.cluster = None
+        if client is None:
+            if address is None:
+                self.cluster = LocalCluster(n_workers=n_workers or os.cpu_count() or 1, threads_per_worker=1,
+                                            processes=True)
+                address = self.cluster
+            client = Client(address)
+        self.client = client
+
+    def submit(self, func, *args, **kwargs):
+        # Calls with the same arguments must run again, e.g. after the files changed
+        return self.client.submit(func, *args, pure=False, **kwargs)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if self._owned:
+            self.client.close()
+            if self.cluster is not None:
+                self.cluster.close()
+
+class _RayFuture:
+    def __init__(self, ref):
+        self.ref = ref
+
+    def result(self, timeout=None):
+        import ray
+        return ray.get(self.ref, timeout=timeout)
+
+class RayExecutor(Executor):
+    """ Run calls as Ray tasks.
+    Without an address, and if Ray is not initialised yet, a local Ray instance is started.
+    Usage:
+        with RayExecutor('ray://head:10001') as executor:
+            results = sweepDir(dir_name, ['Upper','Lower'], executor=executor)
+    """
+
+    def __init__(self, address=None, num_cpus=None):
+        """ Connect to a cluster.
+        Args:
+            address - string - cluster address, None for a local instance
+            num_cpus - integer - CPUs of a local instance, defaults to all
+        """
+        try:
+            import ray
+        except ImportError:
+            raise ImportError("The 'ray' executor requires the 'ray' package")
+        self._owned = not ray.is_initialized()
+        if self._owned:
+            ray.init(address=address, num_cpus=num_cpus)
+        self._remote = {}
+
+    def submit(self, func, *args, **kwargs):
+        import ray
+        if func not in self._remote:
+            self._remote[func] = ray.remote(func)
+        return _RayFuture(self._remote[func].remote(*args, **kwargs))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if self._owned:
+            import ray
+            ray.shutdown()
+
+def getExecutor(backend='process', max_workers=None, address=None):
+    """ Create an executor by name.
+    Args:
+        backend - string - 'serial', 'thread', 'process', 'dask' or 'ray'
+        max_workers - integer - pool size or local cluster workers, defaults to the number of CPUs
+        address - string - dask scheduler or ray cluster address, None for a local cluster
+    Returns:
+        executor - concurrent.futures.Executor, to be shut down by the caller
+    """
+    if backend == 'serial':
+        return SerialExecutor()
+    if backend == 'thread':
+        return ThreadPoolExecutor(max_workers=max_workers)
+    if backend == 'process':
+        return ProcessPoolExecutor(max_workers=max_workers)
+    if backend == 'dask':
+        return DaskExecutor(address, max_workers)
+    if backend == 'ray':
+        return RayExecutor(address, max_workers)
+    raise ValueError('Unknown executor {!r}, expected one of {}'.format(backend, ', '.join(BACKENDS)))
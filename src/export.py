@@ -0,0 +1,141 @@
+import numpy as np
+import json
+import logging
+from .sweep_array import SweepArray
+from .calibration import Calibration
+from .obr_parser import readHeader
+
+def _requireH5py():
+    # Imported on use so importing the package does not load h5py
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("HDF5 export requires the 'h5py' package")
+    return h5py
+
+def _readHeaders(paths):
+    headers = []
+    for path in paths:
+        try:
+            headers.append(readHeader(path)[0] if path else [])
+        except (OSError, ValueError) as e:
+            logging.error('Unable to read header from path: ' + str(path) + ' (' + str(e) + ')')
+            headers.append([])
+    return headers
+
+def exportSweep(file_path, sweep, calibration=None, headers=None, compression='gzip', compression_opts=4, chunk_length=16384):
+    """ Write a whole sweep to a single chunked, compressed HDF5 file.
+    Traces are chunked per file and length block, so a file or a length window can be
+    read back without decompressing the rest of the sweep.
+    Args:
+        file_path - string - '.h5' file
+        sweep - SweepArray
+        calibration - Calibration - optional calibration results
+        headers - list of lists of strings - header lines of each file, read from sweep.paths if None
+        compression - string - h5py compression filter
+        compression_opts - integer - compression level
+        chunk_length - integer - length samples per chunk
+    """
+    h5py = _requireH5py()
+    if headers is None:
+        headers = _readHeaders(sweep.paths)
+    n_files, n_length, n_channels = sweep.data.shape
+    string_type = h5py.string_dtype()
+
+    with h5py.File(file_path, 'w') as f:
+        f.attrs['channels'] = json.dumps(list(sweep.channels))
+        f.create_dataset('length', data=np.asarray(sweep.length), compression=compression, compression_opts=compression_opts)
+        data = f.create_dataset('data', shape=(n_files, n_length, n_channels), dtype=sweep.data.dtype,
+                                chunks=(1, max(1, min(chunk_length, n_length)), n_channels), shuffle=True,
+                                compression=compression, compression_opts=compression_opts)
+        # One file at a time keeps memory bounded for memory-mapped sweeps
+        for i in range(n_files):
+            data[i] = sweep.data[i]
+        if sweep.labels is not None:
+            f.create_dataset('labels', data=sweep.labels)
+        f.create_dataset('sufixes', data=[str(sufix or '') for sufix in sweep.sufixes], dtype=string_type)
+        f.create_dataset('paths', data=[str(path or '') for path in sweep.paths], dtype=string_type)
+        f.create_dataset('headers', data=[json.dumps(header) for header in headers], dtype=string_type)
+
+        if calibration is not None:
+            group = f.create_group('calibration')
+            group.create_dataset('labels', data=calibration.labels)
+            group.create_dataset('points', data=list(calibration.points), dtype=string_type)
+            group.create_dataset('shift', data=calibration.shift)
+            group.create_dataset('coef', data=calibration.coef)
+            group.create_dataset('residuals', data=calibration.residuals)
+
+def _selectFiles(f, files):
+    n_files = f['data'].shape[0]
+    if files is None:
+        return list(range(n_files))
+    paths = [p.decode() if isinstance(p, bytes) else p for p in f['paths'][()]]
+    idx = []
+    for file in files:
+        if isinstance(file, str):
+            idx.append(paths.index(file))
+            continue
+        i = int(file)
+        if not -n_files <= i < n_files:
+            raise IndexError('File index {} out of range for {} files'.format(i, n_files))
+        idx.append(i % n_files)
+    return idx
+
+def importSweep(file_path, files=None, length_window=None):
+    """ Read a sweep written by exportSweep, optionally only some files and a length window.
+    Args:
+        file_path - string - '.h5' file
+        files - list - file indices, negative ones counting from the end, or source paths to read, None for all
+        length_window - list - [min, max] length to read, None for the whole trace
+    Returns:
+        sweep - SweepArray
+    """
+    h5py = _requireH5py()
+    with h5py.File(file_path, 'r') as f:
+        length = f['length'][()]
+        idx_min, idx_max = 0, length.size
+        if length_window is not None:
+            idx_min = int(np.searchsorted(length, length_window[0], side='left'))
+            idx_max = int(np.searchsorted(length, length_window[1], side='right'))
+
+        idx = _selectFiles(f, files)
+        # h5py needs increasing indices, the requested order is restored afterwards
+        order = sorted(set(idx))
+        data = f['data'][order, idx_min:idx_max, :] if order else np.empty((0, idx_max - idx_min, f['data'].shape[2]))
+        data = data[[order.index(i) for i in idx]]
+
+        labels = f['labels'][()][idx] if 'labels' in f else None
+        sufixes = [s.decode() if isinstance(s, bytes) else s for s in f['sufixes'][()]]
+        paths = [p.decode() if isinstance(p, bytes) else p for p in f['paths'][()]]
+        channels = json.loads(f.attrs['channels'])
+
+    return SweepArray(length[idx_min:idx_max], data, channels, labels,
+                      [sufixes[i] or None for i in idx], [paths[i] or None for i in idx])
+
+def importHeaders(file_path, files=None):
+    """ Read the header lines stored by exportSweep.
+    Args:
+        file_path - string - '.h5' file
+        files - list - file indices, negative ones counting from the end, or source paths to read, None for all
+    Returns:
+        headers - list of lists of strings
+    """
+    h5py = _requireH5py()
+    with h5py.File(file_path, 'r') as f:
+        headers = f['headers'][()]
+        return [json.loads(headers[i]) for i in _selectFiles(f, files)]
+
+def importCalibration(file_path):
+    """ Read the calibration stored by exportSweep.
+    Args:
+        file_path - string - '.h5' file
+    Returns:
+        calibration - Calibration or None if the file has none
+    """
+    h5py = _requireH5py()
+    with h5py.File(file_path, 'r') as f:
+        if 'calibration' not in f:
+            return
+        group = f['calibration']
+        points = [p.decode() if isinstance(p, bytes) else p for p in group['points'][()]]
+        return Calibration(group['labels'][()], points, group['shift'][()], group['coef'][()], group['residuals'][()])
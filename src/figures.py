@@ -0,0 +1,167 @@
+import numpy as np
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def _initWorker():
+    # Headless backend, set before any figure is created in the worker
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+def getFigureFile(figure_path):
+    """ Get the file written by plt.savefig for a figure path.
+    Args:
+        figure_path - string - path given to savefig, with or without extension
+    Returns:
+        string - path of the image file
+    """
+    return figure_path if os.path.splitext(figure_path)[1] else figure_path + '.png'
+
+def isFigureUpToDate(figure_path, source_paths):
+    """ Check whether a figure is newer than all of its source files.
+    Args:
+        figure_path - string
+        source_paths - list of strings
+    Returns:
+        bool
+    """
+    try:
+        figure_mtime = os.stat(getFigureFile(figure_path)).st_mtime_ns
+        return all(os.stat(path).st_mtime_ns <= figure_mtime for path in source_paths)
+    except OSError:
+        return False
+
+def renderFigure(reader, figure_path):
+    """ Render and save the figure of a reader with the data already loaded.
+    Args:
+        reader - LUNAOBRDataReader
+        figure_path - string
+    Returns:
+        figure_path - string
+    """
+    if reader.is_obr_file:
+        reader.plotOBRFileFromDataFrame(figure_path)
+    else:
+        reader.plotFromDataFrame(figure_path)
+    return figure_path
+
+def _renderBatch(jobs):
+    return [renderFigure(reader, figure_path) for reader, figure_path in jobs]
+
+class FigureQueue:
+    """ Render reader figures on a separate process pool with the Agg backend.
+    Jobs are sent to the workers in batches, and figures whose image is already newer
+    than the source files are skipped.
+    Usage:
+        with FigureQueue() as figure_queue:
+            dfreader.readData(figure_dir=fig_dir, figure_queue=figure_queue)
+    """
+
+    def __init__(self, max_workers=None, batch_size=8, skip_up_to_date=True):
+        """ Create queue.
+        Args:
+            max_workers - integer - number of worker processes
+            batch_size - integer - number of figures sent to a worker at a time
+            skip_up_to_date - bool - skip figures newer than their source files
+        """
+        self.batch_size = batch_size
+        self.skip_up_to_date = skip_up_to_date
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_initWorker)
+        self.futures = []
+        self.skipped = []
+        self._batch = []
+
+    def submit(self, reader, figure_path):
+        """ Queue the figure of a reader.
+        Args:
+            reader - LUNAOBRDataReader - reader with the data already loaded
+            figure_path - string
+        Returns:
+            bool - False if the figure was up to date and skipped
+        """
+        if self.skip_up_to_date and isFigureUpToDate(figure_path, reader.getPathList()):
+            self.skipped.append(figure_path)
+            return False
+
+        self._batch.append((reader, figure_path))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        """ Send the pending batch to the workers. """
+        if self._batch:
+            self.futures.append(self.executor.submit(_renderBatch, self._batch))
+            self._batch = []
+
+    def wait(self):
+        """ Wait for every queued figure.
+        Returns:
+            figure_list - list of strings - saved figure paths
+        """
+        self.flush()
+        figure_list = []
+        for future in self.futures:
+            try:
+                figure_list.extend(future.result())
+            except Exception as e:
+                logging.error('Unable to render figure batch: ' + str(e))
+        self.futures = []
+        return figure_list
+
+    def close(self):
+        """ Wait for every queued figure and stop the workers.
+        Returns:
+            figure_list - list of strings - saved figure paths
+        """
+        figure_list = self.wait()
+        self.executor.shutdown()
+        return figure_list
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class RunningOverlay:
+    """ Multi-plot updated one measurement at a time, e.g. as an OBRWatcher callback.
+    The figure is created without pyplot, so no GUI backend is needed.
+    """
+
+    def __init__(self, figure_path, n_axes=2, label_func=None, col=1):
+        """ Create overlay.
+        Args:
+            figure_path - string - image rewritten after every update
+            n_axes - integer - one axis per sufix file
+            label_func - callable - maps a SweepResult to its legend label, defaults to the prefix
+            col - integer - plotted column
+        """
+        from matplotlib.figure import Figure
+        self.figure_path = figure_path
+        self.label_func = label_func if label_func is not None else (lambda result: result.file_prefix)
+        self.col = col
+        self.fig = Figure(figsize=(8,7))
+        self.ax = np.atleast_1d(self.fig.subplots(n_axes))
+
+    def update(self, result):
+        """ Add the curves of a SweepResult and save the figure.
+        Args:
+            result - SweepResult
+        """
+        if result.reader is None:
+            return
+        label = self.label_func(result)
+        for i, df in enumerate(result.reader.df[:len(self.ax)]):
+            self.ax[i].plot(df.iloc[:,0], df.iloc[:,self.col], linewidth=1, label=label)
+            self.ax[i].set_xlabel(df.columns[0])
+            self.ax[i].set_ylabel(df.columns[self.col])
+            self.ax[i].grid(alpha=0.5,linestyle='--')
+        self.ax[0].legend(loc='upper left', fontsize='8')
+        try:
+            self.fig.savefig(self.figure_path)
+        except Exception:
+            logging.error('Unable save figure to path: ' + self.figure_path)
+
+    def __call__(self, result):
+        self.update(result)
@@ -0,0 +1,139 @@
+import re
+from datetime import datetime
+
+_NUMBER = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(.*)$')
+
+_DATE_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y',
+                 '%d/%m/%Y %H:%M:%S', '%a %b %d %H:%M:%S %Y', '%Y/%m/%d %H:%M:%S']
+
+# Header keys of each well-known field, compared with the whole key once it is lower-cased
+# and its unit removed, so e.g. 'Last Update' or 'Frequency Range' are not taken for them
+_KNOWN_FIELDS = {
+    'date': ['measurement date', 'date', 'measurement time', 'time stamp', 'timestamp'],
+    'resolution': ['resolution', 'spatial resolution'],
+    'gauge_length': ['gauge length'],
+    'sensor_spacing': ['sensor spacing', 'spacing'],
+    'sensing_range': ['sensing range', 'length range'],
+}
+
+_UNIT = re.compile(r'\s*[\(\[][^\)\]]*[\)\]]')
+
+def normaliseKey(key):
+    """ Reduce a header key to the form the well-known fields are matched on.
+    Args:
+        key - string - e.g. 'Gauge Length (m):'
+    Returns:
+        string - e.g. 'gauge length'
+    """
+    return ' '.join(_UNIT.sub(' ', key).rstrip(':').lower().split())
+
+def parseValue(value):
+    """ Convert a header value to a number when possible.
+    Args:
+        value - string
+    Returns:
+        float or string - '0.01 m' gives 0.01, text is returned stripped
+    """
+    match = _NUMBER.match(value)
+    if match:
+        unit = match.group(2)
+        if not unit or (len(unit.split()) == 1 and (unit[0].isalpha() or unit[0] in '%°µ')):
+            return float(match.group(1))
+    return value.strip()
+
+def parseDate(value):
+    """ Parse a header date.
+    Args:
+        value - string
+    Returns:
+        string - ISO 8601 date, or None if the format is unknown
+    """
+    value = value.strip()
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).isoformat()
+        except ValueError:
+            pass
+    return
+
+def parseHeaderFields(header):
+    """ Split header lines into key/value pairs.
+    'Key: value' and 'Key<tab>value' lines are recognised, other lines are ignored.
+    Args:
+        header - list of strings - header lines
+    Returns:
+        fields - dict - key to string or float value, in file order
+    """
+    fields = {}
+    for line in header:
+        line = line.strip()
+        if not line:
+            continue
+        if '\t' in line:
+            key, _, value = line.partition('\t')
+            key = key.strip().rstrip(':')
+        elif ':' in line:
+            key, _, value = line.partition(':')
+        else:
+            continue
+        key = key.strip()
+        value = value.strip().strip('\t').strip()
+        if key and value:
+            fields[key] = parseValue(value)
+    return fields
+
+class OBRHeader:
+    """ Structured header of an OBR text export.
+    Attributes:
+        fields - dict - every key/value pair found in the header
+        date - string - ISO 8601 measurement date
+        resolution, gauge_length, sensor_spacing, sensing_range - float or None
+    """
+
+    def __init__(self, header):
+        """ Parse header lines.
+        Args:
+            header - list of strings - lines preceding the data block
+        """
+        self.lines = header
+        self.fields = parseHeaderFields(header)
+        self.date = None
+        self.resolution = None
+        self.gauge_length = None
+        self.sensor_spacing = None
+        self.sensing_range = None
+
+        keys = {key: normaliseKey(key) for key in self.fields}
+        for name, patterns in _KNOWN_FIELDS.items():
+            for key, value in self.fields.items():
+                if keys[key] in patterns:
+                    if name == 'date':
+                        value = parseDate(str(value))
+                    elif not isinstance(value, float):
+                        continue
+                    if value is not None:
+                        setattr(self, name, value)
+                        break
+
+    def get(self, key, default=None):
+        """ Get a header value by key, ignoring case.
+        Args:
+            key - string
+        Returns:
+            float or string
+        """
+        for name, value in self.fields.items():
+            if name.lower() == key.lower():
+                return value
+        return default
+
+    def toDict(self):
+        """ Get the well-known fields and every raw field.
+        Returns:
+            dict
+        """
+        return {'date': self.date, 'resolution': self.resolution, 'gauge_length': self.gauge_length,
+                'sensor_spacing': self.sensor_spacing, 'sensing_range': self.sensing_range, 'fields': self.fields}
+
+    def __repr__(self):
+        return "OBRHeader(date={!r}, resolution={!r}, gauge_length={!r})".format(self.date, self.resolution, self.gauge_length)
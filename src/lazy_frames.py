@@ -0,0 +1,107 @@
+class LazyFrameList:
+    """ List of the dataframes of a reader, each file parsed on first access.
+    It behaves like the list in LUNAOBRDataReader.df: indexing, len(), iteration and
+    truth testing work as before, but only the files that are actually indexed are read.
+    """
+
+    def __init__(self, reader, path_list):
+        """ Create list.
+        Args:
+            reader - LUNAOBRDataReader - used to parse the files, with its cache
+            path_list - list of strings - files with a readable header
+        """
+        self.reader = reader
+        self.path_list = path_list
+        self._frames = {}
+
+    def __len__(self):
+        return len(self.path_list)
+
+    def __bool__(self):
+        return bool(self.path_list)
+
+    def __getitem__(self, dim):
+        if isinstance(dim, slice):
+            return [self[i] for i in range(len(self))[dim]]
+        if dim < 0:
+            dim += len(self)
+        if not 0 <= dim < len(self):
+            raise IndexError('list index out of range')
+        if dim not in self._frames:
+            obr_file = self.reader._parseFile(self.path_list[dim])
+            if obr_file is None:
+                raise IndexError('Unable to read file ' + self.path_list[dim])
+            self._frames[dim] = obr_file.toDataFrame()
+        return self._frames[dim]
+
+    def __iter__(self):
+        for dim in range(len(self)):
+            yield self[dim]
+
+    def isLoaded(self, dim):
+        """ Check whether a file has already been parsed.
+        Args:
+            dim - integer
+        Returns:
+            bool
+        """
+        return dim in self._frames
+
+class LazyColumns:
+    """ Value columns of one file, each parsed on first access.
+    Indexing with col returns the column col + 1, so it can stand in for the
+    value array of a LengthIndex.
+    """
+
+    def __init__(self, reader, dim):
+        self.reader = reader
+        self.dim = dim
+        self._values = {}
+
+    def __getitem__(self, col):
+        if col not in self._values:
+            # The length is read along with the column if the reader does not hold it yet
+            columns = self.reader._readColumns([0, col + 1], self.dim)
+            if columns is None:
+                return
+            self._values[col] = columns[1]
+        return self._values[col]
+
+class FileFrameList:
+    """ List of the dataframes of files kept in another form, such as paired-column
+    files split into blocks or compact traces.
+    The files are what the reader keeps; the dataframe of a file is only built, and
+    then kept, when it is indexed, so code using reader.df still works.
+    """
+
+    def __init__(self, obr_files):
+        """ Create list.
+        Args:
+            obr_files - list of OBRFile or CompactTrace
+        """
+        self.obr_files = obr_files
+        self._frames = {}
+
+    def __len__(self):
+        return len(self.obr_files)
+
+    def __bool__(self):
+        return bool(self.obr_files)
+
+    def __getitem__(self, dim):
+        if isinstance(dim, slice):
+            return [self[i] for i in range(len(self))[dim]]
+        if dim < 0:
+            dim += len(self)
+        if not 0 <= dim < len(self):
+            raise IndexError('list index out of range')
+        if dim not in self._frames:
+            self._frames[dim] = self.obr_files[dim].toDataFrame()
+        return self._frames[dim]
+
+    def __iter__(self):
+        for dim in range(len(self)):
+            yield self[dim]
+
+    def isLoaded(self, dim):
+        return dim in self._frames
@@ -0,0 +1,110 @@
+import numpy as np
+from .profiling import profileStage
+from .compact import UniformLength
+
+class LengthIndex:
+    """ Index over the length axis of a trace for fast window and point queries.
+    The length is expected to increase along the fiber, so lookups use binary search
+    (np.searchsorted) instead of full scans. Cumulative sums of the value columns and
+    their interpolators are built once, on first use.
+    """
+
+    def __init__(self, length, values):
+        """ Create index.
+        Args:
+            length - numpy array or UniformLength - length axis
+            values - numpy array - value columns with shape (columns, samples) or (samples,),
+                     or an object returning a column when indexed
+        """
+        # A uniform axis is kept as (start, step, count) and searched arithmetically
+        self.length = length if isinstance(length, UniformLength) else np.asarray(length, dtype=np.float64)
+        # Anything indexable by column works, e.g. columns read on demand
+        self.values = np.atleast_2d(values) if isinstance(values, (np.ndarray, list)) else values
+        self.is_sorted = isinstance(length, UniformLength) or bool(np.all(np.diff(self.length) >= 0))
+        self._cumsum = {}
+        self._interpolator = {}
+
+    def nearest(self, x):
+        """ Get the index of the closest sample, as np.abs(length - x).argmin() does.
+        Args:
+            x - float or numpy array
+        Returns:
+            idx - integer or numpy array
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if isinstance(self.length, UniformLength):
+            idx = self.length.nearest(x)
+            return idx if idx.ndim else idx.item()
+        if not self.is_sorted:
+            idx = np.array([np.abs(self.length - v).argmin() for v in x.ravel()]).reshape(x.shape)
+            return idx
+
+        n = self.length.size
+        right = np.clip(np.searchsorted(self.length, x, side='left'), 0, n - 1)
+        left = np.clip(right - 1, 0, n - 1)
+        # Ties go to the lower index, like argmin
+        use_left = np.abs(x - self.length[left]) <= np.abs(self.length[right] - x)
+        idx = np.where(use_left, left, right)
+        # First occurrence of repeated lengths
+        return np.searchsorted(self.length, self.length[idx], side='left')
+
+    def window(self, minlim, maxlim):
+        """ Get the slice bounds of one or many [minlim, maxlim] windows.
+        Args:
+            minlim - float or numpy array
+            maxlim - float or numpy array
+        Returns:
+            idx_min, idx_max - integers or numpy arrays
+        """
+        return self.nearest(minlim), self.nearest(maxlim)
+
+    def _getCumsum(self, col):
+        if col not in self._cumsum:
+            y = self.values[col]
+            is_nan = np.isnan(y)
+            # Accumulated in float64, also for compact float32 columns
+            self._cumsum[col] = (np.concatenate(([0.0], np.cumsum(np.where(is_nan, 0.0, y), dtype=np.float64))),
+                                 np.concatenate(([0], np.cumsum(is_nan))))
+        return self._cumsum[col]
+
+    def mean(self, minlim, maxlim, col=0):
+        """ Mean over one or many windows, computed from cumulative sums.
+        Args:
+            minlim - float or numpy array - window start
+            maxlim - float or numpy array - window end
+            col - integer - value column
+        Returns:
+            ymean - float or numpy array - NaN for empty windows or windows containing NaN
+        """
+        idx_min, idx_max = self.window(minlim, maxlim)
+        cumsum, nancount = self._getCumsum(col)
+        count = idx_max - idx_min
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ymean = (cumsum[idx_max] - cumsum[idx_min]) / count
+        ymean = np.where((count > 0) & (nancount[idx_max] == nancount[idx_min]), ymean, np.nan)
+        return ymean if ymean.ndim else ymean.item()
+
+    def interpolator(self, col=0):
+        """ Get the cached linear interpolator of a value column.
+        Args:
+            col - integer - value column
+        Returns:
+            f - scipy.interpolate.interp1d
+        """
+        if col not in self._interpolator:
+            from scipy import interpolate
+            with profileStage('buildInterpolator'):
+                self._interpolator[col] = interpolate.interp1d(self.length, self.values[col], assume_sorted=self.is_sorted)
+        return self._interpolator[col]
+
+    def interpolate(self, xnew, col=0):
+        """ Interpolate a value column at one or many lengths.
+        Args:
+            xnew - float or numpy array
+            col - integer - value column
+        Returns:
+            ynew - numpy array
+        """
+        if isinstance(self.length, UniformLength):
+            return self.length.interpolate(xnew, self.values[col])
+        return self.interpolator(col)(xnew)
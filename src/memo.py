@@ -0,0 +1,218 @@
+import numpy as np
+import collections
+import copy
+import hashlib
+import logging
+import os
+import pickle
+from .cache import atomicWrite, touchEntry, listEntries, evictEntries, removeFiles
+
+MEMO_VERSION = 2
+
+# Arrays are hashed in blocks of rows of about this size, so no full copy is made
+HASH_CHUNK_BYTES = 16 * 1024**2
+
+def _updateArrayHash(h, a):
+    """ Feed a numpy array to a hash by its dtype, shape and native bytes, block by block. """
+    h.update(repr((a.dtype.str, a.shape)).encode('utf-8'))
+    if a.ndim == 0:
+        h.update(memoryview(np.ascontiguousarray(a)).cast('B'))
+        return
+    row_bytes = max(a.nbytes // max(a.shape[0], 1), 1)
+    step = max(HASH_CHUNK_BYTES // row_bytes, 1)
+    for start in range(0, a.shape[0], step):
+        h.update(memoryview(np.ascontiguousarray(a[start:start + step])).cast('B'))
+
+def _updateHash(h, part):
+    """ Feed one key part to a hash: numpy arrays by content, numeric parameters by value and
+    anything else by repr. """
+    if isinstance(part, np.ndarray) and part.dtype.kind in 'biuf':
+        _updateArrayHash(h, part)
+        return
+    if not isinstance(part, (str, bytes, type(None), bool)):
+        try:
+            a = np.asarray(part)
+        except ValueError:
+            # Ragged sequences
+            a = np.asarray(None)
+        if a.dtype.kind in 'biuf':
+            # Same parameter values give the same key whatever the numeric type, e.g. 2 and 2.0
+            _updateArrayHash(h, np.asarray(a, dtype=np.float64))
+            return
+    h.update(repr(part).encode('utf-8'))
+
+def hashArrays(*arrays):
+    """ Get a content hash of numeric arrays, e.g. the columns an analysis reads.
+    Args:
+        arrays - numpy arrays or anything np.asarray accepts
+    Returns:
+        string - hex digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        _updateHash(h, a)
+    return h.hexdigest()
+
+class ResultMemo:
+    """ Memoisation of derived results, keyed by the content of their inputs.
+    Keys combine the name of the analysis, a content hash of its input arrays and its
+    parameters, so results survive re-reading unchanged files, in this or later runs.
+    Results are kept in an in-memory LRU tier and pickled to an on-disk tier; hits,
+    disk hits, misses and stores are counted in stats.
+    Usage:
+        memo = ResultMemo()
+        reader = LUNAOBRDataReader(file_dir, file_prefix, file_sufix_list, memo=memo)
+        reader.readData(save_figure=False)
+        reader.getMeanMeasurement(1.315, 1.345)
+        print(memo.getStats())
+    """
+
+    def __init__(self, cache_dir=None, max_entries=1024, max_bytes=256*1024**2, disk=True):
+        """ Create memo.
+        Args:
+            cache_dir - string - on-disk tier directory, defaults to ~/.cache/luna_obr/memo
+            max_entries - integer - results kept in memory, the least recently used are dropped
+            max_bytes - integer - on-disk tier size limit, the least recently used entries are evicted above it
+            disk - bool - use the on-disk tier
+        """
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'luna_obr', 'memo')
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._memory = collections.OrderedDict()
+        self._disk_bytes = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+
+    def makeKey(self, name, inputs, params=()):
+        """ Build the key of a call.
+        Args:
+            name - string - analysis name
+            inputs - list - content hashes or arrays of the input data
+            params - list - call parameters
+        Returns:
+            key - string
+        """
+        h = hashlib.blake2b(digest_size=20)
+        _updateHash(h, (MEMO_VERSION, name))
+        for part in list(inputs) + [None] + list(params):
+            _updateHash(h, part)
+        return h.hexdigest()
+
+    def _entryPath(self, key):
+        return os.path.join(self.cache_dir, key + '.pkl')
+
+    def get(self, key):
+        """ Look a result up, first in memory and then on disk.
+        Args:
+            key - string
+        Returns:
+            found - bool
+            value - the stored result, a copy so callers may modify it
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, copy.deepcopy(self._memory[key])
+
+        if self.disk:
+            path = self._entryPath(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                touchEntry(path)
+                self.stats['disk_hits'] += 1
+                self._remember(key, value)
+                return True, copy.deepcopy(value)
+
+        self.stats['misses'] += 1
+        return False, None
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key, value):
+        """ Store a result in both tiers.
+        Args:
+            key - string
+            value - picklable result
+        """
+        self._remember(key, copy.deepcopy(value))
+        self.stats['stores'] += 1
+        if not self.disk:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            atomicWrite(self.cache_dir, self._entryPath(key),
+                        lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL))
+            # The tier size is tracked so the directory is only scanned once it may be full
+            if self._disk_bytes is None:
+                self._disk_bytes = self.size()
+            else:
+                self._disk_bytes += os.path.getsize(self._entryPath(key))
+        except OSError as e:
+            logging.error('Unable to write memo entry ' + key + ': ' + str(e))
+            return
+        if self._disk_bytes > self.max_bytes:
+            self.evict()
+
+    def call(self, name, inputs, params, func):
+        """ Return the memoised result of a call, computing and storing it on a miss.
+        None results are not stored, as they mean the analysis failed.
+        Args:
+            name - string - analysis name
+            inputs - list - content hashes or arrays of the input data
+            params - list - call parameters
+            func - callable - computes the result without arguments
+        Returns:
+            value - result
+        """
+        key = self.makeKey(name, inputs, params)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = func()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def getStats(self):
+        """ Get the hit/miss counters.
+        Returns:
+            stats - dict - hits, disk_hits, misses, stores, entries in memory and hit_rate
+        """
+        stats = dict(self.stats)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['entries'] = len(self._memory)
+        stats['hit_rate'] = (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def size(self):
+        """ Get the on-disk tier size.
+        Returns:
+            integer - size in bytes
+        """
+        return sum(entry[1] for entry in listEntries(self.cache_dir, '.pkl'))
+
+    def evict(self):
+        """ Remove the least recently used disk entries until the tier fits in max_bytes. """
+        self._disk_bytes = evictEntries(listEntries(self.cache_dir, '.pkl'), self.max_bytes,
+                                        lambda key: removeFiles([self._entryPath(key)]))
+
+    def clear(self):
+        """ Remove every result from both tiers and reset the counters. """
+        self._memory.clear()
+        removeFiles([self._entryPath(key) for _, _, key in listEntries(self.cache_dir, '.pkl')])
+        self._disk_bytes = None
+        self.stats = dict.fromkeys(self.stats, 0)
+
+    def __repr__(self):
+        return "ResultMemo(cache_dir={!r}, {})".format(self.cache_dir, self.getStats())
@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import sqlite3
+from .catalog import scanCampaign
+from .header import OBRHeader
+from .obr_parser import readHeader
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT,
+    prefix TEXT,
+    sufix TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    date TEXT,
+    resolution REAL,
+    gauge_length REAL,
+    sensor_spacing REAL,
+    sensing_range REAL,
+    length_min REAL,
+    length_max REAL,
+    columns TEXT,
+    header TEXT
+);
+CREATE TABLE IF NOT EXISTS fields (
+    path TEXT,
+    key TEXT,
+    value_text TEXT,
+    value_num REAL
+);
+CREATE INDEX IF NOT EXISTS fields_key ON fields (key, value_num);
+CREATE INDEX IF NOT EXISTS fields_path ON fields (path);
+CREATE INDEX IF NOT EXISTS files_length ON files (length_min, length_max);
+CREATE INDEX IF NOT EXISTS files_date ON files (date);
+"""
+
+def _readLastLength(file_path, block_size=4096):
+    """ Read the length of the last data line without reading the whole file. """
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - block_size))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return float(line.split(b'\t')[0])
+        except ValueError:
+            continue
+    return
+
+class MetadataIndex:
+    """ SQLite index of the headers of every file of a campaign.
+    Only the header block and the last line of each file are read, and unchanged files
+    (same size and mtime) are skipped on update, so re-indexing a campaign is cheap.
+    Usage:
+        index = MetadataIndex('campaign.sqlite')
+        index.update('data/smf/strain')
+        index.query(resolution=0.01, date_from='2024-01-01')
+    """
+
+    def __init__(self, db_path):
+        """ Open or create index.
+        Args:
+            db_path - string - SQLite file, ':memory:' for a temporary index
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _listFiles(self, dir_name):
+        return scanCampaign(dir_name).getPaths()
+
+    def indexFile(self, file_path, st=None):
+        """ Add or refresh one file.
+        Args:
+            file_path - string
+            st - os.stat_result - stat of the file, if already known
+        Returns:
+            bool - False if the file has no readable header
+        """
+        st = st or os.stat(file_path)
+        try:
+            header_lines, labels, first_fields = readHeader(file_path)
+            length_min = float(first_fields[0])
+            length_max = _readLastLength(file_path)
+        except (OSError, ValueError) as e:
+            logging.error('Unable to index ' + file_path + ': ' + str(e))
+            return False
+
+        header = OBRHeader(header_lines)
+        name = os.path.basename(file_path)[:-4]
+        prefix, _, sufix = name.partition('_')
+        columns = [label.strip() for label in labels if label.strip()]
+        with self.connection:
+            self.connection.execute('DELETE FROM fields WHERE path = ?', (file_path,))
+            self.connection.execute('INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)',
+                                    (file_path, os.path.dirname(file_path), prefix, sufix, st.st_size, st.st_mtime_ns,
+                                     header.date, header.resolution, header.gauge_length, header.sensor_spacing,
+                                     header.sensing_range, length_min, length_max, json.dumps(columns),
+                                     json.dumps(header_lines)))
+            self.connection.executemany('INSERT INTO fields VALUES (?,?,?,?)',
+                                        [(file_path, key, str(value), value if isinstance(value, float) else None)
+                                         for key, value in header.fields.items()])
+        return True
+
+    def update(self, dir_name):
+        """ Index new and changed files below a campaign root and drop deleted ones.
+        Args:
+            dir_name - string - campaign root, scanned recursively with scanCampaign
+        Returns:
+            integer - number of files (re)indexed
+        """
+        known = {row['path']: (row['size'], row['mtime_ns'])
+                 for row in self.connection.execute('SELECT path, size, mtime_ns FROM files')}
+        file_list = self._listFiles(dir_name)
+        count = 0
+        for file_path in file_list:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            if known.get(file_path) == (st.st_size, st.st_mtime_ns):
+                continue
+            count += self.indexFile(file_path, st)
+
+        root = os.path.join(dir_name, '')
+        file_set = set(file_list)
+        removed = [path for path in known if path.startswith(root) and path not in file_set]
+        with self.connection:
+            self.connection.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in removed])
+            self.connection.executemany('DELETE FROM fields WHERE path = ?', [(path,) for path in removed])
+        return count
+
+    def query(self, date_from=None, date_to=None, resolution=None, gauge_length=None, prefix=None, sufix=None, **fields):
+        """ Find files by header metadata.
+        Args:
+            date_from, date_to - string - ISO 8601 date bounds, compared as strings
+            resolution, gauge_length - float - exact values
+            prefix, sufix - string - measurement name parts
+            fields - raw header keys with their values, e.g. **{'Resolution (m)': 0.01}
+        Returns:
+            list of dicts - matching files, ordered by path
+        """
+        conditions = []
+        params = []
+        for column, operator, value in [('date', '>=', date_from), ('date', '<=', date_to),
+                                        ('resolution', '=', resolution), ('gauge_length', '=', gauge_length),
+                                        ('prefix', '=', prefix), ('sufix', '=', sufix)]:
+            if value is not None:
+                conditions.append('{} {} ?'.format(column, operator))
+                params.append(value)
+        for key, value in fields.items():
+            column = 'value_num' if isinstance(value, (int, float)) else 'value_text'
+            conditions.append('path IN (SELECT path FROM fields WHERE key = ? AND {} = ?)'.format(column))
+            params.extend([key, value])
+        return self._select(conditions, params)
+
+    def findCovering(self, minlim, maxlim):
+        """ Find files whose length range covers [minlim, maxlim].
+        Args:
+            minlim, maxlim - float
+        Returns:
+            list of dicts - matching files, ordered by path
+        """
+        return self._select(['length_min <= ?', 'length_max >= ?'], [minlim, maxlim])
+
+    def _select(self, conditions, params):
+        sql = 'SELECT * FROM files'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        rows = self.connection.execute(sql + ' ORDER BY path', params).fetchall()
+        records = []
+        for row in rows:
+            record = dict(row)
+            record['columns'] = json.loads(record['columns'])
+            record['header'] = json.loads(record['header'])
+            records.append(record)
+        return records
@@ -0,0 +1,284 @@
+import pandas as pd
+import numpy as np
+import csv
+import io
+from .header import OBRHeader
+from .column_blocks import splitColumnPairs, padBlocks
+
+class OBRFile:
+    """ Parsed OBR 4600 text export.
+    Attributes:
+        file_path - string - source path
+        header - list of strings - raw header lines found before the data block
+        columns - list of strings - column labels
+        data - numpy array - float64 array with shape (columns, samples), None once split into blocks
+        blocks - list of ColumnBlock - (x, y) pairs of a paired-column file, see toBlocks
+    """
+
+    def __init__(self, file_path, header, columns, data, blocks=None):
+        self.file_path = file_path
+        self.header = header
+        self.columns = columns
+        self.data = data
+        self.blocks = blocks
+
+    def getColumn(self, col):
+        """ Get a single column.
+        Args:
+            col - integer - column index
+        Returns:
+            numpy array - column values
+        """
+        if self.data is None:
+            block = self.blocks[col // 2]
+            return block.y if col % 2 else block.x
+        return self.data[col]
+
+    def getHeader(self):
+        """ Get the structured header.
+        Returns:
+            header - OBRHeader
+        """
+        return OBRHeader(self.header)
+
+    def toDataFrame(self):
+        """ Wrap the parsed arrays in a dataframe without copying them.
+        Returns:
+            df - dataframe, NaN-padded again for files split into blocks
+        """
+        data = self.data if self.data is not None else padBlocks(self.blocks)
+        return pd.DataFrame(data.T, columns=self.columns[:data.shape[0]], copy=False)
+
+    def toBlocks(self):
+        """ Split a paired-column file into exactly-sized (x, y) blocks and drop the padded array.
+        Returns:
+            obr_file - OBRFile - with blocks set and data None
+        """
+        if self.data is None:
+            return self
+        return OBRFile(self.file_path, self.header, self.columns, None, splitColumnPairs(self.data, self.columns))
+
+def _isFloat(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+def _isDataLine(fields):
+    values = [f for f in fields if f.strip()]
+    return len(values) >= 2 and all(_isFloat(v) for v in values)
+
+def _dedupeLabels(labels):
+    """ Rename duplicated labels the same way pandas.read_csv does ('x', 'x.1', ...).
+    Args:
+        labels - list of strings
+    Returns:
+        list of strings
+    """
+    seen = {}
+    new_labels = []
+    for label in labels:
+        if label in seen:
+            seen[label] += 1
+            new_labels.append("{}.{}".format(label, seen[label]))
+        else:
+            seen[label] = 0
+            new_labels.append(label)
+    return new_labels
+
+def scanHeader(stream, max_header_lines=200):
+    """ Scan the header block once and locate the numeric data block.
+    Args:
+        stream - file object - opened in text or binary mode, left at the end of the first data line
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Returns:
+        header - list of strings - lines preceding the data block
+        labels - list of strings - raw column labels (may contain empty strings)
+        first_fields - list of strings - fields of the first data line
+        data_start - integer - stream position of the first data line
+    """
+    header = []
+    pos = stream.tell()
+    for _ in range(max_header_lines):
+        line = stream.readline()
+        if not line:
+            break
+        if isinstance(line, bytes):
+            line = _decode(line)
+        line = line.rstrip('\r\n')
+        fields = line.split('\t')
+        if _isDataLine(fields):
+            labels = []
+            for candidate in reversed(header):
+                if candidate.strip():
+                    labels = candidate.split('\t')
+                    break
+            return header, labels, fields, pos
+        header.append(line)
+        pos = stream.tell()
+
+    raise ValueError('No numeric data block found in the first {} lines'.format(max_header_lines))
+
+def _decode(raw):
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+def _selectColumns(labels, n_fields):
+    """ Keep the columns that have a label, as pandas drops them as 'Unnamed'.
+    Args:
+        labels - list of strings - raw column labels
+        n_fields - integer - number of fields per data line
+    Returns:
+        keep - list of integers - field indices to keep
+        columns - list of strings - labels of the kept fields
+    """
+    if not labels:
+        return list(range(n_fields)), ["Column {}".format(i) for i in range(n_fields)]
+
+    keep = [i for i in range(n_fields) if i < len(labels) and labels[i].strip()]
+    columns = _dedupeLabels([labels[i].strip() for i in keep])
+    return keep, columns
+
+def _readBlock(source, skip_rows, labels, first_fields, cols=None, **kwargs):
+    """ Bulk-load the numeric block with the pandas C tokenizer in a single pass.
+    Args:
+        source - string or file object - file path or stream
+        skip_rows - integer - number of header lines before the data block
+        labels - list of strings - raw column labels
+        first_fields - list of strings - fields of the first data line
+        cols - list of integers - indices of the kept columns to load, None for all
+        kwargs - extra read_csv arguments, e.g. chunksize
+    Returns:
+        df - dataframe with the kept columns, or an iterator of them if chunksize is set
+        columns - list of strings - labels of the kept columns
+    """
+    n_fields = max(len(labels), len(first_fields))
+    keep, columns = _selectColumns(labels, len(first_fields))
+    if cols is not None:
+        keep = [keep[i] for i in cols]
+        columns = [columns[i] for i in cols]
+    # Missing cells, as in paired column blocks of different lengths, become NaN
+    df = pd.read_csv(source, sep='\t', header=None, skiprows=skip_rows, names=list(range(n_fields)), usecols=keep,
+                     index_col=False, dtype=np.float64, engine='c', encoding='latin-1', quoting=csv.QUOTE_NONE,
+                     **kwargs)
+    return df, columns
+
+def _toArray(df):
+    # Float blocks are stored column-major, so the transpose is usually a view
+    return np.ascontiguousarray(df.to_numpy(dtype=np.float64).T)
+
+def parseOBRText(text, file_path=None, max_header_lines=200):
+    """ Parse the contents of an OBR text export.
+    Args:
+        text - string - file contents
+        file_path - string - source path, kept for reference
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Returns:
+        obr_file - OBRFile
+    """
+    stream = io.StringIO(text)
+    header, labels, first_fields, data_start = scanHeader(stream, max_header_lines)
+    stream.seek(data_start)
+    df, columns = _readBlock(stream, 0, labels, first_fields)
+    return OBRFile(file_path, header, columns, _toArray(df))
+
+def readHeader(file_path, max_header_lines=200):
+    """ Read only the header block of an OBR text export.
+    Args:
+        file_path - string
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Returns:
+        header - list of strings - lines preceding the data block
+        labels - list of strings - raw column labels (may contain empty strings)
+        first_fields - list of strings - fields of the first data line
+    """
+    with open(file_path, 'rb') as f:
+        header, labels, first_fields, _ = scanHeader(f, max_header_lines)
+    return header, labels, first_fields
+
+def parseOBRHeader(file_path, max_header_lines=200):
+    """ Parse only the header block and the column layout of an OBR text export.
+    Args:
+        file_path - string
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Returns:
+        header - list of strings - lines preceding the data block
+        columns - list of strings - column labels
+    """
+    header, labels, first_fields = readHeader(file_path, max_header_lines)
+    _, columns = _selectColumns(labels, len(first_fields))
+    return header, columns
+
+def parseOBRColumns(file_path, cols, max_header_lines=200):
+    """ Parse only some columns of an OBR text export.
+    Args:
+        file_path - string
+        cols - list of integers - column indices, as in OBRFile.columns
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Returns:
+        data - numpy array - shape (len(cols), samples)
+    """
+    header, labels, first_fields = readHeader(file_path, max_header_lines)
+    # read_csv returns the columns in file order
+    unique_cols = sorted(set(cols))
+    df, _ = _readBlock(file_path, len(header), labels, first_fields, cols=unique_cols)
+    data = _toArray(df)
+    return data[[unique_cols.index(col) for col in cols]]
+
+def readText(file_path):
+    """ Read a text file once, falling back to latin-1 for non UTF-8 headers.
+    Args:
+        file_path - string
+    Returns:
+        string - file contents
+    """
+    with open(file_path, 'rb') as f:
+        return _decode(f.read())
+
+def parseOBRFile(file_path, max_header_lines=200):
+    """ Read and parse an OBR text export.
+    Only the header lines are scanned in Python; the data block is parsed once,
+    with the number of header lines and the column layout already known.
+    Args:
+        file_path - string
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Returns:
+        obr_file - OBRFile
+    """
+    header, labels, first_fields = readHeader(file_path, max_header_lines)
+    df, columns = _readBlock(file_path, len(header), labels, first_fields)
+    return OBRFile(file_path, header, columns, _toArray(df))
+
+def iterOBRChunks(file_path, chunk_size=100000, length_window=None, max_header_lines=200):
+    """ Read an OBR text export in fixed-size chunks, keeping memory bounded.
+    Args:
+        file_path - string
+        chunk_size - integer - number of lines parsed at a time
+        length_window - list - [min, max] length, samples outside it are dropped and
+                        reading stops once the window is passed (the length must be increasing)
+        max_header_lines - integer - maximum number of lines searched for the data block
+    Yields:
+        length - numpy array - first column
+        values - numpy array - remaining columns with shape (columns - 1, samples)
+    """
+    header, labels, first_fields = readHeader(file_path, max_header_lines)
+    reader, _ = _readBlock(file_path, len(header), labels, first_fields, chunksize=chunk_size)
+    with reader:
+        for df in reader:
+            data = _toArray(df)
+            length = data[0]
+
+            if length_window is not None:
+                if length[0] > length_window[1]:
+                    break
+                idx_min = np.searchsorted(length, length_window[0], side='left')
+                idx_max = np.searchsorted(length, length_window[1], side='right')
+                if idx_min == idx_max:
+                    continue
+                data = data[:, idx_min:idx_max]
+                length = data[0]
+
+            yield length, data[1:]
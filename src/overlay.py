@@ -0,0 +1,129 @@
+import numpy as np
+
+def decimateMinMax(x, y, n_buckets):
+    """ Reduce a trace to the minimum and maximum of each screen-pixel bucket.
+    The envelope of the trace, and so its drawn shape and limits, is preserved.
+    Args:
+        x - numpy array - increasing length
+        y - numpy array
+        n_buckets - integer - usually the axis width in pixels
+    Returns:
+        x_dec, y_dec - numpy arrays with at most 2 * n_buckets samples
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.size <= 2 * n_buckets:
+        return x, y
+
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side='left'))
+    starts = starts[starts < x.size]
+    y_min = np.fmin.reduceat(y, starts)
+    y_max = np.fmax.reduceat(y, starts)
+    ends = np.append(starts[1:], x.size) - 1
+    x_mid = 0.5 * (x[starts] + x[ends])
+
+    x_dec = np.repeat(x_mid, 2)
+    y_dec = np.empty(x_dec.size)
+    y_dec[0::2] = y_min
+    y_dec[1::2] = y_max
+    return x_dec, y_dec
+
+def _getWidthPx(ax):
+    try:
+        return max(int(ax.get_window_extent().width), 100)
+    except Exception:
+        return 1000
+
+def plotOverlay(ax, traces, labels=None, n_buckets=None, linewidth=1, colors=None, x_lim=None, y_lim=None, x_window=None):
+    """ Draw many traces on one axis as a single LineCollection.
+    Args:
+        ax - matplotlib axis
+        traces - list of (x, y) arrays
+        labels - list of strings - legend label of each trace
+        n_buckets - integer - decimation buckets, defaults to the axis width in pixels
+        x_window - list - [min, max] length drawn, traces are cut before decimating so a zoomed
+                   view keeps its full resolution
+        linewidth - float
+        colors - list of colors, defaults to the axis color cycle
+        x_lim, y_lim - list - [min, max] limits to extend, as returned by a previous call
+    Returns:
+        collection - LineCollection
+        x_min_max, y_min_max - list - limits computed from the data arrays
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    import matplotlib.pyplot as plt
+
+    if n_buckets is None:
+        n_buckets = _getWidthPx(ax)
+    if colors is None:
+        cycle = plt.rcParams['axes.prop_cycle'].by_key().get('color', ['C0'])
+        colors = [cycle[i % len(cycle)] for i in range(len(traces))]
+
+    segments = []
+    x_min_max = list(x_lim) if x_lim else [np.inf, -np.inf]
+    y_min_max = list(y_lim) if y_lim else [np.inf, -np.inf]
+    for x, y in traces:
+        if x_window is not None:
+            idx_min = np.searchsorted(x, x_window[0], side='left')
+            idx_max = np.searchsorted(x, x_window[1], side='right')
+            x, y = x[idx_min:idx_max], y[idx_min:idx_max]
+        x_dec, y_dec = decimateMinMax(x, y, n_buckets)
+        segments.append(np.column_stack((x_dec, y_dec)))
+        if x_dec.size:
+            # The decimated envelope keeps the y extremes, the x extremes are the trace ends
+            x_min_max = [min(x_min_max[0], float(np.nanmin(x))), max(x_min_max[1], float(np.nanmax(x)))]
+            y_min_max = [min(y_min_max[0], float(np.nanmin(y_dec))), max(y_min_max[1], float(np.nanmax(y_dec)))]
+
+    collection = LineCollection(segments, linewidths=linewidth, colors=colors)
+    ax.add_collection(collection)
+    if np.all(np.isfinite(x_min_max)) and x_min_max[0] < x_min_max[1]:
+        ax.set_xlim(x_min_max)
+    if np.all(np.isfinite(y_min_max)) and y_min_max[0] < y_min_max[1]:
+        ax.set_ylim(y_min_max)
+
+    if labels is not None:
+        handles = [Line2D([], [], color=color, linewidth=linewidth) for color in colors]
+        ax.legend(handles, labels, loc='upper left', fontsize='8')
+    return collection, x_min_max, y_min_max
+
+def plotReadersOverlay(ax, readers, labels=None, col=1, n_buckets=None, x_window=None, use_pyramid=False):
+    """ Overlay the traces of many readers, one axis per sufix file.
+    Args:
+        ax - matplotlib axis or array of axes
+        readers - list of LUNAOBRDataReader - readers with the data already loaded
+        labels - list of strings - legend label of each reader
+        col - integer - plotted column
+        n_buckets - integer - decimation buckets, defaults to the axis width in pixels
+        x_window - list - [min, max] length drawn on each axis, None for the whole trace
+        use_pyramid - bool - draw from each reader's zoom pyramid, so redrawing a zoomed or
+                      panned window costs the axis width instead of the trace length
+    Returns:
+        ax - array of axes
+        x_min_max, y_min_max - list of [min, max] limits of each axis
+    """
+    ax = np.atleast_1d(ax)
+    x_min_max = []
+    y_min_max = []
+    for i in range(len(ax)):
+        # Traces and labels are read by column, so no dataframe is built for them
+        present = [reader for reader in readers if len(reader.df) > i]
+        window = x_window[i] if x_window is not None else None
+        if use_pyramid:
+            n_px = n_buckets or _getWidthPx(ax[i])
+            traces = [reader.getPyramid(i).envelope(*(window or [None, None]), n_px=n_px, index=col-1)
+                      for reader in present]
+            # The envelopes are already cut and decimated to the axis width
+            window = None
+        else:
+            traces = [(reader.getColumn(0, i), reader.getColumn(col, i)) for reader in present]
+        _, x_lim, y_lim = plotOverlay(ax[i], traces, labels if i == 0 else None, n_buckets, x_window=window)
+        if present:
+            columns = present[0].getColumns(i)
+            ax[i].set_xlabel(columns[0])
+            ax[i].set_ylabel(columns[col])
+        ax[i].grid(alpha=0.5,linestyle='--')
+        x_min_max.append(x_lim)
+        y_min_max.append(y_lim)
+    return ax, x_min_max, y_min_max
@@ -0,0 +1,214 @@
+import cProfile
+import csv
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_active = None
+
+class _NullStage:
+    """ Stage returned when no profiler is active, so hooks cost a single check. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+
+    def __init__(self, profiler, name, target, file_path):
+        self.profiler = profiler
+        self.name = name
+        self.target = target
+        self.file_path = file_path
+        self.peak = 0
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._exit(self, exc_type)
+        return False
+
+def profileStage(name, target=None, file_path=None):
+    """ Time a pipeline stage if a profiler is active.
+    Args:
+        name - string - stage name, e.g. 'parse' or 'savefig'
+        target - string - file, folder or measurement the stage works on
+        file_path - string - file read by the stage, its size is recorded as bytes read
+    Returns:
+        context manager
+    """
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(_active, name, target, file_path)
+
+def getProfiler():
+    """ Get the active profiler.
+    Returns:
+        profiler - Profiler or None
+    """
+    return _active
+
+class Profiler:
+    """ Opt-in instrumentation of the read/analyse/plot pipeline.
+    While active, every hooked stage (getFolders, getFiles, cache lookups, parsing,
+    toDataFrame, _dropEmpty, block splitting, length index builds, interpolation, window
+    means, plotting and savefig) records its wall time, the bytes it read and its peak memory, per file
+    and per LUNAOBRDataReader call. Stages run in worker processes (sweepDir,
+    FigureQueue) are not recorded; use max_workers=1 to profile a sweep.
+    Usage:
+        with Profiler() as profiler:
+            reader.readData()
+        profiler.saveJSON('profile.json')
+        profiler.saveTraceEvents('trace.json')
+    """
+
+    def __init__(self, memory=True, cprofile=False):
+        """ Create profiler.
+        Args:
+            memory - bool - record peak memory with tracemalloc, which slows allocations down
+            cprofile - bool - also run cProfile while active, see saveCProfile
+        """
+        self.memory = memory
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started_tracemalloc = False
+        self._t0 = time.perf_counter()
+
+    def start(self):
+        """ Make this the active profiler. """
+        global _active
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        _active = self
+
+    def stop(self):
+        """ Deactivate the profiler, keeping its records. """
+        global _active
+        if _active is self:
+            _active = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _tracing(self):
+        return self.memory and tracemalloc.is_tracing()
+
+    def _enter(self, stage):
+        stack = self._stack()
+        if self._tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for the new stage, so the enclosing stages keep theirs
+            for parent in stack:
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            stage.memory_start = current
+            stage.peak = current
+        stack.append(stage)
+        stage.start = time.perf_counter()
+
+    def _exit(self, stage, exc_type):
+        end = time.perf_counter()
+        stack = self._stack()
+        stack.pop()
+        peak_bytes = None
+        if self._tracing() and hasattr(stage, 'memory_start'):
+            stage.peak = max(stage.peak, tracemalloc.get_traced_memory()[1])
+            peak_bytes = stage.peak - stage.memory_start
+            for parent in stack:
+                parent.peak = max(parent.peak, stage.peak)
+
+        n_bytes = None
+        if stage.file_path is not None:
+            try:
+                n_bytes = os.path.getsize(stage.file_path)
+            except OSError:
+                pass
+
+        record = {'stage': stage.name, 'target': stage.target, 'start': stage.start - self._t0,
+                  'seconds': end - stage.start, 'bytes': n_bytes, 'peak_bytes': peak_bytes,
+                  'depth': len(stack), 'thread': threading.get_ident(), 'error': exc_type.__name__ if exc_type else None}
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self):
+        """ Aggregate the records per stage.
+        Returns:
+            dict - stage name to calls, total seconds, bytes read and maximum peak memory
+        """
+        summary = {}
+        for record in self.records:
+            stage = summary.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0, 'bytes': 0, 'peak_bytes': 0})
+            stage['calls'] += 1
+            stage['seconds'] += record['seconds']
+            stage['bytes'] += record['bytes'] or 0
+            stage['peak_bytes'] = max(stage['peak_bytes'], record['peak_bytes'] or 0)
+        return summary
+
+    def saveJSON(self, file_path):
+        """ Write the records and the per-stage summary.
+        Args:
+            file_path - string - '.json' file
+        """
+        with open(file_path, 'w') as f:
+            json.dump({'records': self.records, 'summary': self.summary()}, f, indent=1)
+
+    def saveCSV(self, file_path):
+        """ Write one row per record.
+        Args:
+            file_path - string - '.csv' file
+        """
+        fields = ['stage', 'target', 'start', 'seconds', 'bytes', 'peak_bytes', 'depth', 'thread', 'error']
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def saveTraceEvents(self, file_path):
+        """ Write the records in the Trace Event format, loadable in chrome://tracing,
+        Perfetto or speedscope as a flame graph.
+        Args:
+            file_path - string - '.json' file
+        """
+        pid = os.getpid()
+        events = [{'name': record['stage'], 'cat': 'luna_obr', 'ph': 'X', 'pid': pid, 'tid': record['thread'],
+                   'ts': record['start'] * 1e6, 'dur': record['seconds'] * 1e6,
+                   'args': {key: record[key] for key in ['target', 'bytes', 'peak_bytes', 'error']}}
+                  for record in self.records]
+        with open(file_path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def saveCProfile(self, file_path):
+        """ Write the cProfile statistics, loadable with pstats, snakeviz or flameprof.
+        Args:
+            file_path - string - '.prof' file
+        """
+        if self._cprofile is None:
+            raise ValueError('Profiler was created without cprofile=True')
+        self._cprofile.dump_stats(file_path)
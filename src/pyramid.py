@@ -0,0 +1,167 @@
+import numpy as np
+
+# Level 1 blocks reduced at once when a pyramid is built
+BUILD_CHUNK_BLOCKS = 65536
+
+class TracePyramid:
+    """ Multi-resolution min/max/mean summary of traces for fast zoomed views.
+    Level k holds the minimum, maximum, sum and count of non-NaN samples of blocks of
+    factor**k samples. A view picks the coarsest level with at least n_px blocks in
+    the window, so its cost depends on the output size and not on the trace size.
+    Usage:
+        pyramid = TracePyramid(length, values)
+        x, y_min, y_max, y_mean = pyramid.view(1.315, 1.345, n_px=1000)
+    """
+
+    def __init__(self, length, values, factor=4, min_blocks=256, levels=None):
+        """ Build pyramid.
+        Args:
+            length - numpy array - increasing length with shape (samples,)
+            values - numpy array - shape (..., samples), e.g. (channels, samples) or (files, samples)
+            factor - integer - samples per block between consecutive levels
+            min_blocks - integer - levels stop once they have fewer blocks
+            levels - list of tuples - precomputed (min, max, sum, count) levels, as stored by save
+        """
+        self.length = np.asarray(length, dtype=np.float64)
+        self.values = values
+        self.factor = factor
+        self.levels = levels if levels is not None else self._build(min_blocks)
+
+    def _build(self, min_blocks):
+        n = np.shape(self.values)[-1]
+        if n <= min_blocks:
+            return []
+        # Level 1 is reduced chunk by chunk, so memory-mapped or float32 values are never
+        # converted to float64 as a whole; chunks hold a whole number of blocks
+        chunk = self.factor * BUILD_CHUNK_BLOCKS
+        shape = np.shape(self.values)[:-1] + (-(-n // self.factor),)
+        current = (np.empty(shape), np.empty(shape), np.empty(shape), np.empty(shape, dtype=np.int32))
+        for start in range(0, n, chunk):
+            part = self._reduce(*self._getSamples(start, min(start + chunk, n)))
+            j = start // self.factor
+            for level, block in zip(current, part):
+                level[..., j:j + block.shape[-1]] = block
+        levels = [current]
+        while current[0].shape[-1] > min_blocks:
+            current = self._reduce(*current)
+            levels.append(current)
+        return levels
+
+    def _getSamples(self, idx_min, idx_max):
+        """ Raw samples as a level 0 of one-sample blocks. """
+        y = np.asarray(self.values[..., idx_min:idx_max], dtype=np.float64)
+        is_nan = np.isnan(y)
+        return (np.where(is_nan, np.inf, y), np.where(is_nan, -np.inf, y), np.where(is_nan, 0.0, y),
+                (~is_nan).astype(np.int32))
+
+    def _reduce(self, y_min, y_max, y_sum, count):
+        """ Merge groups of factor blocks into one. """
+        n = y_min.shape[-1]
+        n_blocks = -(-n // self.factor)
+        pad = n_blocks * self.factor - n
+        shape = y_min.shape[:-1] + (n_blocks, self.factor)
+
+        def block(a, fill):
+            if pad:
+                a = np.concatenate((a, np.full(a.shape[:-1] + (pad,), fill, dtype=a.dtype)), axis=-1)
+            return a.reshape(shape)
+        return (block(y_min, np.inf).min(axis=-1), block(y_max, -np.inf).max(axis=-1),
+                block(y_sum, 0.0).sum(axis=-1), block(count, 0).sum(axis=-1))
+
+    def view(self, minlim=None, maxlim=None, n_px=1000):
+        """ Summarise a length window in about n_px buckets.
+        Windows are widened to the block edges of the level used, by less than one bucket.
+        Args:
+            minlim, maxlim - float - window, None for the trace ends
+            n_px - integer - number of buckets, usually the axis width in pixels
+        Returns:
+            x - numpy array - length at the start of each bucket
+            y_min, y_max, y_mean - numpy arrays - shape (..., buckets), NaN for empty buckets
+        """
+        n = self.length.size
+        idx_min = 0 if minlim is None else int(np.searchsorted(self.length, minlim, side='left'))
+        idx_max = n if maxlim is None else int(np.searchsorted(self.length, maxlim, side='right'))
+        if idx_max <= idx_min:
+            empty = np.empty(np.shape(self.values)[:-1] + (0,))
+            return np.empty(0), empty, empty, empty
+
+        # Coarsest level still giving n_px blocks in the window
+        k = 0
+        while k < len(self.levels) and (idx_max - idx_min) // self.factor**(k + 1) >= n_px:
+            k += 1
+        block = self.factor**k
+        j_min = idx_min // block
+        j_max = -(-idx_max // block)
+        if k == 0:
+            y_min, y_max, y_sum, count = self._getSamples(j_min, j_max)
+        else:
+            y_min, y_max, y_sum, count = (a[..., j_min:j_max] for a in self.levels[k - 1])
+
+        n_blocks = j_max - j_min
+        starts = np.unique(np.linspace(0, n_blocks, min(n_px, n_blocks) + 1)[:-1].astype(np.int64))
+        b_min = np.minimum.reduceat(y_min, starts, axis=-1)
+        b_max = np.maximum.reduceat(y_max, starts, axis=-1)
+        b_sum = np.add.reduceat(y_sum, starts, axis=-1)
+        b_count = np.add.reduceat(count, starts, axis=-1)
+
+        empty = b_count == 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            b_mean = b_sum / b_count
+        b_min = np.where(empty, np.nan, b_min)
+        b_max = np.where(empty, np.nan, b_max)
+        b_mean = np.where(empty, np.nan, b_mean)
+        x = self.length[np.minimum((j_min + starts) * block, n - 1)]
+        return x, b_min, b_max, b_mean
+
+    def envelope(self, minlim=None, maxlim=None, n_px=1000, index=0):
+        """ Min/max envelope of one trace as a drawable line, like decimateMinMax.
+        Args:
+            minlim, maxlim - float - window
+            n_px - integer - number of buckets
+            index - integer or tuple - trace in the leading dimensions of values
+        Returns:
+            x, y - numpy arrays with two samples per bucket
+        """
+        x, y_min, y_max, _ = self.view(minlim, maxlim, n_px)
+        if y_min.ndim > 1:
+            y_min, y_max = y_min[index], y_max[index]
+        y = np.empty(2 * x.size)
+        y[0::2] = y_min
+        y[1::2] = y_max
+        return np.repeat(x, 2), y
+
+    def save(self, file):
+        """ Write the levels to a '.npz' file; the length and values are stored elsewhere.
+        Args:
+            file - string or file object
+        """
+        arrays = {'factor': np.array(self.factor)}
+        for k, (y_min, y_max, y_sum, count) in enumerate(self.levels):
+            arrays.update({'min{}'.format(k): y_min, 'max{}'.format(k): y_max,
+                           'sum{}'.format(k): y_sum, 'count{}'.format(k): count})
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, file, length, values):
+        """ Read levels written by save.
+        Args:
+            file - string or file object - '.npz' file
+            length - numpy array
+            values - numpy array - the traces the pyramid was built from, may be memory-mapped
+        Returns:
+            pyramid - TracePyramid
+        """
+        with np.load(file) as f:
+            levels = []
+            k = 0
+            while 'min{}'.format(k) in f:
+                levels.append(tuple(f['{}{}'.format(name, k)] for name in ('min', 'max', 'sum', 'count')))
+                k += 1
+            return cls(length, values, int(f['factor']), levels=levels)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for level in self.levels for a in level)
+
+    def __repr__(self):
+        return "TracePyramid(samples={}, levels={}, factor={})".format(self.length.size, len(self.levels), self.factor)
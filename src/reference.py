@@ -0,0 +1,168 @@
+import numpy as np
+import collections
+import os
+from .obr_parser import parseOBRFile
+from .sweep_array import SweepArray, ResampleCache
+from .compact import UniformLength
+
+# Parsed baselines, keyed on path, size and mtime so a changed file is parsed again; only
+# the most recently used are kept, as stale keys of rewritten files are never hit again
+MAX_REFERENCES = 8
+_references = collections.OrderedDict()
+
+def loadReference(file_path, cache=None):
+    """ Parse a baseline file once per process.
+    Args:
+        file_path - string
+        cache - OBRCache - on-disk cache used on the first load
+    Returns:
+        obr_file - OBRFile
+    """
+    st = os.stat(file_path)
+    key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    if key not in _references:
+        obr_file = cache.load(file_path) if cache is not None else None
+        if obr_file is None:
+            obr_file = parseOBRFile(file_path)
+            if cache is not None:
+                cache.store(obr_file)
+        _references[key] = obr_file
+        while len(_references) > MAX_REFERENCES:
+            _references.popitem(last=False)
+    _references.move_to_end(key)
+    return _references[key]
+
+class ReferenceDifference:
+    """ Differences of measurements against a baseline trace, e.g. the 0 microstrain or
+    30 °C file of a sweep.
+    Measurements are resampled onto the baseline length grid; the interpolation
+    weights are cached per distinct length axis, so a sweep exported with the same
+    settings computes them once.
+    Usage:
+        reference = ReferenceDifference.fromFile('data/smf/strain/0_Lower.txt')
+        sweep = reference.differenceSweep(readers, dim=1, labels=strain)
+    """
+
+    def __init__(self, length, values, channels, file_path=None):
+        """ Create engine.
+        Args:
+            length - numpy array - baseline length grid
+            values - numpy array - baseline value columns with shape (channels, samples)
+            channels - list of strings - value column labels
+            file_path - string - baseline source path
+        """
+        self.length = np.asarray(length, dtype=np.float64)
+        self.values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        self.channels = list(channels)
+        self.file_path = file_path
+        self.resampler = ResampleCache(self.length)
+
+    @classmethod
+    def fromFile(cls, file_path, cache=None):
+        """ Use a sufix file as baseline, parsed once per process.
+        Args:
+            file_path - string
+            cache - OBRCache
+        Returns:
+            reference - ReferenceDifference
+        """
+        obr_file = loadReference(file_path, cache)
+        return cls(obr_file.data[0], obr_file.data[1:], obr_file.columns[1:], file_path)
+
+    @classmethod
+    def fromReader(cls, reader, dim=0):
+        """ Use a sufix file of a reader as baseline.
+        Args:
+            reader - LUNAOBRDataReader
+            dim - integer - index of the sufix in file_sufix_list
+        Returns:
+            reference - ReferenceDifference
+        """
+        read_dim = reader.getFileIndex(dim)
+        length, values = reader.getTrace(read_dim)
+        channels = reader.getColumns(read_dim)[1:values.shape[0] + 1]
+        return cls(length, values, channels, reader.getPathList()[dim])
+
+    def resample(self, length, values):
+        """ Resample value columns onto the baseline grid.
+        Args:
+            length - numpy array or UniformLength - measurement length
+            values - numpy array - shape (channels, samples)
+        Returns:
+            numpy array - shape (channels, baseline samples), NaN outside the measured length
+        """
+        if not isinstance(length, UniformLength):
+            length = np.asarray(length, dtype=np.float64)
+        values = np.atleast_2d(values)
+        if values.shape[0] != self.values.shape[0]:
+            raise ValueError('Measurement has {} value columns, the baseline has {}'.format(values.shape[0], self.values.shape[0]))
+        resampled = self.resampler.resample(length, values)
+        if length[0] > self.length[0] or length[-1] < self.length[-1]:
+            resampled = np.array(resampled, dtype=np.float64)
+            resampled[:, (self.length < length[0]) | (self.length > length[-1])] = np.nan
+        return resampled
+
+    def difference(self, length, values):
+        """ Subtract the baseline from one measurement.
+        Args:
+            length - numpy array - measurement length
+            values - numpy array - shape (channels, samples)
+        Returns:
+            numpy array - shape (channels, baseline samples)
+        """
+        return self.resample(length, values) - self.values
+
+    def differenceReader(self, reader, dim=0):
+        """ Subtract the baseline from a sufix file of a reader.
+        Args:
+            reader - LUNAOBRDataReader
+            dim - integer - index of the sufix in file_sufix_list
+        Returns:
+            numpy array - shape (channels, baseline samples)
+        """
+        return self.difference(*reader.getTrace(reader.getFileIndex(dim)))
+
+    def differenceSweep(self, readers, dim=0, labels=None, mmap_path=None):
+        """ Subtract the baseline from one sufix file of each reader.
+        Every measurement is resampled into one array and the baseline is subtracted
+        from all of them in a single broadcast operation.
+        Args:
+            readers - list of LUNAOBRDataReader - readers with the data already loaded
+            dim - integer - index of the sufix in each reader's file_sufix_list
+            labels - list of floats - strain, temperature... of each reader
+            mmap_path - string - if set, the differences are written to a memory-mapped '.npy' file
+        Returns:
+            sweep - SweepArray - differences on the baseline grid
+        """
+        # Readers only index the files that were read, so the sufix file is found by its path
+        read_dims = [reader.getFileIndex(dim) for reader in readers]
+        shape = (len(readers), self.length.size, len(self.channels))
+        if mmap_path is not None:
+            data = np.lib.format.open_memmap(mmap_path, mode='w+', dtype=np.float64, shape=shape)
+        else:
+            data = np.empty(shape, dtype=np.float64)
+
+        for i, (reader, read_dim) in enumerate(zip(readers, read_dims)):
+            data[i] = self.resample(*reader.getTrace(read_dim)).T
+        data -= self.values.T
+
+        if mmap_path is not None:
+            data.flush()
+        sufixes = [reader.file_sufix_list[dim] if reader.file_sufix_list else None for reader in readers]
+        paths = [reader.getPathList()[dim] for reader in readers]
+        return SweepArray(self.length, data, self.channels, labels, sufixes, paths)
+
+    def differenceResults(self, results, dim=0, labels=None, mmap_path=None):
+        """ Subtract the baseline from the successful results of sweepDir.
+        Args:
+            results - list of SweepResult
+            dim - integer - index of the sufix file in each reader
+            labels - list of floats - strain, temperature... of each result, in the same order
+            mmap_path - string - if set, the differences are written to a memory-mapped '.npy' file
+        Returns:
+            sweep - SweepArray
+        """
+        keep = [i for i, result in enumerate(results) if result.reader is not None]
+        if labels is not None:
+            labels = [labels[i] for i in keep]
+        return self.differenceSweep([results[i].reader for i in keep], dim, labels, mmap_path)
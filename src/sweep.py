@@ -0,0 +1,152 @@
+import os
+from .data_reader import LUNAOBRDataReader
+from .catalog import scanCampaign
+from .executors import getExecutor
+
+class SweepResult:
+    """ Result of reading one measurement of a sweep.
+    Attributes:
+        file_dir - string - measurement folder
+        file_prefix - string - measurement prefix
+        reader - LUNAOBRDataReader - reader with the parsed data, None if it failed or was not kept
+        errors - list of tuples - (path, message) for every file that could not be read
+        value - output of the analyse function of the sweep, None without one
+    """
+
+    def __init__(self, file_dir, file_prefix, reader=None, errors=None, value=None):
+        self.file_dir = file_dir
+        self.file_prefix = file_prefix
+        self.reader = reader
+        self.errors = errors if errors is not None else []
+        self.value = value
+
+    @property
+    def ok(self):
+        return (self.reader is not None or self.value is not None) and not self.errors
+
+    def __repr__(self):
+        return "SweepResult({!r}, {!r}, ok={})".format(self.file_dir, self.file_prefix, self.ok)
+
+def getSweepTasks(dir_name, file_sufix_list, file_order=None, is_numeric=False):
+    """ List every measurement below a directory in sweep order.
+    Args:
+        dir_name - string - campaign root, scanned recursively with scanCampaign
+        file_sufix_list - list of strings - e.g. ["Upper","Lower"], empty for single files
+        file_order - list of strings - prefix order, as in getFiles
+        is_numeric - bool - keep only files whose names begin with a number
+    Returns:
+        list of tuples - (file_dir, file_prefix)
+    """
+    return scanCampaign(dir_name, file_sufix_list or [], is_numeric, file_order).getTasks()
+
+def readMeasurement(file_dir, file_prefix, file_sufix_list, is_obr_file=True, cache=None, compact=False, analyse=None,
+                    keep_reader=True):
+    """ Read one measurement, collecting errors instead of raising.
+    Args:
+        file_dir - string
+        file_prefix - string
+        file_sufix_list - list of strings
+        is_obr_file - bool
+        cache - OBRCache
+        compact - bool - keep float32 values and a (start, step, count) length axis
+        analyse - callable - run on the reader, its output is stored in result.value
+        keep_reader - bool - keep the reader in the result, False keeps only result.value
+    Returns:
+        result - SweepResult
+    """
+    reader = LUNAOBRDataReader(file_dir, file_prefix, file_sufix_list, is_obr_file=is_obr_file, cache=cache,
+                               compact=compact)
+    try:
+        reader.readData(save_figure=False)
+    except Exception as e:
+        return SweepResult(file_dir, file_prefix, None, [(file_prefix, "{}: {}".format(type(e).__name__, e))])
+
+    if not reader.obr_files:
+        return SweepResult(file_dir, file_prefix, None, reader.errors)
+    result = SweepResult(file_dir, file_prefix, reader, list(reader.errors))
+    if analyse is not None:
+        try:
+            result.value = analyse(reader)
+        except Exception as e:
+            result.errors.append((file_prefix, "{}: {}".format(type(e).__name__, e)))
+    if not keep_reader:
+        result.reader = None
+    return result
+
+def _readBatch(batch, file_sufix_list, is_obr_file, cache, compact, analyse, keep_reader):
+    return [readMeasurement(file_dir, file_prefix, file_sufix_list, is_obr_file, cache, compact, analyse, keep_reader)
+            for file_dir, file_prefix in batch]
+
+def sweepTasks(tasks, file_sufix_list, is_obr_file=True, max_workers=None, cache=None, compact=False, executor=None,
+               batch_size=1, analyse=None, keep_reader=True, address=None):
+    """ Read a list of measurements on a process pool or another executor.
+    Work is partitioned per measurement prefix, batch_size prefixes per submitted task,
+    and the results are merged back in task order whatever order they finish in.
+    Args:
+        tasks - list of tuples - (file_dir, file_prefix), as returned by getSweepTasks
+        file_sufix_list - list of strings
+        is_obr_file - bool
+        max_workers - integer - number of worker processes, defaults to the number of CPUs; 1 reads serially
+        cache - OBRCache - shared parse cache
+        compact - bool - readers keep float32 values, which also halves what workers send back
+        executor - string or concurrent.futures.Executor - 'serial', 'thread', 'process', 'dask' or 'ray'
+                   (see getExecutor), or any executor with submit(); a named executor is shut down at
+                   the end, a given one is left open. Defaults to a process pool, or serial reads if
+                   max_workers is 1
+        batch_size - integer - prefixes per submitted task, larger batches lower the scheduling overhead
+        analyse - callable - run on each reader where it was read, e.g. a module-level function or a
+                  functools.partial of one; its output is stored in result.value
+        keep_reader - bool - send the readers back, False returns only result.value
+        address - string - scheduler or cluster address of a named 'dask' or 'ray' executor,
+                  None starts a local cluster
+    Returns:
+        results - list of SweepResult, in task order
+    """
+    if not tasks:
+        return []
+    if executor is None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(tasks)))
+        executor = 'serial' if max_workers == 1 else 'process'
+    owned = getExecutor(executor, max_workers, address) if isinstance(executor, str) else None
+    if owned is not None:
+        executor = owned
+
+    batch_size = max(1, batch_size)
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+    results = []
+    try:
+        futures = [executor.submit(_readBatch, batch, file_sufix_list, is_obr_file, cache, compact, analyse, keep_reader)
+                   for batch in batches]
+        # Collect in submission order so results are deterministic
+        for batch, future in zip(batches, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                results.extend(SweepResult(file_dir, file_prefix, None, [(file_prefix, "{}: {}".format(type(e).__name__, e))])
+                               for file_dir, file_prefix in batch)
+    finally:
+        if owned is not None:
+            owned.shutdown(wait=True)
+    return results
+
+def sweepDir(dir_name, file_sufix_list, file_order=None, is_numeric=False, is_obr_file=True, max_workers=None, cache=None,
+             compact=False, executor=None, batch_size=1, analyse=None, keep_reader=True, address=None):
+    """ Read every measurement below a directory on a process pool or another executor.
+    Args:
+        dir_name - string - campaign root, scanned recursively with scanCampaign
+        file_sufix_list - list of strings - e.g. ["Upper","Lower"], empty for single files
+        file_order - list of strings - prefix order, as in getFiles
+        is_numeric - bool - keep only files whose names begin with a number
+        is_obr_file - bool
+        max_workers - integer - number of worker processes, defaults to the number of CPUs; 1 reads serially
+        cache - OBRCache - shared parse cache
+        compact - bool - keep float32 values and a (start, step, count) length axis
+        executor, batch_size, analyse, keep_reader, address - see sweepTasks
+    Returns:
+        results - list of SweepResult, in folder order and then file order
+    """
+    tasks = getSweepTasks(dir_name, file_sufix_list, file_order, is_numeric)
+    return sweepTasks(tasks, file_sufix_list, is_obr_file, max_workers, cache, compact, executor, batch_size, analyse,
+                      keep_reader, address)
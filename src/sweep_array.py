@@ -0,0 +1,254 @@
+import numpy as np
+from .compact import UniformLength
+from .memo import hashArrays
+
+def resampleIndex(x, grid):
+    """ Precompute the linear interpolation of a length axis onto a grid.
+    Args:
+        x - numpy array or UniformLength - increasing source length
+        grid - numpy array or UniformLength - target length
+    Returns:
+        idx - numpy array - left sample of each grid point
+        weight - numpy array - weight of the right sample
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    if isinstance(x, UniformLength):
+        idx = np.clip(x.searchsorted(grid, side='right') - 1, 0, x.size - 2)
+        return idx, np.clip((grid - x[idx]) / x.step, 0.0, 1.0)
+    idx = np.clip(np.searchsorted(x, grid, side='right') - 1, 0, x.size - 2)
+    step = x[idx+1] - x[idx]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(step > 0, (grid - x[idx]) / step, 0.0)
+    return idx, np.clip(weight, 0.0, 1.0)
+
+def resample(values, idx, weight):
+    """ Apply a precomputed interpolation.
+    Args:
+        values - numpy array - shape (..., samples)
+        idx, weight - output of resampleIndex
+    Returns:
+        numpy array - shape (..., grid points)
+    """
+    return values[..., idx] * (1.0 - weight) + values[..., idx+1] * weight
+
+class ResampleCache:
+    """ Interpolation onto a fixed grid, with the weights computed once per distinct axis.
+    Traces exported with the same settings share the same axis, so a sweep usually
+    needs a single resampleIndex call.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid if isinstance(grid, UniformLength) else np.asarray(grid, dtype=np.float64)
+        self._cache = {}
+
+    @staticmethod
+    def _isSame(a, b):
+        if isinstance(a, UniformLength) or isinstance(b, UniformLength):
+            return isinstance(a, UniformLength) and a.equals(b)
+        return np.array_equal(a, b)
+
+    def getIndex(self, x):
+        """ Get the cached output of resampleIndex for a source axis.
+        Args:
+            x - numpy array - increasing source length
+        Returns:
+            idx, weight - numpy arrays
+        """
+        key = (x.size, x[0], x[-1])
+        if key not in self._cache or not self._isSame(self._cache[key][0], x):
+            self._cache[key] = (x, resampleIndex(x, self.grid))
+        return self._cache[key][1]
+
+    def resample(self, x, values):
+        """ Resample value columns onto the grid.
+        Args:
+            x - numpy array - source length
+            values - numpy array - shape (..., samples)
+        Returns:
+            numpy array - shape (..., grid points), values itself if x is the grid
+        """
+        if x.size == self.grid.size and self._isSame(x, self.grid):
+            return values
+        idx, weight = self.getIndex(x)
+        return resample(values, idx, weight)
+
+class SweepArray:
+    """ Measurements of a campaign aligned on a shared length grid.
+    Attributes:
+        length - numpy array - shared length grid with shape (length,), or UniformLength for compact sweeps
+        data - numpy array - shape (files, length, channels), may be memory-mapped; float32 for compact sweeps
+        channels - list of strings - value column labels
+        labels - numpy array - strain, temperature... of each file, or None
+        sufixes - list of strings - sufix of each file (Upper, Lower...)
+        paths - list of strings - source path of each file
+    """
+
+    def __init__(self, length, data, channels, labels=None, sufixes=None, paths=None):
+        self.length = length
+        self.data = data
+        self.channels = channels
+        self.labels = None if labels is None else np.asarray(labels, dtype=np.float64)
+        self.sufixes = sufixes if sufixes is not None else [None] * data.shape[0]
+        self.paths = paths if paths is not None else [None] * data.shape[0]
+        self._hash = None
+
+    @classmethod
+    def fromReaders(cls, readers, dim=0, labels=None, length=None, mmap_path=None, compact=False):
+        """ Stack one sufix file of each reader.
+        Args:
+            readers - list of LUNAOBRDataReader - readers with the data already loaded
+            dim - integer - index of the sufix in each reader's file_sufix_list
+            labels - list of floats - strain, temperature... of each reader
+            length - numpy array - target grid, defaults to the first trace over the range covered by all traces
+            mmap_path - string - if set, data is written to a memory-mapped '.npy' file
+            compact - bool - store float32 data and, if uniform, the grid as a UniformLength
+        Returns:
+            sweep - SweepArray, a ValueError is raised if a reader failed to read the sufix file
+        """
+        if not readers:
+            raise ValueError('No measurements to stack')
+        # Readers only index the files that were read, so the sufix file is found by its path
+        paths = [reader.getPathList()[dim] for reader in readers]
+        read_dims = [reader.getFileIndex(dim) for reader in readers]
+
+        traces = [reader.getTrace(i) for reader, i in zip(readers, read_dims)]
+        # Paired-column traces hold only their first block, so labels are cut to the traces
+        channels = list(readers[0].getColumns(read_dims[0])[1:traces[0][1].shape[0] + 1])
+
+        if length is None:
+            x_min = max(trace[0][0] for trace in traces)
+            x_max = min(trace[0][-1] for trace in traces)
+            first = traces[0][0]
+            if isinstance(first, UniformLength):
+                length = first[int(first.searchsorted(x_min, 'left')):int(first.searchsorted(x_max, 'right'))]
+            else:
+                length = first[(first >= x_min) & (first <= x_max)]
+        if compact and not isinstance(length, UniformLength):
+            axis = UniformLength.fromArray(length)
+            length = axis if axis is not None else np.asarray(length, dtype=np.float64)
+        elif not compact:
+            length = np.asarray(length, dtype=np.float64)
+
+        dtype = np.float32 if compact else np.float64
+        shape = (len(traces), length.size, len(channels))
+        if mmap_path is not None:
+            data = np.lib.format.open_memmap(mmap_path, mode='w+', dtype=dtype, shape=shape)
+        else:
+            data = np.empty(shape, dtype=dtype)
+
+        resampler = ResampleCache(length)
+        for i, (x, values) in enumerate(traces):
+            data[i] = resampler.resample(x, values).T
+
+        sufixes = [reader.file_sufix_list[dim] if reader.file_sufix_list else None for reader in readers]
+        sweep = cls(length, data, channels, labels, sufixes, paths)
+        if len(channels) == 1:
+            # Reader hashes cover the length and first value column, which is then all the
+            # sweep is resampled from, so the sweep data is never hashed again
+            hashes = [reader.getContentHash(i) for reader, i in zip(readers, read_dims)]
+            if None not in hashes:
+                sweep._hash = hashArrays(*(hashes + [length, str(dtype)]))
+        return sweep
+
+    @classmethod
+    def fromResults(cls, results, dim=0, labels=None, length=None, mmap_path=None, compact=False):
+        """ Stack the successful results of sweepDir.
+        Args:
+            results - list of SweepResult
+            dim - integer - index of the sufix file in each reader
+            labels - list of floats - strain, temperature... of each result, in the same order
+            length - numpy array - target grid
+            mmap_path - string - if set, data is written to a memory-mapped '.npy' file
+            compact - bool - see fromReaders
+        Returns:
+            sweep - SweepArray
+        """
+        keep = [i for i, result in enumerate(results) if result.reader is not None]
+        if labels is not None:
+            labels = [labels[i] for i in keep]
+        return cls.fromReaders([results[i].reader for i in keep], dim, labels, length, mmap_path, compact)
+
+    @classmethod
+    def load(cls, mmap_path, length, channels, labels=None, sufixes=None, paths=None):
+        """ Open data previously written with mmap_path without reading it into memory. """
+        return cls(length, np.load(mmap_path, mmap_mode='r'), channels, labels, sufixes, paths)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def getContentHash(self):
+        """ Get a content hash of the length grid and data, computed once per sweep. Sweeps
+        stacked from readers reuse the reader hashes instead of hashing their data.
+        Returns:
+            string - hex digest
+        """
+        if self._hash is None:
+            self._hash = hashArrays(self.length, self.data)
+        return self._hash
+
+    def getChannel(self, channel=0):
+        """ Get one value column of every file.
+        Args:
+            channel - integer or string - column index or label
+        Returns:
+            numpy array - shape (files, length)
+        """
+        if isinstance(channel, str):
+            channel = self.channels.index(channel)
+        return self.data[:, :, channel]
+
+    def select(self, sufix=None, mask=None):
+        """ Get a sub-sweep.
+        Args:
+            sufix - string - keep files with this sufix
+            mask - list of bools or integers - files to keep
+        Returns:
+            sweep - SweepArray
+        """
+        keep = np.arange(len(self))
+        if mask is not None:
+            keep = keep[np.asarray(mask)]
+        if sufix is not None:
+            keep = np.array([i for i in keep if self.sufixes[i] == sufix], dtype=int)
+        labels = None if self.labels is None else self.labels[keep]
+        return SweepArray(self.length, self.data[keep], self.channels, labels,
+                          [self.sufixes[i] for i in keep], [self.paths[i] for i in keep])
+
+    def mean(self, channel=0):
+        """ Average trace over all files.
+        Returns:
+            numpy array - shape (length,)
+        """
+        return self.getChannel(channel).mean(axis=0)
+
+    def difference(self, reference=0, channel=0):
+        """ Subtract a reference file from every file.
+        Args:
+            reference - integer - index of the reference file
+            channel - integer or string
+        Returns:
+            numpy array - shape (files, length)
+        """
+        values = self.getChannel(channel)
+        return values - values[reference]
+
+    def fit(self, deg=1, channel=0, labels=None):
+        """ Fit each length sample against the file labels, e.g. spectral shift vs strain.
+        Args:
+            deg - integer - polynomial degree
+            channel - integer or string
+            labels - list of floats - defaults to self.labels
+        Returns:
+            coef - numpy array - shape (deg + 1, length), highest degree first
+            residuals - numpy array - sum of squared residuals with shape (length,)
+        """
+        labels = self.labels if labels is None else np.asarray(labels, dtype=np.float64)
+        if labels is None:
+            raise ValueError('Sweep labels are required for fitting')
+        values = self.getChannel(channel)
+        coef = np.polyfit(labels, values, deg)
+        residuals = values - np.vander(labels, deg + 1) @ coef
+        return coef, np.sum(residuals**2, axis=0)
+
+    def __repr__(self):
+        return "SweepArray(files={}, length={}, channels={})".format(len(self), self.length.size, self.channels)
@@ -0,0 +1,124 @@
+import numpy as np
+import os
+
+OBR_COLUMNS = ['Spectral Shift (GHz)', 'Shift Quality', 'Spectral Shift (GHz)', 'Shift Quality']
+
+def getSyntheticHeader(date='2024-01-01 12:00:00', resolution=0.01, gauge_length=0.02, sensor_spacing=0.01, n_lines=13):
+    """ Build a header block like the one of an OBR 4600 text export.
+    Args:
+        date - string
+        resolution, gauge_length, sensor_spacing - float - in meters
+        n_lines - integer - number of header lines, padded with instrument settings
+    Returns:
+        header - list of strings
+    """
+    header = ['OBR 4600 Text Output',
+              'Measurement Date:\t' + date,
+              'Resolution (m):\t{}'.format(resolution),
+              'Gauge Length (m):\t{}'.format(gauge_length),
+              'Sensor Spacing (m):\t{}'.format(sensor_spacing)]
+    header += ['Setting {}:\t{}'.format(i, i) for i in range(n_lines - len(header) - 1)]
+    return header + ['']
+
+def getSyntheticTrace(n_samples=100000, n_columns=2, start=0.0, step=0.00125, strain=0.0, sensitivity=-0.15,
+                      region=(0.4, 0.6), noise=0.02, seed=None):
+    """ Generate the data block of a distributed strain measurement.
+    A uniform strain is applied over a region of the fiber, shifting the spectrum there;
+    everywhere else the shift is noise around zero.
+    Args:
+        n_samples - integer - trace length
+        n_columns - integer - value columns after the length, alternating shift and quality
+        start, step - float - length axis, in meters
+        strain - float - applied microstrain
+        sensitivity - float - spectral shift per microstrain, in GHz
+        region - tuple - strained region as fractions of the trace
+        noise - float - shift noise standard deviation, in GHz
+        seed - integer - random seed
+    Returns:
+        data - numpy array - shape (samples, 1 + n_columns)
+    """
+    rng = np.random.default_rng(seed)
+    data = np.empty((n_samples, 1 + n_columns))
+    data[:,0] = start + step * np.arange(n_samples)
+    strained = np.zeros(n_samples, dtype=bool)
+    strained[int(region[0] * n_samples):int(region[1] * n_samples)] = True
+    for col in range(1, n_columns + 1):
+        if col % 2:
+            data[:,col] = np.where(strained, strain * sensitivity, 0.0) + rng.normal(0.0, noise, n_samples)
+        else:
+            data[:,col] = np.clip(rng.normal(0.9, 0.05, n_samples), 0.0, 1.0)
+    return data
+
+def writeOBRFile(file_path, n_samples=100000, n_columns=2, header=None, **kwargs):
+    """ Write a synthetic OBR 4600 text export.
+    Args:
+        file_path - string
+        n_samples - integer - trace length
+        n_columns - integer - value columns after the length
+        header - list of strings - header lines, see getSyntheticHeader
+        kwargs - passed to getSyntheticTrace
+    Returns:
+        file_path - string
+    """
+    if header is None:
+        header = getSyntheticHeader()
+    labels = ['Length (m)'] + [OBR_COLUMNS[i % len(OBR_COLUMNS)] for i in range(n_columns)]
+    data = getSyntheticTrace(n_samples, n_columns, **kwargs)
+    with open(file_path, 'w', encoding='latin-1') as f:
+        f.write('\n'.join(header) + '\n')
+        # The instrument ends every line with a tab
+        f.write('\t'.join(labels) + '\t\n')
+        np.savetxt(f, data, fmt='%.6f', delimiter='\t', newline='\t\n')
+    return file_path
+
+def writeSyntheticSweep(file_dir, labels=(0, 100, 200, 300, 400, 500), file_sufix_list=('Upper', 'Lower'),
+                        n_samples=100000, n_columns=2, seed=0, **kwargs):
+    """ Write a strain sweep, one '<label>_<sufix>.txt' file per strain and sufix.
+    Args:
+        file_dir - string - created if needed
+        labels - list - applied microstrain of each measurement, also used as file prefix
+        file_sufix_list - list of strings - one file per sufix, e.g. Upper and Lower fibers
+        n_samples, n_columns - integer - trace shape
+        seed - integer - random seed of the first file
+        kwargs - passed to getSyntheticTrace
+    Returns:
+        path_list - list of strings
+    """
+    os.makedirs(file_dir, exist_ok=True)
+    path_list = []
+    for i, label in enumerate(labels):
+        for j, file_sufix in enumerate(file_sufix_list):
+            # Fibers on opposite faces see strain with opposite signs
+            strain = label if j % 2 == 0 else -label
+            file_path = os.path.join(file_dir, '{}_{}.txt'.format(label, file_sufix))
+            path_list.append(writeOBRFile(file_path, n_samples, n_columns, strain=strain,
+                                          seed=seed + i * len(file_sufix_list) + j, **kwargs))
+    return path_list
+
+def writePairedFile(file_path, block_sizes=(300, 500, 400), header=None, seed=None):
+    """ Write a synthetic paired-column export: (x, y) column pairs of different lengths,
+    shorter pairs left blank below their last sample, as read with is_obr_file=False.
+    Args:
+        file_path - string
+        block_sizes - list of integers - samples of each pair
+        header - list of strings - header lines, see getSyntheticHeader
+        seed - integer - random seed
+    Returns:
+        file_path - string
+    """
+    if header is None:
+        header = getSyntheticHeader()
+    rng = np.random.default_rng(seed)
+    blocks = [(np.linspace(0.0, 1.0, n), rng.normal(0.0, 1.0, n)) for n in block_sizes]
+    labels = []
+    for i in range(len(blocks)):
+        labels += ['Length {} (m)'.format(i), 'Spectral Shift {} (GHz)'.format(i)]
+    with open(file_path, 'w', encoding='latin-1') as f:
+        f.write('\n'.join(header) + '\n')
+        f.write('\t'.join(labels) + '\t\n')
+        for row in range(max(block_sizes)):
+            fields = []
+            for x, y in blocks:
+                fields += ['{:.6f}'.format(x[row]), '{:.6f}'.format(y[row])] if row < x.size else ['', '']
+            f.write('\t'.join(fields) + '\t\n')
+    return file_path
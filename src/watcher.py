@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import time
+from .sweep import getSweepTasks, readMeasurement
+from .data_reader import LUNAOBRDataReader
+from .catalog import getFolderTree
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+class OBRWatcher:
+    """ Process new OBR exports as the instrument writes them.
+    A JSON manifest keeps the size and mtime of every processed file, so only new or
+    changed measurements are read, also across restarts. A file is read once its size
+    and mtime have not changed for settle_time seconds. Folder changes are waited for
+    with inotify when the optional 'inotify_simple' package is installed, otherwise
+    the folders are polled.
+    Usage:
+        watcher = OBRWatcher(dir_name, ["Upper","Lower"], on_measurement=callback)
+        watcher.run()
+    """
+
+    def __init__(self, dir_name, file_sufix_list, manifest_path=None, is_numeric=False, is_obr_file=True,
+                 cache=None, settle_time=2.0, poll_interval=1.0, on_measurement=None):
+        """ Create watcher.
+        Args:
+            dir_name - string - campaign root, scanned recursively with scanCampaign
+            file_sufix_list - list of strings - e.g. ["Upper","Lower"], empty for single files
+            manifest_path - string - defaults to '.obr_manifest.json' in dir_name
+            is_numeric - bool - keep only files whose names begin with a number
+            is_obr_file - bool
+            cache - OBRCache
+            settle_time - float - seconds a file must stay unchanged before it is read
+            poll_interval - float - seconds between scans
+            on_measurement - callable - called with the SweepResult of each new measurement
+        """
+        self.dir_name = dir_name
+        self.file_sufix_list = file_sufix_list
+        self.manifest_path = manifest_path or os.path.join(dir_name, '.obr_manifest.json')
+        self.is_numeric = is_numeric
+        self.is_obr_file = is_obr_file
+        self.cache = cache
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.callbacks = [on_measurement] if on_measurement is not None else []
+        self.manifest = self._loadManifest()
+        self._pending = {}
+        # Stats each ready file was found settled with, recorded once it has been read
+        self._settled = {}
+        self._inotify = INotify() if INotify is not None else None
+        self._watched = set()
+
+    def addCallback(self, callback):
+        """ Call a function with the SweepResult of each new measurement. """
+        self.callbacks.append(callback)
+
+    def _loadManifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _saveManifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logging.error('Unable to save manifest ' + self.manifest_path + ': ' + str(e))
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        return [st.st_size, st.st_mtime_ns]
+
+    def _isReady(self, path, stat, now):
+        """ Check that a file stopped changing at least settle_time ago. """
+        pending = self._pending.get(path)
+        if pending is None or pending[0] != stat:
+            self._pending[path] = (stat, now)
+            return self.settle_time <= 0
+        return now - pending[1] >= self.settle_time
+
+    def getReadyMeasurements(self):
+        """ List new or changed measurements whose files are completely written.
+        Returns:
+            list of tuples - (file_dir, file_prefix)
+        """
+        ready = []
+        now = time.monotonic()
+        for file_dir, file_prefix in getSweepTasks(self.dir_name, self.file_sufix_list, is_numeric=self.is_numeric):
+            path_list = LUNAOBRDataReader(file_dir, file_prefix, self.file_sufix_list).getPathList()
+            stats = [self._stat(path) for path in path_list]
+            # Wait until every sufix file of the measurement exists
+            if any(stat is None for stat in stats):
+                continue
+            if all(self.manifest.get(path) == stat for path, stat in zip(path_list, stats)):
+                continue
+            if all([self._isReady(path, stat, now) for path, stat in zip(path_list, stats)]):
+                self._settled.update(zip(path_list, stats))
+                ready.append((file_dir, file_prefix))
+        return ready
+
+    def processOnce(self):
+        """ Read every ready measurement and run the callbacks.
+        Returns:
+            results - list of SweepResult
+        """
+        results = []
+        for file_dir, file_prefix in self.getReadyMeasurements():
+            result = readMeasurement(file_dir, file_prefix, self.file_sufix_list, self.is_obr_file, self.cache)
+            results.append(result)
+            # A file rewritten during the read keeps the settled stat, so it is read again
+            for path in LUNAOBRDataReader(file_dir, file_prefix, self.file_sufix_list).getPathList():
+                self.manifest[path] = self._settled.pop(path, None)
+                self._pending.pop(path, None)
+            for callback in self.callbacks:
+                try:
+                    callback(result)
+                except Exception as e:
+                    logging.error('Watcher callback failed for ' + file_prefix + ': ' + str(e))
+        if results:
+            self._saveManifest()
+        return results
+
+    def _wait(self):
+        """ Sleep until a folder changes or poll_interval elapses. """
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            return
+
+        mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+        for folder in getFolderTree(self.dir_name):
+            if folder not in self._watched:
+                try:
+                    self._inotify.add_watch(folder, mask)
+                    self._watched.add(folder)
+                except OSError:
+                    pass
+        self._inotify.read(timeout=int(self.poll_interval * 1000))
+
+    def run(self, timeout=None):
+        """ Process measurements until timeout, or forever.
+        Results are only handed to the callbacks, not kept, so memory stays bounded
+        however long the watch runs.
+        Args:
+            timeout - float - seconds, None to run until interrupted
+        Returns:
+            integer - number of measurements processed
+        """
+        n_processed = 0
+        start = time.monotonic()
+        try:
+            while timeout is None or time.monotonic() - start < timeout:
+                n_processed += len(self.processOnce())
+                self._wait()
+        except KeyboardInterrupt:
+            pass
+        return n_processed
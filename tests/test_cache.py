@@ -0,0 +1,65 @@
+import numpy as np
+from src.cache import OBRCache
+from src.data_reader import LUNAOBRDataReader
+from src.obr_parser import parseOBRFile
+from src.synthetic import writeSyntheticSweep
+
+def readSweep(file_dir, cache=None, **kwargs):
+    reader = LUNAOBRDataReader(str(file_dir), '0', ['Upper', 'Lower'], cache=cache, **kwargs)
+    reader.readData(save_figure=False)
+    return reader
+
+def makeSweep(tmp_path, labels=(0,)):
+    writeSyntheticSweep(str(tmp_path / 'data'), labels=labels, n_samples=500)
+    return tmp_path / 'data'
+
+def test_cached_reader_matches_eager(tmp_path):
+    file_dir = makeSweep(tmp_path)
+    cache = OBRCache(str(tmp_path / 'cache'))
+    eager = readSweep(file_dir)
+    stored, loaded = readSweep(file_dir, cache), readSweep(file_dir, cache)
+    for dim in range(2):
+        assert isinstance(loaded.obr_files[dim].data, np.memmap)
+        for reader in [stored, loaded]:
+            np.testing.assert_array_equal(reader.df[dim].to_numpy(), eager.df[dim].to_numpy())
+            assert list(reader.getColumns(dim)) == list(eager.getColumns(dim))
+            assert reader.getMeanMeasurement(0.2, 0.3, dim) == eager.getMeanMeasurement(0.2, 0.3, dim)
+
+def test_options_are_part_of_the_key(tmp_path):
+    file_dir = makeSweep(tmp_path)
+    cache = OBRCache(str(tmp_path / 'cache'))
+    readSweep(file_dir, cache)
+    assert len(cache._entries()) == 2
+    compact = readSweep(file_dir, cache, compact=True)
+    assert len(cache._entries()) == 4
+    path = compact.getPathList()[0]
+    assert cache.load(path, compact.getCacheOptions()) is not None
+    assert cache.load(path) is None
+
+def test_changed_file_misses(tmp_path):
+    file_dir = makeSweep(tmp_path)
+    cache = OBRCache(str(tmp_path / 'cache'))
+    path = str(file_dir / '0_Upper.txt')
+    cache.store(parseOBRFile(path))
+    assert cache.load(path) is not None
+    writeSyntheticSweep(str(file_dir), labels=(0,), n_samples=600)
+    assert cache.load(path) is None
+
+def test_eviction_keeps_the_size_limit(tmp_path):
+    file_dir = makeSweep(tmp_path, labels=(0, 100, 200))
+    paths = sorted(str(path) for path in file_dir.iterdir())
+    cache = OBRCache(str(tmp_path / 'cache'))
+    cache.store(parseOBRFile(paths[0]))
+    entry_size = cache.size()
+    cache.max_bytes = int(3.5 * entry_size)
+    for path in paths[1:]:
+        cache.store(parseOBRFile(path))
+        assert cache._size == cache.size() <= cache.max_bytes
+    assert len(cache._entries()) == 3
+    # The most recently stored files are kept
+    assert cache.load(paths[-1]) is not None
+    assert cache.load(paths[0]) is None
+
+    cache.clear()
+    assert cache.size() == 0
+    assert cache.load(paths[-1]) is None
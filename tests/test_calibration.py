@@ -0,0 +1,34 @@
+import numpy as np
+from src.calibration import getShiftMatrix
+from src.length_index import LengthIndex
+from src.sweep_array import SweepArray
+from src.compact import UniformLength
+
+def makeSweep():
+    length = np.arange(100) * 0.01
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(3, length.size, 1))
+    data[1, 10, 0] = np.nan
+    return SweepArray(length, data, ['Spectral Shift (GHz)'])
+
+def test_window_means_skip_nan_outside_window():
+    sweep = makeSweep()
+    windows = [[0.05, 0.15], [0.5, 0.6], [0.8, 0.95]]
+    shift = getShiftMatrix(sweep, windows=windows)
+    for i in range(sweep.data.shape[0]):
+        index = LengthIndex(sweep.length, sweep.getChannel(0)[i:i + 1])
+        expected = index.mean(np.array(windows)[:, 0], np.array(windows)[:, 1])
+        np.testing.assert_allclose(shift[i], expected, rtol=1e-12)
+
+def test_window_with_nan_is_nan():
+    shift = getShiftMatrix(makeSweep(), windows=[[0.05, 0.15], [0.5, 0.6]])
+    assert np.isnan(shift[1, 0])
+    assert not np.isnan(shift[1, 1])
+    assert not np.isnan(shift[[0, 2]]).any()
+
+def test_compact_sweep_matches_float64():
+    sweep = makeSweep()
+    compact = SweepArray(UniformLength.fromArray(sweep.length), sweep.data.astype(np.float32), sweep.channels)
+    windows = [[0.05, 0.15], [0.5, 0.6]]
+    np.testing.assert_allclose(getShiftMatrix(compact, [0.33], windows), getShiftMatrix(sweep, [0.33], windows),
+                               atol=1e-6)
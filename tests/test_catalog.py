@@ -0,0 +1,58 @@
+import os
+import pytest
+from src.catalog import scanCampaign, naturalKey, getFolderTree
+from src.data_reader import LUNAOBRDataReader, getFolders, getFiles, sortFiles
+from src.synthetic import writeSyntheticSweep, writeOBRFile
+
+LABELS = (0, 100, 500, 1000)
+SUFIXES = ['Upper', 'Lower']
+
+@pytest.fixture
+def campaign(tmp_path):
+    for folder in ['strain', 'temperature']:
+        writeSyntheticSweep(str(tmp_path / folder), labels=LABELS, n_samples=20)
+    return str(tmp_path)
+
+def getLegacyTasks(dir_name, file_order=None):
+    return [(file_dir, file_prefix) for file_dir in getFolders(dir_name)
+            for file_prefix in getFiles(file_dir, file_order=file_order)]
+
+def test_tasks_match_folder_listing(campaign):
+    catalog = scanCampaign(campaign, SUFIXES)
+    assert catalog.getTasks() == getLegacyTasks(campaign)
+    assert catalog.folders() == getFolders(campaign)
+    assert getFolderTree(campaign) == [campaign] + getFolders(campaign)
+    for measurement in catalog:
+        reader = LUNAOBRDataReader(measurement.file_dir, measurement.file_prefix, SUFIXES)
+        assert measurement.paths == reader.getPathList()
+        assert measurement.sufixes == SUFIXES
+
+def test_file_order_matches_sort_files(campaign):
+    file_order = ['500', '0', '42', '1000']
+    catalog = scanCampaign(campaign, SUFIXES, file_order=file_order)
+    assert catalog.getTasks() == getLegacyTasks(campaign, file_order)
+    assert [m.file_prefix for m in catalog.groupByFolder()[getFolders(campaign)[0]]] == \
+        sortFiles([str(label) for label in LABELS], file_order)
+
+def test_natural_sort(campaign):
+    catalog = scanCampaign(campaign, SUFIXES, natural_sort=True)
+    assert [m.file_prefix for m in catalog][:len(LABELS)] == [str(label) for label in LABELS]
+    assert sorted(['b10', 'b9', 'a2.5', 'a10'], key=naturalKey) == ['a2.5', 'a10', 'b9', 'b10']
+
+def test_incomplete_measurements(campaign):
+    os.remove(os.path.join(campaign, 'strain', '500_Lower.txt'))
+    catalog = scanCampaign(campaign, SUFIXES)
+    measurement = [m for m in catalog if m.file_prefix == '500'][0]
+    assert measurement.sufixes == ['Upper']
+    assert measurement.getPath('Lower') is None
+    complete = catalog.complete(SUFIXES)
+    assert len(complete) == len(catalog) - 1
+    assert measurement not in list(complete)
+
+def test_prefixes_with_underscores(tmp_path):
+    for prefix in ['run_1', 'run_2']:
+        for sufix in SUFIXES:
+            writeOBRFile(str(tmp_path / '{}_{}.txt'.format(prefix, sufix)), 20)
+    assert scanCampaign(str(tmp_path), SUFIXES).getTasks() == [(str(tmp_path), 'run_1'), (str(tmp_path), 'run_2')]
+    # Without sufixes files are grouped on the first '_', as getFiles does
+    assert scanCampaign(str(tmp_path)).getTasks() == [(str(tmp_path), prefix) for prefix in getFiles(str(tmp_path))]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from src.data_reader import LUNAOBRDataReader
+from src.synthetic import writePairedFile
+
+BLOCK_SIZES = (30, 50, 40)
+
+def readPaired(file_dir, lazy):
+    reader = LUNAOBRDataReader(str(file_dir), 'paired', [], is_obr_file=False, lazy=lazy)
+    reader.readData(save_figure=False)
+    return reader
+
+@pytest.fixture
+def paired_dir(tmp_path):
+    writePairedFile(str(tmp_path / 'paired.txt'), BLOCK_SIZES, seed=1)
+    return tmp_path
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_blocks_have_their_own_length(paired_dir, lazy):
+    reader = readPaired(paired_dir, lazy)
+    assert [len(block) for block in reader.getBlocks()] == list(BLOCK_SIZES)
+    for col in range(2 * len(BLOCK_SIZES)):
+        column = reader.getColumn(col)
+        assert column.size == BLOCK_SIZES[col // 2]
+        assert not np.isnan(column).any()
+
+def test_lazy_matches_eager(paired_dir):
+    eager, lazy = readPaired(paired_dir, False), readPaired(paired_dir, True)
+    assert list(lazy.getColumns()) == list(eager.getColumns())
+    for minlim, maxlim in [(0.2, 0.6), (0.0, 1.0), (0.95, 1.0)]:
+        assert lazy.getMeanMeasurement(minlim, maxlim) == eager.getMeanMeasurement(minlim, maxlim)
+    np.testing.assert_array_equal(lazy.getSingleMeasurement([0.1, 0.5]), eager.getSingleMeasurement([0.1, 0.5]))
+    assert lazy.getContentHash() == eager.getContentHash()
+
+def test_mean_matches_block(paired_dir):
+    reader = readPaired(paired_dir, False)
+    block = reader.getBlocks()[0]
+    x, y = block.window(0.2, 0.6)
+    assert reader.getMeanMeasurement(0.2, 0.6) == pytest.approx(y.mean())
+    assert block.mean(0.2, 0.6) == reader.getMeanMeasurement(0.2, 0.6)
+
+def test_dataframe_only_built_on_request(paired_dir):
+    reader = readPaired(paired_dir, False)
+    reader.getMeanMeasurement(0.2, 0.6)
+    reader.getPyramid()
+    assert not reader.df.isLoaded(0)
+    df = reader.df[0]
+    assert df.shape == (max(BLOCK_SIZES), 2 * len(BLOCK_SIZES))
+    assert np.isnan(df.iloc[BLOCK_SIZES[0]:, 0]).all()
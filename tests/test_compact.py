@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from src.compact import UniformLength, CompactTrace
+from src.data_reader import LUNAOBRDataReader
+from src.sweep_array import SweepArray
+from src.synthetic import writeSyntheticSweep
+
+WINDOWS = [(0.1013, 0.2021), (0.2507, 0.3499)]
+
+def readSweep(file_dir, prefix, compact):
+    reader = LUNAOBRDataReader(str(file_dir), prefix, ['Upper', 'Lower'], compact=compact)
+    reader.readData(save_figure=False)
+    return reader
+
+@pytest.fixture
+def sweep_dir(tmp_path):
+    writeSyntheticSweep(str(tmp_path), labels=(0, 100), n_samples=500)
+    return tmp_path
+
+def test_compact_reader_matches_eager(sweep_dir):
+    eager, compact = readSweep(sweep_dir, '0', False), readSweep(sweep_dir, '0', True)
+    assert isinstance(compact.obr_files[0], CompactTrace)
+    assert isinstance(compact.obr_files[0].length, UniformLength)
+    assert compact.obr_files[0].values.dtype == np.float32
+    for dim in range(2):
+        assert list(compact.getColumns(dim)) == list(eager.getColumns(dim))
+        np.testing.assert_allclose(compact.getColumn(0, dim), eager.getColumn(0, dim), atol=1e-9)
+        np.testing.assert_allclose(compact.getColumn(1, dim), eager.getColumn(1, dim), atol=1e-6)
+        for minlim, maxlim in WINDOWS:
+            assert compact.getMeanMeasurement(minlim, maxlim, dim) == pytest.approx(
+                eager.getMeanMeasurement(minlim, maxlim, dim), abs=1e-6)
+        np.testing.assert_allclose(compact.getSingleMeasurement([0.1013, 0.3001], dim),
+                                   eager.getSingleMeasurement([0.1013, 0.3001], dim), atol=1e-6)
+        errors = compact.getCompactError(dim)
+        assert set(errors) == set(eager.getColumns(dim))
+        assert max(errors.values()) < 1e-6
+    assert eager.getCompactError() is None
+    # The dataframe is only built on request
+    assert not compact.df.isLoaded(0)
+
+def test_compact_sweep_matches_eager(sweep_dir):
+    eager = [readSweep(sweep_dir, prefix, False) for prefix in ['0', '100']]
+    compact = [readSweep(sweep_dir, prefix, True) for prefix in ['0', '100']]
+    sweep = SweepArray.fromReaders(eager, dim=1, labels=[0, 100])
+    compact_sweep = SweepArray.fromReaders(compact, dim=1, labels=[0, 100], compact=True)
+    assert compact_sweep.data.dtype == np.float32
+    assert compact_sweep.channels == sweep.channels
+    np.testing.assert_allclose(np.asarray(compact_sweep.length), sweep.length, atol=1e-9)
+    np.testing.assert_allclose(compact_sweep.data, sweep.data, atol=1e-6)
+
+def test_uniform_length_matches_array():
+    length = 0.5 + 0.00125 * np.arange(1000)
+    axis = UniformLength.fromArray(length)
+    np.testing.assert_allclose(np.asarray(axis), length, atol=1e-12)
+    np.testing.assert_allclose(np.asarray(axis[10:500:3]), length[10:500:3], atol=1e-12)
+    assert axis[-1] == pytest.approx(length[-1])
+
+    x = np.array([0.5, 0.5011, 0.9, 1.7, 1.74875])
+    np.testing.assert_array_equal(axis.nearest(x), np.abs(length[:, None] - x).argmin(axis=0))
+    for side in ['left', 'right']:
+        np.testing.assert_array_equal(axis.searchsorted(x + 1e-4, side), np.searchsorted(length, x + 1e-4, side))
+    values = np.sin(length)
+    np.testing.assert_allclose(axis.interpolate(x, values), np.interp(x, length, values), atol=1e-12)
+    with pytest.raises(ValueError):
+        axis.interpolate([2.0], values)
+
+def test_non_uniform_length_is_kept():
+    length = np.cumsum(np.linspace(1.0, 2.0, 100))
+    assert UniformLength.fromArray(length) is None
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from src.calibration import calibrate
+from src.data_reader import LUNAOBRDataReader
+from src.export import exportSweep, importSweep, importHeaders, importCalibration
+from src.sweep_array import SweepArray
+from src.synthetic import writeSyntheticSweep
+
+LABELS = (0, 100, 200, 300)
+WINDOWS = [[0.2, 0.3], [0.5, 0.6]]
+
+def readSweep(file_dir, compact=False):
+    readers = []
+    for label in LABELS:
+        reader = LUNAOBRDataReader(str(file_dir), str(label), ['Upper', 'Lower'], compact=compact)
+        reader.readData(save_figure=False)
+        readers.append(reader)
+    return readers
+
+@pytest.fixture
+def sweep_dir(tmp_path):
+    writeSyntheticSweep(str(tmp_path / 'data'), labels=LABELS, n_samples=600)
+    return tmp_path / 'data'
+
+def assertSweepEqual(sweep, expected):
+    np.testing.assert_array_equal(np.asarray(sweep.length), np.asarray(expected.length))
+    np.testing.assert_array_equal(sweep.data, expected.data)
+    assert sweep.data.dtype == expected.data.dtype
+    assert sweep.channels == list(expected.channels)
+    np.testing.assert_array_equal(sweep.labels, expected.labels)
+    assert sweep.sufixes == expected.sufixes
+    assert sweep.paths == expected.paths
+
+def test_round_trip_matches_eager_readers(sweep_dir, tmp_path):
+    readers = readSweep(sweep_dir)
+    sweep = SweepArray.fromReaders(readers, dim=1, labels=LABELS)
+    calibration = calibrate(sweep, windows=WINDOWS)
+    exportSweep(str(tmp_path / 'sweep.h5'), sweep, calibration, chunk_length=128)
+
+    imported = importSweep(str(tmp_path / 'sweep.h5'))
+    assertSweepEqual(imported, sweep)
+    assert imported.paths == [reader.getPathList()[1] for reader in readers]
+    np.testing.assert_array_equal(imported.getChannel(0)[0], readers[0].getColumn(1, 1))
+    assert importHeaders(str(tmp_path / 'sweep.h5')) == [reader.obr_files[1].header for reader in readers]
+
+    imported_calibration = importCalibration(str(tmp_path / 'sweep.h5'))
+    assert imported_calibration.points == list(calibration.points)
+    for name in ['labels', 'shift', 'coef', 'residuals']:
+        np.testing.assert_array_equal(getattr(imported_calibration, name), getattr(calibration, name))
+
+def test_partial_reads(sweep_dir, tmp_path):
+    sweep = SweepArray.fromReaders(readSweep(sweep_dir), dim=0, labels=LABELS)
+    exportSweep(str(tmp_path / 'sweep.h5'), sweep, chunk_length=128)
+    assert importCalibration(str(tmp_path / 'sweep.h5')) is None
+
+    imported = importSweep(str(tmp_path / 'sweep.h5'), files=[-1, 0, sweep.paths[2]])
+    np.testing.assert_array_equal(imported.data, sweep.data[[3, 0, 2]])
+    np.testing.assert_array_equal(imported.labels, sweep.labels[[3, 0, 2]])
+    assert imported.paths == [sweep.paths[i] for i in [3, 0, 2]]
+    with pytest.raises(IndexError):
+        importSweep(str(tmp_path / 'sweep.h5'), files=[len(LABELS)])
+
+    imported = importSweep(str(tmp_path / 'sweep.h5'), files=[1], length_window=[0.2, 0.4])
+    inside = (sweep.length >= 0.2) & (sweep.length <= 0.4)
+    np.testing.assert_array_equal(imported.length, sweep.length[inside])
+    np.testing.assert_array_equal(imported.data[0], sweep.data[1][inside])
+
+def test_compact_round_trip(sweep_dir, tmp_path):
+    sweep = SweepArray.fromReaders(readSweep(sweep_dir, compact=True), dim=0, labels=LABELS, compact=True)
+    exportSweep(str(tmp_path / 'sweep.h5'), sweep)
+    assertSweepEqual(importSweep(str(tmp_path / 'sweep.h5')), sweep)
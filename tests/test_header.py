@@ -0,0 +1,26 @@
+from src.header import OBRHeader, normaliseKey
+from src.obr_parser import parseOBRHeader
+from src.synthetic import getSyntheticHeader, writeOBRFile
+
+def test_synthetic_header_fields(tmp_path):
+    path = writeOBRFile(str(tmp_path / '0_Upper.txt'), 10, header=getSyntheticHeader(date='2024-02-03 10:00:00'))
+    header, columns = parseOBRHeader(path)
+    obr_header = OBRHeader(header)
+    assert obr_header.date == '2024-02-03T10:00:00'
+    assert obr_header.resolution == 0.01
+    assert obr_header.gauge_length == 0.02
+    assert obr_header.sensor_spacing == 0.01
+    assert obr_header.sensing_range is None
+    assert columns[0] == 'Length (m)'
+
+def test_similar_keys_are_not_matched():
+    lines = ['Last Update:\t2020-01-01 00:00:00', 'Frequency Range (GHz):\t5', 'Wavelength Spacing (nm):\t0.1']
+    obr_header = OBRHeader(lines + getSyntheticHeader(date='2024-02-03 10:00:00'))
+    assert obr_header.date == '2024-02-03T10:00:00'
+    assert obr_header.sensing_range is None
+    assert obr_header.sensor_spacing == 0.01
+    assert obr_header.get('frequency range (ghz)') == 5.0
+
+def test_normalise_key():
+    assert normaliseKey('Gauge Length (m):') == 'gauge length'
+    assert normaliseKey('  Sensing  Range [m]') == 'sensing range'
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import pytest
+from src.data_reader import LUNAOBRDataReader
+from src.synthetic import writeSyntheticSweep
+
+WINDOWS = [(0.1, 0.2), (0.25, 0.35), (0.0, 1.0)]
+
+def readSweep(file_dir, lazy):
+    reader = LUNAOBRDataReader(str(file_dir), '0', ['Upper', 'Lower'], lazy=lazy)
+    reader.readData(save_figure=False)
+    return reader
+
+@pytest.fixture
+def sweep_dir(tmp_path):
+    writeSyntheticSweep(str(tmp_path), labels=(0,), n_samples=500)
+    return tmp_path
+
+def test_lazy_matches_eager(sweep_dir):
+    eager, lazy = readSweep(sweep_dir, False), readSweep(sweep_dir, True)
+    assert len(lazy.df) == len(eager.df) == 2
+    for dim in range(2):
+        assert list(lazy.getColumns(dim)) == list(eager.getColumns(dim))
+        for col in range(3):
+            np.testing.assert_array_equal(lazy.getColumn(col, dim), eager.getColumn(col, dim))
+        for minlim, maxlim in WINDOWS:
+            assert lazy.getMeanMeasurement(minlim, maxlim, dim) == eager.getMeanMeasurement(minlim, maxlim, dim)
+        np.testing.assert_array_equal(lazy.getMeanMeasurements(WINDOWS, dim), eager.getMeanMeasurements(WINDOWS, dim))
+        np.testing.assert_array_equal(lazy.getSingleMeasurement([0.1, 0.3], dim),
+                                      eager.getSingleMeasurement([0.1, 0.3], dim))
+        assert lazy.getContentHash(dim) == eager.getContentHash(dim)
+
+def test_files_are_read_on_first_access(sweep_dir):
+    lazy = readSweep(sweep_dir, True)
+    eager = readSweep(sweep_dir, False)
+    lazy.getColumn(1, 1)
+    lazy.getMeanMeasurement(0.1, 0.2)
+    assert not lazy.df.isLoaded(0) and not lazy.df.isLoaded(1)
+    assert lazy.df[1].equals(eager.df[1])
+    assert lazy.df.isLoaded(1) and not lazy.df.isLoaded(0)
+    assert [df.shape for df in lazy.df] == [df.shape for df in eager.df]
+
+def test_missing_file_is_skipped_as_eager(sweep_dir):
+    os.remove(str(sweep_dir / '0_Upper.txt'))
+    eager, lazy = readSweep(sweep_dir, False), readSweep(sweep_dir, True)
+    assert len(lazy.df) == len(eager.df) == 1
+    assert lazy.getReadPathList() == eager.getReadPathList()
+    assert lazy.getFileIndex(1) == eager.getFileIndex(1) == 0
+    assert lazy.getMeanMeasurement(0.1, 0.2) == eager.getMeanMeasurement(0.1, 0.2)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from src.calibration import calibrate
+from src.data_reader import LUNAOBRDataReader
+from src.memo import ResultMemo, hashArrays
+from src.sweep_array import SweepArray
+from src.synthetic import writeSyntheticSweep
+
+LABELS = (0, 100, 200)
+WINDOWS = [[0.1, 0.2], [0.3, 0.4]]
+
+def readSweep(file_dir, memo=None, lazy=False):
+    readers = []
+    for label in LABELS:
+        reader = LUNAOBRDataReader(str(file_dir), str(label), ['Upper', 'Lower'], lazy=lazy, memo=memo)
+        reader.readData(save_figure=False)
+        readers.append(reader)
+    return readers
+
+def analyse(reader):
+    return (reader.getMeanMeasurement(0.1, 0.2, 1), reader.getSingleMeasurement([0.15, 0.25]),
+            reader.getMeanMeasurements(WINDOWS))
+
+@pytest.fixture
+def sweep_dir(tmp_path):
+    writeSyntheticSweep(str(tmp_path / 'data'), labels=LABELS, n_samples=500)
+    return tmp_path / 'data'
+
+def test_memoised_reader_matches_eager(sweep_dir, tmp_path):
+    memo = ResultMemo(str(tmp_path / 'memo'))
+    eager = readSweep(sweep_dir)
+    for _ in range(2):
+        for reader, expected in zip(readSweep(sweep_dir, memo), eager):
+            for result, expected_result in zip(analyse(reader), analyse(expected)):
+                np.testing.assert_array_equal(result, expected_result)
+    stats = memo.getStats()
+    assert stats['misses'] == stats['stores'] == 3 * len(LABELS)
+    assert stats['hits'] == 3 * len(LABELS)
+
+    # A new memo finds the results on disk, also for lazy readers of the same files
+    memo = ResultMemo(str(tmp_path / 'memo'))
+    for reader, expected in zip(readSweep(sweep_dir, memo, lazy=True), eager):
+        for result, expected_result in zip(analyse(reader), analyse(expected)):
+            np.testing.assert_array_equal(result, expected_result)
+    assert memo.getStats()['disk_hits'] == 3 * len(LABELS)
+    assert memo.getStats()['misses'] == 0
+
+def test_results_are_copies(tmp_path):
+    memo = ResultMemo(str(tmp_path / 'memo'), disk=False)
+    key = memo.makeKey('test', [np.arange(3)])
+    memo.put(key, np.zeros(3))
+    memo.get(key)[1][:] = 1
+    np.testing.assert_array_equal(memo.get(key)[1], np.zeros(3))
+
+def test_disk_tier_eviction(tmp_path):
+    memo = ResultMemo(str(tmp_path / 'memo'), max_entries=2)
+    memo.put(memo.makeKey('test', [0]), np.zeros(1000))
+    memo.max_bytes = int(2.5 * memo.size())
+    for i in range(1, 5):
+        memo.put(memo.makeKey('test', [i]), np.zeros(1000))
+        assert memo._disk_bytes == memo.size() <= memo.max_bytes
+    assert len(memo._memory) == 2
+    assert memo.get(memo.makeKey('test', [4]))[0]
+    assert not memo.get(memo.makeKey('test', [0]))[0]
+    memo.clear()
+    assert memo.size() == 0
+
+def test_keys():
+    a = np.arange(10, dtype=np.float64)
+    assert hashArrays(a) == hashArrays(a.copy())
+    assert hashArrays(a) != hashArrays(a.astype(np.float32))
+    assert hashArrays(a) != hashArrays(a.reshape(2, 5))
+    assert hashArrays(np.asfortranarray(a.reshape(2, 5))) == hashArrays(a.reshape(2, 5))
+    memo = ResultMemo(disk=False)
+    assert memo.makeKey('mean', ['hash'], [2, 0.5]) == memo.makeKey('mean', ['hash'], [2.0, np.float32(0.5)])
+    assert memo.makeKey('mean', ['hash'], [2, 0.5]) != memo.makeKey('mean', ['hash'], [0.5, 2])
+
+def test_memoised_calibration_matches(sweep_dir, tmp_path):
+    memo = ResultMemo(str(tmp_path / 'memo'))
+    sweep = SweepArray.fromReaders(readSweep(sweep_dir), dim=0, labels=LABELS)
+    expected = calibrate(sweep, windows=WINDOWS)
+    for _ in range(2):
+        calibration = calibrate(SweepArray.fromReaders(readSweep(sweep_dir), dim=0, labels=LABELS),
+                                windows=WINDOWS, memo=memo)
+        np.testing.assert_array_equal(calibration.coef, expected.coef)
+        np.testing.assert_array_equal(calibration.shift, expected.shift)
+    assert memo.getStats()['hits'] == 1
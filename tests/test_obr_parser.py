@@ -0,0 +1,40 @@
+import numpy as np
+from src.benchmark import readLegacy
+from src.obr_parser import parseOBRFile, parseOBRHeader, parseOBRColumns, parseOBRText, iterOBRChunks, readText
+from src.synthetic import getSyntheticHeader, writeOBRFile
+
+def writeFile(tmp_path, n_samples=500, n_columns=4):
+    return writeOBRFile(str(tmp_path / '0_Upper.txt'), n_samples, n_columns, seed=0)
+
+def test_parse_matches_read_csv(tmp_path):
+    path = writeFile(tmp_path)
+    obr_file = parseOBRFile(path)
+    df = readLegacy(path, len(getSyntheticHeader()))
+    assert obr_file.columns == ['Length (m)', 'Spectral Shift (GHz)', 'Shift Quality',
+                                'Spectral Shift (GHz).1', 'Shift Quality.1']
+    # The header ends with the column labels line
+    assert obr_file.header[:-1] == getSyntheticHeader()
+    assert obr_file.data.dtype == np.float64
+    np.testing.assert_array_equal(obr_file.data, df.iloc[:, :5].to_numpy().T)
+    np.testing.assert_array_equal(obr_file.toDataFrame().to_numpy(), df.iloc[:, :5].to_numpy())
+
+def test_partial_parses_match_full_parse(tmp_path):
+    path = writeFile(tmp_path)
+    obr_file = parseOBRFile(path)
+    header, columns = parseOBRHeader(path)
+    assert header == obr_file.header
+    assert columns == obr_file.columns
+    np.testing.assert_array_equal(parseOBRColumns(path, [3, 0, 3]), obr_file.data[[3, 0, 3]])
+    np.testing.assert_array_equal(parseOBRText(readText(path), path).data, obr_file.data)
+
+def test_chunks_match_full_parse(tmp_path):
+    path = writeFile(tmp_path)
+    obr_file = parseOBRFile(path)
+    chunks = list(iterOBRChunks(path, chunk_size=64))
+    assert len(chunks) == 8
+    np.testing.assert_array_equal(np.concatenate([length for length, _ in chunks]), obr_file.data[0])
+    np.testing.assert_array_equal(np.concatenate([values for _, values in chunks], axis=1), obr_file.data[1:])
+
+    length = np.concatenate([length for length, _ in iterOBRChunks(path, 64, [0.1, 0.2])])
+    inside = (obr_file.data[0] >= 0.1) & (obr_file.data[0] <= 0.2)
+    np.testing.assert_array_equal(length, obr_file.data[0][inside])
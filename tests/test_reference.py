@@ -0,0 +1,42 @@
+import os
+import numpy as np
+import pytest
+from src.data_reader import LUNAOBRDataReader
+from src.reference import ReferenceDifference
+from src.synthetic import writeSyntheticSweep
+
+LABELS = (0, 100, 200)
+
+def readSweep(file_dir, **kwargs):
+    readers = []
+    for label in LABELS:
+        reader = LUNAOBRDataReader(str(file_dir), str(label), ['Upper', 'Lower'], **kwargs)
+        reader.readData(save_figure=False)
+        readers.append(reader)
+    return readers
+
+@pytest.fixture
+def sweep_dir(tmp_path):
+    writeSyntheticSweep(str(tmp_path), labels=LABELS, n_samples=500)
+    return tmp_path
+
+@pytest.mark.parametrize('kwargs', [{'lazy': True}, {'compact': True}])
+def test_difference_matches_eager(sweep_dir, kwargs):
+    reference = ReferenceDifference.fromFile(str(sweep_dir / '0_Lower.txt'))
+    eager = readSweep(sweep_dir)
+    expected = reference.differenceSweep(eager, dim=1, labels=LABELS)
+    np.testing.assert_allclose(expected.data[:, :, 0], [reader.getColumn(1, 1) - eager[0].getColumn(1, 1)
+                                                        for reader in eager])
+    sweep = reference.differenceSweep(readSweep(sweep_dir, **kwargs), dim=1, labels=LABELS)
+    np.testing.assert_allclose(sweep.data, expected.data, atol=1e-6)
+    assert sweep.paths == expected.paths
+
+def test_missing_file_uses_its_sufix(sweep_dir):
+    os.remove(str(sweep_dir / '100_Upper.txt'))
+    readers = readSweep(sweep_dir)
+    reference = ReferenceDifference.fromReader(readers[0], dim=1)
+    assert reference.file_path == str(sweep_dir / '0_Lower.txt')
+    np.testing.assert_array_equal(reference.differenceReader(readers[1], dim=1)[0],
+                                  readers[1].getColumn(1, 0) - readers[0].getColumn(1, 1))
+    with pytest.raises(ValueError):
+        reference.differenceReader(readers[1], dim=0)
@@ -0,0 +1,44 @@
+import os
+import src.watcher
+from src.synthetic import writeSyntheticSweep, writeOBRFile
+from src.watcher import OBRWatcher
+
+def makeWatcher(tmp_path, **kwargs):
+    if not (tmp_path / 'data').exists():
+        writeSyntheticSweep(str(tmp_path / 'data'), labels=(0, 100), n_samples=200)
+    return OBRWatcher(str(tmp_path / 'data'), ['Upper', 'Lower'], manifest_path=str(tmp_path / 'manifest.json'),
+                      settle_time=0, poll_interval=0, **kwargs)
+
+def test_each_measurement_is_read_once(tmp_path):
+    watcher = makeWatcher(tmp_path)
+    results = watcher.processOnce()
+    assert sorted(result.file_prefix for result in results) == ['0', '100']
+    assert all(result.ok for result in results)
+    assert watcher.processOnce() == []
+    # The manifest is kept across restarts
+    assert makeWatcher(tmp_path).processOnce() == []
+
+def test_file_rewritten_during_read_is_read_again(tmp_path, monkeypatch):
+    watcher = makeWatcher(tmp_path)
+    path = str(tmp_path / 'data' / '0_Upper.txt')
+    read = src.watcher.readMeasurement
+
+    def rewriteWhileReading(file_dir, file_prefix, *args):
+        if file_prefix == '0':
+            writeOBRFile(path, 300)
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        return read(file_dir, file_prefix, *args)
+
+    monkeypatch.setattr(src.watcher, 'readMeasurement', rewriteWhileReading)
+    watcher.processOnce()
+    monkeypatch.setattr(src.watcher, 'readMeasurement', read)
+    results = watcher.processOnce()
+    assert [result.file_prefix for result in results] == ['0']
+    assert results[0].reader.getColumn(0).size == 300
+
+def test_run_hands_results_to_callbacks(tmp_path):
+    seen = []
+    watcher = makeWatcher(tmp_path, on_measurement=seen.append)
+    assert watcher.run(timeout=0.2) == 2
+    assert sorted(result.file_prefix for result in seen) == ['0', '100']